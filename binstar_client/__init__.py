@@ -1,14 +1,10 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, print_function, unicode_literals
 
-import collections
-import hashlib
 import logging
 import os
 import platform as _platform
-from urllib.parse import quote
 
-import defusedxml.ElementTree as ET
 import requests
 from tqdm import tqdm
 
@@ -29,14 +25,21 @@ from .errors import (
     DestinationPathExists,
     PillowNotInstalled,
 )
+from .mixins.api import ApiMixin
 from .mixins.channels import ChannelsMixin
+from .mixins.core import CoreMixin
 from .mixins.notices import NoticesMixin
 from .mixins.organizations import OrgMixin
 from .mixins.package import PackageMixin
 from .requests_ext import NullAuth
-from .utils import compute_hash, jencode
+from .utils import compute_hash, get_digests, jencode
+from .utils.bandwidth import TokenBucket, parse_rate
+from .utils.batch import BATCH_WORKERS, Batch
+from .utils.compression import install_compression
 from .utils.http_codes import STATUS_CODES
-from .utils.multipart_uploader import multipart_files_upload
+from .utils.multipart_uploader import TRANSFER_POOL_SIZE, create_transfer_session, multipart_files_upload
+from .utils.retry import RetryStatistics
+from .utils.throttle import AdaptiveLimiter, install_throttling
 
 logger = logging.getLogger('binstar')
 
@@ -56,44 +59,135 @@ class HTTPBearerAuth(requests.auth.AuthBase):
         return r
 
 
-class Binstar(OrgMixin, ChannelsMixin, NoticesMixin, PackageMixin):
+class Binstar(OrgMixin, ChannelsMixin, NoticesMixin, PackageMixin, ApiMixin, CoreMixin):
     """
     An object that represents interfaces with the Anaconda repository restful API.
 
     :param token: a token generated by Binstar.authenticate or None for
                   an anonymous user.
+    :param hash_cache: (optional) a :class:`~binstar_client.utils.hashing.HashCache` to consult before
+                       calculating digests of uploaded files.
+    :param retry_policy: (optional) a :class:`~binstar_client.utils.retry.RetryPolicy` to retry steps of file
+                         uploads with after transient errors.
+    :param transfer_pool_size: (optional) maximum number of connections to the storage to keep open for reuse.
+    :param transfer_keep_alive: (optional) reuse connections to the storage between file transfers.
+    :param transfer_retries: (optional) number of times to retry connecting to the storage.
+    :param http_cache: (optional) a :class:`~binstar_client.utils.http_cache.ResponseCache` to store responses of
+                       read-only endpoints in.
+    :param compress_threshold: (optional) minimum size of JSON request bodies (in bytes) to send compressed with
+                               gzip, or :code:`None` to never compress them.
+    :param limit_rate: (optional) maximum rate of file transfers to and from the storage, in bytes per second or with
+                       a :code:`K`/:code:`M`/:code:`G` suffix (e.g. :code:`50M`). It is shared by all concurrent
+                       transfers of the client (see :attr:`~Binstar.bandwidth`).
+
+    Concurrent requests to the API are limited by the :attr:`~Binstar.throttle`, which adapts to throttling responses
+    of the server (see :class:`~binstar_client.utils.throttle.AdaptiveLimiter`).
     """
 
-    def __init__(self, token=None, domain='https://api.anaconda.org', verify=True, **kwargs):
+    # Whether the client is shared by :func:`~binstar_client.utils.config.get_server_api` (and must not be mutated).
+    shared = False
+
+    def __init__(
+        self,
+        token=None,
+        domain='https://api.anaconda.org',
+        verify=True,
+        hash_cache=None,
+        retry_policy=None,
+        transfer_pool_size=TRANSFER_POOL_SIZE,
+        transfer_keep_alive=True,
+        transfer_retries=0,
+        http_cache=None,
+        compress_threshold=None,
+        limit_rate=None,
+        **kwargs,
+    ):
         self._session = requests.Session()
-        self._session.headers['x-binstar-api-version'] = __version__
+        self._session.headers.update(self._default_headers(token))
         self.session.verify = verify
         self.session.auth = NullAuth()
+        self.compress_threshold = compress_threshold
+        if compress_threshold is not None:
+            install_compression(self._session, compress_threshold)
+        self.throttle = AdaptiveLimiter()
+        install_throttling(self._session, self.throttle)
         self.token = token
+        self.hash_cache = hash_cache
+        self.http_cache = http_cache
+        if http_cache is not None:
+            self._session.hooks['response'].append(self._invalidate_http_cache)
+        self.retry_policy = retry_policy
+        self.retry_statistics = RetryStatistics()
+        self._transfer_session = create_transfer_session(
+            pool_size=transfer_pool_size,
+            keep_alive=transfer_keep_alive,
+            retries=transfer_retries,
+        )
+        self.bandwidth = TokenBucket(parse_rate(limit_rate)) if limit_rate else None
         self._token_warning_sent = False
+        self.domain = self._normalize_domain(domain)
 
-        user_agent = 'Anaconda-Client/{} (+https://anaconda.org)'.format(__version__)
-        self._session.headers.update(
-            {
-                'User-Agent': user_agent,
-                'Content-Type': 'application/json',
-                'Accept': 'application/json',
-            }
-        )
+    def __enter__(self):
+        return self
 
-        if token:
-            self._session.headers.update({'Authorization': 'token {}'.format(token)})
+    def __exit__(self, *exc_info):
+        self.close()
 
-        if domain.endswith('/'):
-            domain = domain[:-1]
-        if not domain.startswith(('http://', 'https://')):
-            domain = 'https://' + domain
-        self.domain = domain
+    def close(self):
+        """Close all connections of the client."""
+        self._session.close()
+        self._transfer_session.close()
 
     @property
     def session(self):
         return self._session
 
+    @property
+    def transfer_session(self):
+        """
+        Session used to transfer files to and from the storage.
+
+        It does not share any headers with the :attr:`~Binstar.session`, as storage rejects requests with the custom
+        headers of the API (and must never receive the authorization token).
+        """
+        return self._transfer_session
+
+    def batch(self, max_workers=BATCH_WORKERS):
+        """
+        Create a :class:`~binstar_client.utils.batch.Batch` to call independent API methods concurrently.
+
+        Usage::
+
+            with api.batch(max_workers=8) as batch:
+                for name in names:
+                    batch.submit(api.package, owner, name)
+            packages = batch.results()
+
+        :param max_workers: maximum number of calls to run at the same time.
+        """
+        self.ensure_pool_size(max_workers)
+        return Batch(max_workers=max_workers)
+
+    def ensure_pool_size(self, size):
+        """
+        Make sure the :attr:`~Binstar.session` keeps up to :code:`size` connections to the API open for reuse.
+
+        Growing the pool replaces the transport adapter of the session, so compression and throttling (with the same
+        :attr:`~Binstar.throttle`) are installed over the new one again. Use this method instead of mounting adapters
+        on the session directly.
+        """
+        adapter = self.session.get_adapter(self.domain)
+        while hasattr(adapter, 'adapter'):
+            adapter = adapter.adapter
+        if getattr(adapter, '_pool_maxsize', requests.adapters.DEFAULT_POOLSIZE) >= size:
+            return
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if self.compress_threshold is not None:
+            install_compression(self.session, self.compress_threshold)
+        install_throttling(self.session, self.throttle)
+
     def check_server(self):
         """Check if server is reachable or throw an exception if it isn't."""
         msg = 'API server is unavailable. Please check your API url configuration.'
@@ -113,7 +207,7 @@ class Binstar(OrgMixin, ChannelsMixin, NoticesMixin, PackageMixin):
         res = self.session.get(url)
         try:
             self._check_response(res)
-            res = res.json()
+            res = self._json(res)
             return res['authentication_type']
         except BinstarError:
             return 'password'
@@ -163,23 +257,21 @@ class Binstar(OrgMixin, ChannelsMixin, NoticesMixin, PackageMixin):
         :param application_url: The application's home page
         :param scopes: Scopes let you specify exactly what type of access you need. Scopes limit access for the tokens.
         """
-
-        url = '%s/authentications' % (self.domain)
-        payload = {
-            'scopes': scopes,
-            'note': application,
-            'note_url': application_url,
-            'hostname': hostname,
-            'user': for_user,
-            'max-age': max_age,
-            'strength': strength,
-            'fail-if-exists': fail_if_already_exists,
-        }
-
-        res = self.session.post(url, auth=auth, json=payload)
-        self._check_response(res)
-        res = res.json()
-        token = res['token']
+        if self.shared:
+            raise errors.BinstarError('Unable to authenticate with a shared client, as it would change its token')
+
+        request = self._authenticate_request(
+            application,
+            application_url=application_url,
+            for_user=for_user,
+            scopes=scopes,
+            max_age=max_age,
+            strength=strength,
+            fail_if_already_exists=fail_if_already_exists,
+            hostname=hostname,
+        )
+        res = self.session.post(request.url, auth=auth, json=request.json)
+        token = self._result(request, res)
         self.session.headers.update({'Authorization': 'token %s' % (token)})
         return token
 
@@ -187,311 +279,47 @@ class Binstar(OrgMixin, ChannelsMixin, NoticesMixin, PackageMixin):
         url = f'{self.domain}/scopes'
         res = requests.get(url, timeout=60)
         self._check_response(res)
-        return res.json()
-
-    def authentication(self):
-        """Retrieve information on the current authentication token."""
-        url = '%s/authentication' % (self.domain)
-        res = self.session.get(url)
-        self._check_response(res)
-        return res.json()
-
-    def authentications(self):
-        """Get a list of the current authentication tokens."""
-
-        url = '%s/authentications' % (self.domain)
-        res = self.session.get(url)
-        self._check_response(res)
-        return res.json()
-
-    def remove_authentication(self, auth_name=None, organization=None):
-        """
-        Remove the current authentication or the one given by `auth_name`
-        """
-        if auth_name:
-            if organization:
-                url = '%s/authentications/org/%s/name/%s' % (self.domain, organization, auth_name)
-            else:
-                url = '%s/authentications/name/%s' % (self.domain, auth_name)
-        else:
-            url = '%s/authentications' % (self.domain,)
-
-        res = self.session.delete(url)
-        self._check_response(res, [201])
-
-    def _check_response(self, res, allowed=None, parse_error=None):
-        allowed = [200] if allowed is None else allowed
-
-        if not self._token_warning_sent and 'Conda-Token-Warning' in res.headers:
-            logger.warning('Token warning: %s', res.headers['Conda-Token-Warning'])
-            self._token_warning_sent = True
-
-        if 'X-Anaconda-Lockdown' in res.headers:
-            logger.warning('Anaconda repository is currently in LOCKDOWN mode.')
-
-        if 'X-Anaconda-Read-Only' in res.headers:
-            logger.warning('Anaconda repository is currently in READ ONLY mode.')
-
-        if res.status_code not in allowed:
-            short, long = STATUS_CODES.get(res.status_code, ('?', 'Undefined error'))
-            msg = '%s: %s ([%s] %s -> %s)' % (short, long, res.request.method, res.request.url, res.status_code)
-
-            try:
-                data = res.json()
-            except Exception:
-                data = {}
-
-            if parse_error is not None:
-                msg = parse_error(data, msg)
-            else:
-                msg = data.get('error', msg)
-            raise errors.error_class_for_status_code(res.status_code)(msg, res.status_code)
-
-    def user(self, login=None):
-        """
-        Get user information.
-
-        :param login: (optional) the login name of the user or None. If login is None
-                      this method will return the information of the authenticated user.
-        """
-        if login:
-            url = f'{self.domain}/user/{login}'
-        elif self.token:
-            url = f'{self.domain}/user'
-        else:
-            raise errors.Unauthorized(
-                'Authentication token is missing. Please, use `anaconda login` to reauthenticate.', 401
-            )
-
-        res = self.session.get(url, verify=self.session.verify)
-        self._check_response(res)
-
-        return res.json()
-
-    def user_packages(self, login=None, platform=None, package_type=None, type_=None, access=None):
-        """
-        Returns a list of packages for a given user and optionally filter
-        by `platform`, `package_type` and `type_`.
-
-        :param login: (optional) the login name of the user or None. If login
-                      is None this method will return the packages for the
-                      authenticated user.
-        :param platform: only find packages that include files for this platform.
-           (e.g. 'linux-64', 'osx-64', 'win-32')
-        :param package_type: only find packages that have this kind of file
-           (e.g. 'env', 'conda', 'pypi')
-        :param type_: only find packages that have this conda `type`
-           (i.e. 'app')
-        :param access: only find packages that have this access level
-           (e.g. 'private', 'authenticated', 'public')
-        """
-        if login:
-            url = '{0}/packages/{1}'.format(self.domain, login)
-        else:
-            url = '{0}/packages'.format(self.domain)
-
-        arguments = collections.OrderedDict()
-
-        if platform:
-            arguments['platform'] = platform
-        if package_type:
-            arguments['package_type'] = package_type
-        if type_:
-            arguments['type'] = type_
-        if access:
-            arguments['access'] = access
-
-        res = self.session.get(url, params=arguments)
-        self._check_response(res)
-
-        return res.json()
-
-    def package(self, login, package_name):
-        """
-        Get information about a specific package
-
-        :param login: the login of the package owner
-        :param package_name: the name of the package
-        """
-        url = '%s/package/%s/%s' % (self.domain, login, package_name)
-        res = self.session.get(url)
-        self._check_response(res)
-        return res.json()
-
-    def package_add_collaborator(self, owner, package_name, collaborator):
-        url = '%s/packages/%s/%s/collaborators/%s' % (self.domain, owner, package_name, collaborator)
-        res = self.session.put(url)
-        self._check_response(res, [201])
-
-    def package_remove_collaborator(self, owner, package_name, collaborator):
-        url = '%s/packages/%s/%s/collaborators/%s' % (self.domain, owner, package_name, collaborator)
-        res = self.session.delete(url)
-        self._check_response(res, [201])
-
-    def package_collaborators(self, owner, package_name):
-        url = '%s/packages/%s/%s/collaborators' % (self.domain, owner, package_name)
-        res = self.session.get(url)
-        self._check_response(res, [200])
-        return res.json()
-
-    def all_packages(self, modified_after=None):
-        url = '%s/package_listing' % (self.domain)
-        data = {'modified_after': modified_after or ''}
-        res = self.session.get(url, data=data)
-        self._check_response(res)
-        return res.json()
-
-    def add_package(
-        self,
-        login,
-        package_name,
-        summary=None,
-        license=None,
-        public=True,
-        license_url=None,
-        license_family=None,
-        attrs=None,
-        package_type=None,
-    ):
-        """
-        Add a new package to a users account
-
-        :param login: the login of the package owner
-        :param package_name: the name of the package to be created
-        :param package_type: A type identifier for the package (eg. 'pypi' or 'conda', etc.)
-        :param summary: A short summary about the package
-        :param license: the name of the package license
-        :param license_url: the url of the package license
-        :param public: if true then the package will be hosted publicly
-        :param attrs: A dictionary of extra attributes for this package
-        """
-        package_types = [] if package_type is None else [package_type.value]
-
-        url = '%s/package/%s/%s' % (self.domain, login, package_name)
-
-        attrs = attrs or {}
-        attrs['summary'] = summary
-        attrs['package_types'] = package_types
-        attrs['license'] = {
-            'name': license,
-            'url': license_url,
-            'family': license_family,
-        }
-
-        payload = {'public': bool(public), 'publish': False, 'public_attrs': dict(attrs or {})}
-
-        res = self.session.post(url, json=payload)
-        self._check_response(res)
-        return res.json()
-
-    def update_package(self, login, package_name, attrs):
-        """
-        Update public_attrs of the package on a users account
-
-        :param login: the login of the package owner
-        :param package_name: the name of the package to be updated
-        :param attrs: A dictionary of attributes to update
-        """
-        url = '{}/package/{}/{}'.format(self.domain, login, package_name)
-
-        payload = {'public_attrs': dict(attrs)}
-        res = self.session.patch(url, json=payload)
-        self._check_response(res)
-        return res.json()
-
-    def update_release(self, login, package_name, version, attrs):
-        """
-        Update release public_attrs of the package on a users account
-
-        :param login: the login of the package owner
-        :param package_name: the name of the package to be updated
-        :param version: version of the package to update
-        :param attrs: A dictionary of attributes to update
-        """
-        url = '{}/release/{}/{}/{}'.format(self.domain, login, package_name, version)
-        payload = {'public_attrs': dict(attrs)}
-        res = self.session.patch(url, json=payload)
-        self._check_response(res)
-        return res.json()
-
-    def remove_package(self, username, package_name):
-        url = '%s/package/%s/%s' % (self.domain, username, package_name)
-
-        res = self.session.delete(url)
-        self._check_response(res, [201])
-
-    def release(self, login, package_name, version):
-        """
-        Get information about a specific release
-
-        :param login: the login of the package owner
-        :param package_name: the name of the package
-        :param version: the name of the package
-        """
-        url = '%s/release/%s/%s/%s' % (self.domain, login, package_name, version)
-        res = self.session.get(url)
-        self._check_response(res)
-        return res.json()
+        return self._json(res)
+
+    def _retry(self, function, description, idempotent=True, before_retry=None):
+        """Call a :code:`function`, retrying it according to the :attr:`~Binstar.retry_policy`."""
+        if self.retry_policy is None:
+            return function()
+        return self.retry_policy.call(
+            function,
+            description=description,
+            idempotent=idempotent,
+            before_retry=before_retry,
+            statistics=self.retry_statistics,
+        )
 
-    def remove_release(self, username, package_name, version):
-        """
-        Remove a release and all files under it.
+    def _invalidate_http_cache(self, res, *args, **kwargs):
+        """Drop cached responses of the current identity after any change made through the API."""
+        if self._invalidates_http_cache(res):
+            self.http_cache.clear(self._http_cache_scope())
 
-        :param username: the login of the package owner
-        :param package_name: the name of the package
-        :param version: the name of the package
+    def _send(self, request):
         """
-        url = '%s/release/%s/%s/%s' % (self.domain, username, package_name, version)
-        res = self.session.delete(url)
-        self._check_response(res, [201])
+        Send a :class:`~binstar_client.mixins.core.ApiRequest` with the :attr:`~Binstar.session`, and return its result.
 
-    def add_release(self, login, package_name, version, requirements, announce, release_attrs):
+        Cached requests are served from the :attr:`~Binstar.http_cache` while they are fresh, and revalidated with the
+        server after that.
         """
-        Add a new release to a package.
-
-        :param login: the login of the package owner
-        :param package_name: the name of the package
-        :param version: the version string of the release
-        :param requirements: A dict of requirements NOTE: describe
-        :param announce: An announcement that will be posted to all package watchers
-        """
-
-        url = '%s/release/%s/%s/%s' % (self.domain, login, package_name, version)
-
-        if not release_attrs:
-            release_attrs = {}
-
-        payload = {
-            'requirements': requirements,
-            'announce': announce,
-            'description': None,  # Will be updated with the one on release_attrs
-        }
-        payload.update(release_attrs)
-
-        res = self.session.post(url, json=payload)
-        self._check_response(res)
-        return res.json()
-
-    def distribution(self, login, package_name, release, basename=None):
-        url = '%s/dist/%s/%s/%s/%s' % (self.domain, login, package_name, release, basename)
-
-        res = self.session.get(url)
-        self._check_response(res)
-        return res.json()
-
-    def remove_dist(self, login, package_name, release, basename=None, _id=None):
-        if basename:
-            url = '%s/dist/%s/%s/%s/%s' % (self.domain, login, package_name, release, basename)
-        elif _id:
-            url = '%s/dist/%s/%s/%s/-/%s' % (self.domain, login, package_name, release, _id)
-        else:
-            raise TypeError("method remove_dist expects either 'basename' or '_id' arguments")
-
-        res = self.session.delete(url)
-        self._check_response(res)
-        return res.json()
+        entry = self._cached_entry(request)
+        if (entry is not None) and entry.is_fresh(self.http_cache.ttl):
+            return entry.content
+
+        res = self.session.request(
+            request.method,
+            request.url,
+            params=request.params,
+            data=request.data if request.content is None else request.content,
+            json=request.json,
+            headers=self._request_headers(request, entry),
+        )
+        return self._result(request, res, entry)
 
-    def download(self, login, package_name, release, basename, md5=None):
+    def download(self, login, package_name, release, basename, md5=None, offset=0):
         """
         Download a package distribution
 
@@ -501,18 +329,15 @@ class Binstar(OrgMixin, ChannelsMixin, NoticesMixin, PackageMixin):
         :param basename: the basename of the distribution to download
         :param md5: (optional) an md5 hash of the download if given and the package has not changed
                     None will be returned
+        :param offset: (optional) number of bytes of the distribution already downloaded. Storage is asked to send only
+                       the rest of it with a :code:`Range` header, and replies with :code:`206 Partial Content` if it
+                       supports ranges (a full :code:`200` response otherwise)
 
         :returns: a file like object or None
         """
-
-        url = '%s/download/%s/%s/%s/%s' % (self.domain, login, package_name, release, basename)
-        if md5:
-            headers = {'ETag': md5}
-        else:
-            headers = {}
-
-        res = self.session.get(url, headers=headers, allow_redirects=False)
-        self._check_response(res, allowed=[200, 302, 304])
+        request = self._download_request(login, package_name, release, basename, md5=md5)
+        res = self.session.get(request.url, headers=request.headers, allow_redirects=False)
+        self._result(request, res)
 
         if res.status_code == 200:
             # We received the content directly from anaconda.org
@@ -522,10 +347,12 @@ class Binstar(OrgMixin, ChannelsMixin, NoticesMixin, PackageMixin):
             return None
         if res.status_code == 302:
             # Download from s3:
-            # We need to create a new request (without using session) to avoid
+            # We need to use a separate transfer session to avoid
             # sending the custom headers set on our session to S3 (which causes
             # a failure).
-            res2 = requests.get(res.headers['location'], stream=True, timeout=10 * 60 * 60)
+            res2 = self.transfer_session.get(
+                res.headers['location'], headers=self._range_headers(offset), stream=True, timeout=10 * 60 * 60
+            )
             return res2
 
         return None
@@ -557,93 +384,119 @@ class Binstar(OrgMixin, ChannelsMixin, NoticesMixin, PackageMixin):
         :param distribution_type: pypi or conda or ipynb, etc.
         :param description: (optional) a short description about the file
         :param md5: (optional) base64 encoded md5 hash calculated from package file
-        :param sha256: (optional) base64 encoded sha256 hash calculated from package file
+        :param sha256: (optional) hex encoded sha256 hash calculated from package file
         :param size: (optional) size of package file in bytes
         :param dependencies: (optional) list package dependencies
         :param attrs: any extra attributes about the file (eg. build=1, pyversion='2.7', os='osx')
         :param channels: list of labels package will be available from
         """
-        url = '%s/stage/%s/%s/%s/%s' % (self.domain, login, package_name, release, quote(basename))
         if attrs is None:
             attrs = {}
         if not isinstance(attrs, dict):
             raise TypeError('argument attrs must be a dictionary')
 
-        sha256 = sha256 if sha256 is not None else compute_hash(file, size=size, hash_algorithm=hashlib.sha256)[0]
+        if (md5 is None) or (sha256 is None):
+            digests = get_digests(file, size=size, cache=self.hash_cache)
+            md5 = md5 if md5 is not None else digests.base64('md5')
+            sha256 = sha256 if sha256 is not None else digests.sha256
+            size = digests.size
+        else:
+            size = self._upload_size(file, size)
+
+        stage = self.stage_upload(
+            login,
+            package_name,
+            release,
+            basename,
+            distribution_type,
+            sha256,
+            description=description,
+            dependencies=dependencies,
+            attrs=attrs,
+            channels=channels,
+        )
+        self.upload_staged(stage, basename, file, md5=md5, size=size)
+        return self.commit_upload(login, package_name, release, basename, stage['dist_id'])
 
-        if not isinstance(distribution_type, str):
-            distribution_type = distribution_type.value
+    def stage_upload(
+        self,
+        login,
+        package_name,
+        release,
+        basename,
+        distribution_type,
+        sha256,
+        description='',
+        dependencies=None,
+        attrs=None,
+        channels=('main',),
+    ):
+        """
+        Register a new distribution upload, which content is not transferred yet.
 
-        payload = {
-            'distribution_type': distribution_type,
-            'description': description,
-            'attrs': attrs,
-            'dependencies': dependencies,
-            'channels': channels,
-            'sha256': sha256,
-        }
+        This is the first step of :meth:`~Binstar.upload`.
 
-        res = self.session.post(url, json=payload)
-        self._check_response(res)
-        obj = res.json()
+        :param sha256: hex encoded sha256 hash calculated from package file
+        :return: upload stage details: :code:`dist_id`, :code:`post_url` and :code:`form_data`
+        """
+        request = self._stage_request(
+            login,
+            package_name,
+            release,
+            basename,
+            distribution_type,
+            sha256,
+            description=description,
+            dependencies=dependencies,
+            attrs=attrs,
+            channels=channels,
+        )
+        return self._retry(lambda: self._send(request), 'Staging of %s' % basename)
 
-        s3url = obj['post_url']
-        s3data = obj['form_data']
+    def upload_staged(self, stage, basename, file, md5, size):
+        """
+        Transfer content of a staged distribution to the storage.
 
-        if md5 is None:
-            _hexmd5, b64md5, size = compute_hash(file, size=size)
-        elif size is None:
-            spos = file.tell()
-            file.seek(0, os.SEEK_END)
-            size = file.tell() - spos
-            file.seek(spos)
+        This is the second step of :meth:`~Binstar.upload`.
 
-        s3data['Content-Length'] = str(size)
-        s3data['Content-MD5'] = b64md5
+        :param stage: result of the :meth:`~Binstar.stage_upload`
+        :param md5: base64 encoded md5 hash calculated from package file
+        :param size: size of package file in bytes
+        """
+        s3url = stage['post_url']
+        s3data = self._upload_form(stage, md5, size)
 
+        start = file.tell()
         file_size = os.fstat(file.fileno()).st_size
-        with tqdm(total=file_size, unit='B', unit_scale=True, unit_divisor=1024) as progress:
-            s3res = multipart_files_upload(
-                s3url, s3data, {'file': (basename, file)}, progress, verify=self.session.verify
-            )
-
-        if s3res.status_code != 201:
-            logger.info(s3res.text)
-            xml_error = ET.fromstring(s3res.text)
-            msg_tail = ''
-            if xml_error.find('Code').text == 'InvalidDigest':
-                msg_tail = ' The Content-MD5 or checksum value is not valid.'
-            raise errors.BinstarError('Error uploading package!%s' % msg_tail, s3res.status_code)
-
-        url = '%s/commit/%s/%s/%s/%s' % (self.domain, login, package_name, release, quote(basename))
-        payload = {'dist_id': obj['dist_id']}
-        res = self.session.post(url, json=payload)
-        self._check_response(res)
 
-        return res.json()
-
-    def search(self, query, package_type=None, platform=None):
-        if package_type is not None:
-            package_type = package_type.value
+        def transfer():
+            with tqdm(total=file_size, unit='B', unit_scale=True, unit_divisor=1024) as progress:
+                s3res = multipart_files_upload(
+                    s3url,
+                    s3data,
+                    {'file': (basename, file)},
+                    progress,
+                    session=self.transfer_session,
+                    bandwidth=self.bandwidth,
+                    verify=self.session.verify,
+                )
+
+            if s3res.status_code != 201:
+                logger.info(s3res.text)
+                raise self._upload_error(s3res)
+
+        self._retry(transfer, 'Transfer of %s' % basename, before_retry=lambda: file.seek(start))
+
+    def commit_upload(self, login, package_name, release, basename, dist_id):
+        """
+        Publish a distribution, which content is already transferred.
 
-        url = '%s/search' % self.domain
-        res = self.session.get(
-            url,
-            params={
-                'name': query,
-                'type': package_type,
-                'platform': platform,
-            },
-        )
-        self._check_response(res)
-        return res.json()
+        This is the last step of :meth:`~Binstar.upload`.
 
-    def user_licenses(self):
-        """Download the user current trial/paid licenses."""
-        url = '{domain}/license'.format(domain=self.domain)
-        res = self.session.get(url)
-        self._check_response(res)
-        return res.json()
+        :param dist_id: identifier of the distribution, returned by the :meth:`~Binstar.stage_upload`
+        """
+        request = self._commit_request(login, package_name, release, basename, dist_id)
+        return self._retry(lambda: self._send(request), 'Commit of %s' % basename, idempotent=False)
 
 
 # Deprecated re-imports from binstar_client.mixins
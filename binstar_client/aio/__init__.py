@@ -0,0 +1,403 @@
+"""
+Asynchronous client of the Anaconda repository API, built on :code:`httpx`.
+
+:code:`httpx` is an optional dependency, which is installed with the :code:`full` extra.
+"""
+
+import asyncio
+import logging
+import platform as _platform
+
+try:
+    import httpx
+except ImportError as error:
+    raise ImportError(
+        'httpx is required for the asynchronous client. Install it with:\n\tconda install httpx'
+    ) from error
+
+from binstar_client import errors
+from binstar_client.mixins.api import ApiMixin
+from binstar_client.mixins.channels import ChannelsMixin
+from binstar_client.mixins.core import CoreMixin
+from binstar_client.mixins.notices import NoticesMixin
+from binstar_client.mixins.organizations import OrgMixin
+from binstar_client.mixins.package import PackageMixin
+from binstar_client.utils import get_digests
+from binstar_client.utils.bandwidth import TokenBucket, parse_rate
+from binstar_client.utils.multipart_uploader import TRANSFER_POOL_SIZE, multipart_form
+from binstar_client.utils.retry import RetryStatistics
+from binstar_client.utils.throttle import AdaptiveLimiter
+
+from .transport import AsyncThrottlingTransport
+
+__all__ = ['AsyncBinstar', 'HTTPXBearerAuth']
+
+logger = logging.getLogger('binstar')
+
+TIMEOUT = httpx.Timeout(60.0)
+TRANSFER_TIMEOUT = httpx.Timeout(10 * 60 * 60, connect=60.0)
+
+
+class HTTPXBearerAuth(httpx.Auth):
+    def __init__(self, token):
+        self.token = token
+
+    def auth_flow(self, request):
+        request.headers['Authorization'] = 'Bearer ' + self.token
+        yield request
+
+
+async def _read_in_thread(body):
+    """Read a request body in a worker thread, so reads of large files do not block the event loop."""
+    while chunk := await asyncio.to_thread(body.read, body.chunk_size):
+        yield chunk
+
+
+class AsyncBinstar(OrgMixin, ChannelsMixin, NoticesMixin, PackageMixin, ApiMixin, CoreMixin):
+    """
+    An object that represents interfaces with the Anaconda repository restful API from an :code:`asyncio` event loop.
+
+    Methods are the ones of :class:`~binstar_client.Binstar`, and raise the same errors, but return awaitables. Both
+    clients build requests with the same methods, and only send them differently (see
+    :class:`~binstar_client.mixins.core.ApiRequest`). The client holds open connections, so it should be closed with
+    :meth:`~AsyncBinstar.aclose`, or used as an :code:`async with` context manager.
+
+    :param token: a token generated by Binstar.authenticate or None for
+                  an anonymous user.
+    :param hash_cache: (optional) a :class:`~binstar_client.utils.hashing.HashCache` to consult before
+                       calculating digests of uploaded files.
+    :param retry_policy: (optional) a :class:`~binstar_client.utils.retry.RetryPolicy` to retry steps of file
+                         uploads with after transient errors.
+    :param transfer_pool_size: (optional) maximum number of connections to the storage to keep open for reuse.
+    :param http_cache: (optional) a :class:`~binstar_client.utils.http_cache.ResponseCache` to store responses of
+                       read-only endpoints in. Files of the cache are read and written in worker threads.
+    :param limit_rate: (optional) maximum rate of file transfers to and from the storage (see
+                       :class:`~binstar_client.Binstar`).
+    :param transport: (optional) :code:`httpx` transport to send all requests with.
+
+    Concurrent requests to the API are limited by the :attr:`~AsyncBinstar.throttle`, as with
+    :class:`~binstar_client.Binstar`. Request bodies are never compressed, so :code:`compress_threshold` is ignored.
+    """
+
+    def __init__(
+        self,
+        token=None,
+        domain='https://api.anaconda.org',
+        verify=True,
+        hash_cache=None,
+        retry_policy=None,
+        transfer_pool_size=TRANSFER_POOL_SIZE,
+        http_cache=None,
+        limit_rate=None,
+        transport=None,
+        **kwargs,
+    ):
+        self.throttle = AdaptiveLimiter()
+        self._session = httpx.AsyncClient(
+            headers=self._default_headers(token),
+            timeout=TIMEOUT,
+            transport=AsyncThrottlingTransport(transport or httpx.AsyncHTTPTransport(verify=verify), self.throttle),
+            event_hooks={'response': [self._invalidate_http_cache]},
+        )
+        self._transfer_session = httpx.AsyncClient(
+            verify=verify,
+            timeout=TRANSFER_TIMEOUT,
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=transfer_pool_size),
+            transport=transport,
+        )
+        self.token = token
+        self.hash_cache = hash_cache
+        self.http_cache = http_cache
+        self.retry_policy = retry_policy
+        self.retry_statistics = RetryStatistics()
+        self.bandwidth = TokenBucket(parse_rate(limit_rate)) if limit_rate else None
+        self._token_warning_sent = False
+        self.domain = self._normalize_domain(domain)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """Close all connections of the client."""
+        await self._session.aclose()
+        await self._transfer_session.aclose()
+
+    @property
+    def session(self):
+        return self._session
+
+    @property
+    def transfer_session(self):
+        """
+        Client used to transfer files to and from the storage.
+
+        It does not share any headers with the :attr:`~AsyncBinstar.session` (see
+        :attr:`binstar_client.Binstar.transfer_session`).
+        """
+        return self._transfer_session
+
+    async def check_server(self):
+        """Check if server is reachable or throw an exception if it isn't."""
+        msg = 'API server is unavailable. Please check your API url configuration.'
+
+        try:
+            response = await self.session.head(self.domain)
+        except Exception as error:
+            raise errors.ServerError(msg) from error
+
+        try:
+            self._check_response(response)
+        except errors.NotFound as error:
+            raise errors.ServerError(msg) from error
+
+    async def authentication_type(self):
+        url = '%s/authentication-type' % self.domain
+        res = await self.session.get(url)
+        try:
+            self._check_response(res)
+            res = self._json(res)
+            return res['authentication_type']
+        except errors.BinstarError:
+            return 'password'
+
+    async def bearer_authentication(self, *args, **kwargs):
+        access_token = kwargs.pop('auth')
+        return await self._authenticate(HTTPXBearerAuth(access_token), *args, **kwargs)
+
+    async def authenticate(self, username, password, *args, **kwargs):
+        return await self._authenticate(httpx.BasicAuth(username, password), *args, **kwargs)
+
+    async def _authenticate(
+        self,
+        auth,
+        application,
+        application_url=None,
+        for_user=None,
+        scopes=None,
+        max_age=None,
+        strength='strong',
+        fail_if_already_exists=False,
+        hostname=_platform.node(),
+    ):
+        """
+        Create an authentication token (see :meth:`binstar_client.Binstar._authenticate`).
+
+        :param auth: :code:`httpx` authentication of the user to create a token for
+        """
+        request = self._authenticate_request(
+            application,
+            application_url=application_url,
+            for_user=for_user,
+            scopes=scopes,
+            max_age=max_age,
+            strength=strength,
+            fail_if_already_exists=fail_if_already_exists,
+            hostname=hostname,
+        )
+        res = await self.session.post(request.url, auth=auth, json=request.json)
+        token = self._result(request, res)
+        self.session.headers['Authorization'] = 'token %s' % (token)
+        return token
+
+    async def list_scopes(self):
+        url = f'{self.domain}/scopes'
+        res = await self.transfer_session.get(url, timeout=TIMEOUT)
+        self._check_response(res)
+        return self._json(res)
+
+    async def _retry(self, function, description, idempotent=True, before_retry=None):
+        """Await a coroutine :code:`function`, retrying it according to the :attr:`~AsyncBinstar.retry_policy`."""
+        if self.retry_policy is None:
+            return await function()
+        return await self.retry_policy.call_async(
+            function,
+            description=description,
+            idempotent=idempotent,
+            before_retry=before_retry,
+            statistics=self.retry_statistics,
+        )
+
+    async def _invalidate_http_cache(self, res):
+        """Drop cached responses of the current identity after any change made through the API."""
+        if self._invalidates_http_cache(res):
+            await asyncio.to_thread(self.http_cache.clear, self._http_cache_scope())
+
+    async def _send(self, request):
+        """
+        Send a :class:`~binstar_client.mixins.core.ApiRequest` with the :attr:`~AsyncBinstar.session`, and return its
+        result.
+
+        Cached requests are served from the :attr:`~AsyncBinstar.http_cache` as with :class:`~binstar_client.Binstar`,
+        while files of the cache are read and written in worker threads.
+        """
+        caching = request.cached and (self.http_cache is not None)
+        entry = None
+        if caching:
+            entry = await asyncio.to_thread(self._cached_entry, request)
+            if (entry is not None) and entry.is_fresh(self.http_cache.ttl):
+                return entry.content
+
+        res = await self.session.request(
+            request.method,
+            request.url,
+            params=request.params,
+            data=request.data,
+            content=request.content,
+            json=request.json,
+            headers=self._request_headers(request, entry),
+        )
+        if caching:
+            return await asyncio.to_thread(self._result, request, res, entry)
+        return self._result(request, res, entry)
+
+    async def download(self, login, package_name, release, basename, md5=None, offset=0):
+        """
+        Download a package distribution
+
+        See :meth:`binstar_client.Binstar.download` for the description of arguments.
+
+        :returns: a streamed :class:`httpx.Response` (iterate it with :code:`aiter_bytes()` and close it with
+                  :code:`aclose()`), or None. Chunks of it may be iterated within the :attr:`~AsyncBinstar.bandwidth`
+                  with :func:`~binstar_client.utils.bandwidth.throttled_chunks_async`.
+        """
+        request = self._download_request(login, package_name, release, basename, md5=md5)
+        res = await self.session.get(request.url, headers=request.headers, follow_redirects=False)
+        self._result(request, res)
+
+        if res.status_code == 200:
+            # We received the content directly from anaconda.org
+            return res
+        if res.status_code == 304:
+            # The content has not changed
+            return None
+        if res.status_code == 302:
+            # Download from s3 with the transfer client, which does not send the custom headers of the API
+            location = self.transfer_session.build_request(
+                'GET', res.headers['location'], headers=self._range_headers(offset)
+            )
+            return await self.transfer_session.send(location, stream=True)
+
+        return None
+
+    async def upload(
+        self,
+        login,
+        package_name,
+        release,
+        basename,
+        file,
+        distribution_type,
+        description='',
+        md5=None,
+        sha256=None,
+        size=None,
+        dependencies=None,
+        attrs=None,
+        channels=('main',),
+    ):
+        """
+        Upload a new distribution to a package release.
+
+        See :meth:`binstar_client.Binstar.upload` for the description of arguments.
+        """
+        if attrs is None:
+            attrs = {}
+        if not isinstance(attrs, dict):
+            raise TypeError('argument attrs must be a dictionary')
+
+        if (md5 is None) or (sha256 is None):
+            # Hashing is CPU bound, so keep it away from the event loop
+            digests = await asyncio.to_thread(get_digests, file, size=size, cache=self.hash_cache)
+            md5 = md5 if md5 is not None else digests.base64('md5')
+            sha256 = sha256 if sha256 is not None else digests.sha256
+            size = digests.size
+        else:
+            size = self._upload_size(file, size)
+
+        stage = await self.stage_upload(
+            login,
+            package_name,
+            release,
+            basename,
+            distribution_type,
+            sha256,
+            description=description,
+            dependencies=dependencies,
+            attrs=attrs,
+            channels=channels,
+        )
+        await self.upload_staged(stage, basename, file, md5=md5, size=size)
+        return await self.commit_upload(login, package_name, release, basename, stage['dist_id'])
+
+    async def stage_upload(
+        self,
+        login,
+        package_name,
+        release,
+        basename,
+        distribution_type,
+        sha256,
+        description='',
+        dependencies=None,
+        attrs=None,
+        channels=('main',),
+    ):
+        """
+        Register a new distribution upload, which content is not transferred yet.
+
+        See :meth:`binstar_client.Binstar.stage_upload` for the description of arguments.
+        """
+        request = self._stage_request(
+            login,
+            package_name,
+            release,
+            basename,
+            distribution_type,
+            sha256,
+            description=description,
+            dependencies=dependencies,
+            attrs=attrs,
+            channels=channels,
+        )
+        return await self._retry(lambda: self._send(request), 'Staging of %s' % basename)
+
+    async def upload_staged(self, stage, basename, file, md5, size):
+        """
+        Transfer content of a staged distribution to the storage.
+
+        The :code:`file` is read in worker threads (within the :attr:`~AsyncBinstar.bandwidth`), so transfers of large
+        files do not block the event loop.
+
+        See :meth:`binstar_client.Binstar.upload_staged` for the description of arguments.
+        """
+        s3data = self._upload_form(stage, md5, size)
+
+        start = file.tell()
+
+        async def transfer():
+            body, content_type = await asyncio.to_thread(
+                multipart_form, s3data, {'file': (basename, file)}, bandwidth=self.bandwidth
+            )
+            s3res = await self.transfer_session.post(
+                stage['post_url'],
+                content=_read_in_thread(body),
+                headers={'Content-Type': content_type, 'Content-Length': str(body.len)},
+            )
+
+            if s3res.status_code != 201:
+                logger.info(s3res.text)
+                raise self._upload_error(s3res)
+
+        await self._retry(transfer, 'Transfer of %s' % basename, before_retry=lambda: file.seek(start))
+
+    async def commit_upload(self, login, package_name, release, basename, dist_id):
+        """
+        Publish a distribution, which content is already transferred.
+
+        See :meth:`binstar_client.Binstar.commit_upload` for the description of arguments.
+        """
+        request = self._commit_request(login, package_name, release, basename, dist_id)
+        return await self._retry(lambda: self._send(request), 'Commit of %s' % basename, idempotent=False)
@@ -0,0 +1,73 @@
+# -*- coding: utf8 -*-
+
+"""Transports of the asynchronous client."""
+
+from __future__ import annotations
+
+__all__ = ['AsyncThrottlingTransport']
+
+import logging
+import typing
+
+import httpx
+
+from binstar_client.utils.throttle import THROTTLE_RETRIES, AdaptiveLimiter, _may_resend, _throttling_delay
+
+
+logger = logging.getLogger('binstar.throttle')
+
+
+class AsyncThrottlingTransport(httpx.AsyncBaseTransport):
+    """
+    Same as :class:`~binstar_client.utils.throttle.ThrottlingAdapter`, but for :code:`httpx` clients.
+
+    Only requests with content in memory are sent again, as streamed content can not be replayed.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        limiter: AdaptiveLimiter,
+        max_retries: int = THROTTLE_RETRIES,
+    ) -> None:
+        """Initialize new :class:`~AsyncThrottlingTransport` instance."""
+        self.transport: typing.Final[httpx.AsyncBaseTransport] = transport
+        self.limiter: typing.Final[AdaptiveLimiter] = limiter
+        self.max_retries: typing.Final[int] = max_retries
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Send a request, waiting for the limiter and resending it if it is throttled."""
+        attempt: int = 1
+        while True:
+            await self.limiter.acquire_async()
+            response: typing.Optional[httpx.Response] = None
+            delay: typing.Optional[float] = None
+            try:
+                response = await self.transport.handle_async_request(request)
+            finally:
+                throttled: typing.Optional[bool] = None
+                if response is not None:
+                    delay = _throttling_delay(response.status_code, response.headers, attempt)
+                    throttled = delay is not None
+                self.limiter.release(throttled=throttled, delay=delay or 0.0)
+
+            if (
+                (delay is None)
+                or (attempt > self.max_retries)
+                or not isinstance(request.stream, httpx.ByteStream)
+                or not _may_resend(request.method, response.status_code, response.headers)
+            ):
+                return response
+            logger.debug(
+                'Request %s %s throttled with %s, retrying in %.1f seconds',
+                request.method,
+                request.url,
+                response.status_code,
+                delay,
+            )
+            await response.aclose()
+            attempt += 1
+
+    async def aclose(self) -> None:
+        """Close the wrapped transport."""
+        await self.transport.aclose()
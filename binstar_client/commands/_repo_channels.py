@@ -19,6 +19,8 @@ from binstar_client.commands import _channel_notices as channel_notices
 from binstar_client.repocore import RepoCoreClient, ResolvedChannel
 from binstar_client.repocore.errors import RepoCoreError, Unauthorized
 from binstar_client.repocore.package_utils import PackageType, determine_package_type, windows_glob
+from binstar_client.utils.bandwidth import TokenBucket, parse_rate
+from binstar_client.utils.config import get_config
 
 _PAGE_SIZE = 100
 
@@ -441,6 +443,12 @@ def upload_command(
         "-t",
         help="Package type. Defaults to auto-detect.",
     ),
+    limit_rate: Optional[int] = typer.Option(
+        None,
+        "--limit-rate",
+        help="Maximum upload rate in bytes per second, with an optional K, M or G suffix (e.g. 50M)",
+        parser=parse_rate,
+    ),
     from_deprecated_channel_flag: bool = False,
 ) -> None:
     """Upload packages to your Anaconda repository."""
@@ -458,6 +466,10 @@ def upload_command(
 
     api = ctx.obj.repo_api
 
+    limit_rate = limit_rate or get_config().get("limit_rate")
+    if limit_rate:
+        api.bandwidth = TokenBucket(parse_rate(limit_rate))
+
     channels = channel or []
     if not channels:
         console.print("[red]Error:[/red] No channel specified. Use --channel option to specify target channel(s).")
@@ -50,6 +50,13 @@ prefix the option with `sites.site_name` e.g.
   * `url`: Set the anaconda api url (default: https://api.anaconda.org)
   * `ssl_verify`: Perform ssl validation on the https requests.
     ssl_verify may be `True`, `False` or a path to a root CA pem file.
+  * `http_cache`: Cache responses of read-only requests (package, release and channel details) on disk,
+    and revalidate them with the server instead of downloading them again (default: no).
+  * `http_cache_ttl`: Number of seconds to use cached responses without revalidating them (default: 60).
+  * `compress_requests`: Send large JSON request bodies compressed with gzip (default: no).
+    Compression is turned off automatically if the server does not accept compressed requests.
+  * `limit_rate`: Maximum rate of file uploads and downloads, shared by all parallel transfers,
+    in bytes per second or with a K, M or G suffix (e.g. `50M`; default: unlimited).
 
 
 ###### Toggle auto_register when doing anaconda upload
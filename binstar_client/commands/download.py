@@ -7,23 +7,31 @@ Usage:
 from __future__ import unicode_literals
 
 import argparse
+import hashlib
 import logging
 import os
 from collections import OrderedDict
 from contextlib import suppress
 from time import mktime
-from typing import List
+from typing import List, Optional
 
+import requests
 import typer
 from dateutil.parser import parse as parse_date
 
 from binstar_client import errors
 from binstar_client.errors import BinstarError, DestinationPathExists
 from binstar_client.utils import get_server_api
+from binstar_client.utils.bandwidth import format_rate, parse_rate, throttled_chunks
 from binstar_client.utils.config import PackageType
+from binstar_client.utils.hashing import BUFFER_SIZE, HashCache, get_digests
+from binstar_client.utils.multipart_uploader import TRANSFER_POOL_SIZE, transfer_chunk_size
+from binstar_client.utils.retry import RetryPolicy
 
 logger = logging.getLogger('binstar.download')
 
+VERIFIED_DIGESTS = ('md5', 'sha256')
+
 
 def parse(handle):
     """
@@ -49,10 +57,11 @@ class Downloader:
     Download files from your Anaconda repository.
     """
 
-    def __init__(self, aserver_api, username, notebook):
+    def __init__(self, aserver_api, username, notebook, retry_policy=None):
         self.aserver_api = aserver_api
         self.username = username
         self.notebook = notebook
+        self.retry_policy = retry_policy or RetryPolicy()
         self.output = None
 
     def __call__(self, package_types, output='.', force=False):
@@ -60,10 +69,13 @@ class Downloader:
         self.ensure_output()
         return self.download_files(package_types, force)
 
-    def list_download_files(self, package_types, output='.', force=False):
+    def list_download_files(self, package_types, output='.', force=False, update=False):
         """
         This additional method was created to better handle the log output
         as files are downloaded one by one on the commands/download.py.
+
+        Existing files are listed only if they may be overwritten (:code:`force`), or updated if they changed
+        (:code:`update`).
         """
         self.output = output
         self.ensure_output()
@@ -74,44 +86,181 @@ class Downloader:
                 pkg_type = PackageType(pkg_type)
 
             if pkg_type in package_types:
-                if self.can_download(file, force):
+                if self.can_download(file, force or update):
                     files[file['basename']] = file
                 else:
                     raise DestinationPathExists(file['basename'])
         return files
 
-    def download_files(self, package_types, force=False):
-        output = []
-        for file in self.list_files():
-            # Check type
-            pkg_type = file.get('type', '')
-            with suppress(ValueError):
-                pkg_type = PackageType(pkg_type)
+    def download_files(self, package_types, force=False, jobs=1, update=False):
+        files = self.list_download_files(package_types, output=self.output, force=force, update=update)
+        return sorted(self.download_all(files.values(), jobs=jobs, update=update))
 
-            if pkg_type in package_types:
-                if self.can_download(file, force):
-                    self.download(file)
-                    output.append(file['basename'])
-                else:
-                    raise DestinationPathExists(file['basename'])
-        return sorted(output)
+    def download_all(self, dists, jobs=1, update=False):
+        """
+        Download several files, up to :code:`jobs` of them at the same time.
+
+        :return: basenames of the downloaded files, in the order of :code:`dists` (without unchanged files skipped in
+                 the :code:`update` mode)
+        """
+        with self.aserver_api.batch(max_workers=jobs) as batch:
+            for dist in dists:
+                batch.submit(self.download, dist, update=update)
+        return [filename for filename in batch.results() if filename is not None]
 
-    def download(self, dist):
+    def download(self, dist, update=False):
         """
         Download file into location.
+
+        Content is streamed into a :code:`<name>.part` file next to the destination, which replaces the destination
+        only once its size is verified. If the transfer is interrupted, the next attempt (or the next run) resumes it
+        from the end of the :code:`.part` file.
+
+        In the :code:`update` mode, an existing file is downloaded again only if its md5 differs from the one on the
+        server. It is compared with the md5 from the listing if it is available, or sent to the server otherwise.
+
+        :return: basename of the downloaded file, or None if it is unchanged
         """
         filename = dist['basename']
-        requests_handle = self.aserver_api.download(self.username, self.notebook, dist['version'], filename)
+        path = os.path.join(self.output, filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        md5 = None
+        if update and os.path.isfile(path):
+            md5 = self.local_md5(path)
+            if md5 == dist.get('md5'):
+                logger.debug('%s is up to date', filename)
+                return None
+
+        part_path = path + '.part'
+        changed = self.retry_policy.call(
+            lambda: self.download_part(dist, part_path, md5=md5),
+            description='Download of %s' % filename,
+            statistics=getattr(self.aserver_api, 'retry_statistics', None),
+        )
+        if not changed:
+            logger.debug('%s is up to date', filename)
+            with suppress(OSError):
+                os.remove(part_path)
+            return None
+        os.replace(part_path, path)
+        return filename
+
+    def local_md5(self, path):
+        """Calculate md5 of a local file, reusing digests from the hash cache of the client (if it has one)."""
+        with open(path, 'rb') as stream:
+            return get_digests(stream, ('md5',), cache=getattr(self.aserver_api, 'hash_cache', None)).md5
+
+    def download_part(self, dist, part_path, md5=None):
+        """
+        Download the rest of a file into its :code:`.part` file, and verify its final size and digests.
 
-        if not os.path.exists(os.path.dirname(filename)):
-            try:
-                os.makedirs(os.path.dirname(filename))
-            except OSError:
-                pass
+        Content is hashed while it is written, so verification does not need another pass over the file (only the
+        already downloaded part of a resumed file is read once).
 
-        with open(os.path.join(self.output, filename), 'wb') as fdout:
-            for chunk in requests_handle.iter_content(4096):
-                fdout.write(chunk)
+        :param md5: md5 of the existing local file, to skip the download if the file on the server is the same
+        :return: False if the file is unchanged, True otherwise
+        :raises requests.ConnectionError: if the transfer ended before the whole file was received
+        """
+        filename = dist['basename']
+        hashers = {algorithm: hashlib.new(algorithm) for algorithm in VERIFIED_DIGESTS if dist.get(algorithm)}
+        expected = int(dist['size']) if dist.get('size') is not None else None
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if (expected is not None) and (offset > expected):
+            offset = 0
+        if (expected is not None) and (offset == expected):
+            self.hash_part(part_path, hashers)
+            self.verify_part(dist, part_path, hashers)
+            return True
+
+        requests_handle = self.aserver_api.download(
+            self.username, self.notebook, dist['version'], filename, md5=md5, offset=offset
+        )
+        if requests_handle is None:
+            return False
+        try:
+            if requests_handle.status_code == 416:
+                # Range is not satisfiable, so the ".part" file does not match the file on the storage anymore
+                os.remove(part_path)
+                raise requests.ConnectionError('Unable to resume download of %s, starting over' % filename)
+            if requests_handle.status_code >= 400:
+                raise errors.error_class_for_status_code(requests_handle.status_code)(
+                    'Unable to download %s (%s)' % (filename, requests_handle.status_code),
+                    requests_handle.status_code,
+                )
+
+            content_range = requests_handle.headers.get('Content-Range', '')
+            if requests_handle.status_code == 206:
+                if not content_range.startswith('bytes %d-' % offset):
+                    # Partial content does not continue the ".part" file, and is not the whole file either
+                    with suppress(OSError):
+                        os.remove(part_path)
+                    raise requests.ConnectionError(
+                        'Unexpected range of %s received (%s), starting over' % (filename, content_range)
+                    )
+            elif requests_handle.status_code == 200:
+                offset = 0
+            else:
+                raise errors.BinstarError(
+                    'Unable to download %s (%s)' % (filename, requests_handle.status_code),
+                    requests_handle.status_code,
+                )
+            if expected is None:
+                total = requests_handle.headers.get('Content-Length', '')
+                if offset:
+                    total = content_range.rpartition('/')[2]
+                expected = int(total) if total.isdigit() else None
+
+            chunk_size = transfer_chunk_size(expected)
+            bandwidth = getattr(self.aserver_api, 'bandwidth', None)
+            if bandwidth is not None:
+                chunk_size = min(chunk_size, bandwidth.read_size)
+
+            if offset:
+                self.hash_part(part_path, hashers)
+            with open(part_path, 'ab' if offset else 'wb') as fdout:
+                for chunk in throttled_chunks(requests_handle.iter_content(chunk_size), bandwidth):
+                    fdout.write(chunk)
+                    for hasher in hashers.values():
+                        hasher.update(chunk)
+                size = fdout.tell()
+        finally:
+            requests_handle.close()
+
+        if (expected is not None) and (size < expected):
+            raise requests.ConnectionError('Download of %s ended after %d of %d bytes' % (filename, size, expected))
+        if (expected is not None) and (size > expected):
+            os.remove(part_path)
+            raise errors.BinstarError(
+                'Downloaded %s is larger than expected (%d of %d bytes)' % (filename, size, expected)
+            )
+        self.verify_part(dist, part_path, hashers)
+        return True
+
+    @staticmethod
+    def hash_part(part_path, hashers):
+        """Feed the already downloaded content of a :code:`.part` file to the :code:`hashers`."""
+        if not hashers:
+            return
+        with open(part_path, 'rb') as stream:
+            for chunk in iter(lambda: stream.read(BUFFER_SIZE), b''):
+                for hasher in hashers.values():
+                    hasher.update(chunk)
+
+    @staticmethod
+    def verify_part(dist, part_path, hashers):
+        """
+        Compare digests of a downloaded file with the ones from the listing.
+
+        :raises BinstarError: if any of them differ (the :code:`.part` file is removed, so the next attempt starts over)
+        """
+        for algorithm, hasher in hashers.items():
+            if hasher.hexdigest() != dist[algorithm]:
+                os.remove(part_path)
+                raise errors.BinstarError(
+                    '%s of the downloaded %s does not match: expected %s, got %s'
+                    % (algorithm, dist['basename'], dist[algorithm], hasher.hexdigest())
+                )
 
     def can_download(self, dist, force=False):
         """
@@ -169,6 +318,11 @@ def add_parser(subparsers):
     parser.add_argument('handle', help='<channel_name>/<package_name>', action='store')
 
     parser.add_argument('-f', '--force', help='Overwrite', action='store_true')
+    parser.add_argument(
+        '--update',
+        help='Download again only the existing files which changed on the server',
+        action='store_true',
+    )
 
     parser.add_argument('-o', '--output', help='Download as', default='.')
     pkg_types = ', '.join(pkg_type.value for pkg_type in PackageType)
@@ -178,23 +332,55 @@ def add_parser(subparsers):
         help='Set the package type [{0}]. Defaults to downloading all package types available'.format(pkg_types),
         action='append',
     )
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=1,
+        help='Number of files to download in parallel (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--limit-rate',
+        type=parse_rate,
+        help='Maximum download rate in bytes per second, with an optional K, M or G suffix (e.g. 50M)',
+    )
     parser.set_defaults(main=main)
 
 
 def main(args):
-    aserver_api = get_server_api(args.token, args.site)
+    jobs = max(args.jobs, 1)
+    aserver_api = get_server_api(
+        args.token,
+        args.site,
+        limit_rate=args.limit_rate,
+        transfer_pool_size=max(jobs, TRANSFER_POOL_SIZE),
+        hash_cache=HashCache() if args.update else None,
+    )
     username, package_name = parse(args.handle)
     username = username or aserver_api.user()['login']
     downloader = Downloader(aserver_api, username, package_name)
     packages_types = list(map(PackageType, args.package_type) if args.package_type else PackageType)
 
     try:
-        download_files = downloader.list_download_files(packages_types, output=args.output, force=args.force)
-        for download_file, download_dist in download_files.items():
-            downloader.download(download_dist)
+        download_files = downloader.list_download_files(
+            packages_types, output=args.output, force=args.force, update=args.update
+        )
+        downloaded = downloader.download_all(download_files.values(), jobs=jobs, update=args.update)
+        for download_file in downloaded:
             logger.info('%s has been downloaded as %s', args.handle, download_file)
+        if args.update:
+            logger.info('%d of %d files are up to date', len(download_files) - len(downloaded), len(download_files))
+        if (bandwidth := aserver_api.bandwidth) is not None:
+            logger.info(
+                'Average transfer rate: %s (limited to %s)',
+                format_rate(bandwidth.effective_rate),
+                format_rate(bandwidth.rate),
+            )
     except (errors.DestinationPathExists, errors.NotFound, errors.BinstarError, OSError) as err:
         logger.info(err)
+    finally:
+        if aserver_api.hash_cache is not None:
+            aserver_api.hash_cache.flush()
 
 
 def mount_subcommand(app: typer.Typer, name: str, hidden: bool, help_text: str, context_settings: dict) -> None:
@@ -216,6 +402,11 @@ def mount_subcommand(app: typer.Typer, name: str, hidden: bool, help_text: str,
             '--force',
             help='Overwrite',
         ),
+        update: bool = typer.Option(
+            False,
+            '--update',
+            help='Download again only the existing files which changed on the server',
+        ),
         output: str = typer.Option(
             '.',
             '-o',
@@ -228,14 +419,30 @@ def mount_subcommand(app: typer.Typer, name: str, hidden: bool, help_text: str,
             '--package-type',
             help='Set the package type [{0}]. Defaults to downloading all package types available'.format(pkg_types),
         ),
+        jobs: int = typer.Option(
+            1,
+            '-j',
+            '--jobs',
+            min=1,
+            help='Number of files to download in parallel',
+        ),
+        limit_rate: Optional[int] = typer.Option(
+            None,
+            '--limit-rate',
+            help='Maximum download rate in bytes per second, with an optional K, M or G suffix (e.g. 50M)',
+            parser=parse_rate,
+        ),
     ) -> None:
         args = argparse.Namespace(
             token=ctx.obj.params.get('token'),
             site=ctx.obj.params.get('site'),
             handle=handle,
             force=force,
+            update=update,
             output=output,
             package_type=package_type or None,
+            jobs=jobs,
+            limit_rate=limit_rate,
         )
 
         main(args)
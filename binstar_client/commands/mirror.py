@@ -0,0 +1,376 @@
+"""
+Usage:
+    anaconda mirror <owner> <directory>
+    anaconda mirror <owner>/<label> <directory>
+
+Mirror conda packages of a label ("main" by default) into a local conda channel.
+
+Files are placed in the <subdir>/<filename> layout, with a repodata.json in each subdir, so the directory may be used
+with "conda install -c file://<directory>". The state of the mirror is kept in the .mirror-state.json file, so the next
+run of the same command fetches only new or changed files, and removes the ones which are not in the label anymore.
+"""
+
+from __future__ import unicode_literals
+
+import argparse
+import logging
+import os
+import threading
+from typing import Optional
+
+import typer
+
+from binstar_client import errors
+from binstar_client.commands.download import Downloader
+from binstar_client.errors import BinstarError
+from binstar_client.utils import get_server_api, json_codec
+from binstar_client.utils.bandwidth import format_rate, parse_rate
+from binstar_client.utils.config import PackageType
+from binstar_client.utils.hashing import HashCache
+from binstar_client.utils.multipart_uploader import TRANSFER_POOL_SIZE
+
+logger = logging.getLogger('binstar.mirror')
+
+STATE_FILENAME = '.mirror-state.json'
+REPODATA_FILENAME = 'repodata.json'
+
+REPODATA_KEYS = (
+    'arch',
+    'build',
+    'build_number',
+    'constrains',
+    'depends',
+    'features',
+    'license',
+    'license_family',
+    'noarch',
+    'platform',
+    'timestamp',
+    'track_features',
+)
+
+# conda expects every channel to have a "noarch" subdir, even an empty one
+REQUIRED_SUBDIRS = ('noarch',)
+
+
+def parse(handle):
+    """
+    >>> parse("owner")
+    ('owner', 'main')
+    >>> parse("owner/label")
+    ('owner', 'label')
+
+    :param handle: String
+    :return: owner, label
+    """
+    owner, _, label = handle.partition('/')
+    if (not owner) or ('/' in label):
+        raise BinstarError("{} can't be parsed".format(handle))
+    return owner, label or 'main'
+
+
+def read_json(path, default):
+    """Read a JSON document, or return :code:`default` if there is no valid one."""
+    try:
+        with open(path, 'rb') as stream:
+            return json_codec.loads(stream.read())
+    except (OSError, ValueError):
+        return default
+
+
+def write_json(path, content):
+    """Write a JSON document atomically, so readers never see a partially written file."""
+    temp_path = '%s.%d.tmp' % (path, os.getpid())
+    with open(temp_path, 'wb') as stream:
+        stream.write(json_codec.dumps(content))
+    os.replace(temp_path, path)
+
+
+def repodata_record(package_name, dist):
+    """Build an entry of :code:`repodata.json` for a file from the package listing."""
+    attrs = dist.get('attrs') or {}
+    record = {key: attrs[key] for key in REPODATA_KEYS if attrs.get(key) is not None}
+    record.setdefault('depends', [])
+    record['name'] = package_name
+    record['version'] = dist['version']
+    record['subdir'] = dist_subdir(dist)
+    record['md5'] = dist.get('md5')
+    record['size'] = dist.get('size')
+    sha256 = dist.get('sha256') or attrs.get('sha256')
+    if sha256:
+        record['sha256'] = sha256
+    return record
+
+
+def dist_subdir(dist):
+    """Detect the subdir of a conda file (e.g. :code:`linux-64`)."""
+    return (dist.get('attrs') or {}).get('subdir') or dist['basename'].rpartition('/')[0]
+
+
+class Mirror:
+    """
+    Incremental mirror of a label into a local conda channel.
+    """
+
+    def __init__(self, aserver_api, owner, label, output, retry_policy=None):
+        self.aserver_api = aserver_api
+        self.owner = owner
+        self.label = label
+        self.output = output
+        self.retry_policy = retry_policy
+        self.state_path = os.path.join(output, STATE_FILENAME)
+        self.state = None
+        self._lock = threading.Lock()
+
+    def __call__(self, jobs=1):
+        """
+        Synchronize the local channel with the label.
+
+        :return: basenames of the downloaded and of the removed files
+        """
+        os.makedirs(self.output, exist_ok=True)
+        self.state = self.load_state()
+
+        full_names = self.list_label_files()
+        self.refresh_packages({full_name.split('/')[1] for full_name in full_names}, jobs=jobs)
+        dists = self.list_dists(full_names)
+
+        removed = sorted(set(self.state['files']) - set(dists))
+        for basename in removed:
+            with self._lock:
+                self.state['files'].pop(basename)
+            try:
+                os.remove(os.path.join(self.output, basename))
+            except FileNotFoundError:
+                pass
+
+        changed = []
+        for basename, (package_name, dist) in dists.items():
+            record = self.state['files'].get(basename)
+            if (record is None) or (record.get('md5'), record.get('size')) != (dist.get('md5'), dist.get('size')):
+                changed.append((package_name, dist))
+            elif not os.path.isfile(os.path.join(self.output, basename)):
+                changed.append((package_name, dist))
+
+        downloaded = []
+        try:
+            with self.aserver_api.batch(max_workers=jobs) as batch:
+                for package_name, dist in changed:
+                    batch.submit(self.fetch, package_name, dist)
+            downloaded = sorted(filename for filename in batch.results() if filename is not None)
+        finally:
+            subdirs = {basename.rpartition('/')[0] for basename in removed}
+            subdirs.update(dist['basename'].rpartition('/')[0] for _, dist in changed)
+            self.write_repodata(subdirs)
+            write_json(self.state_path, self.state)
+
+        return downloaded, removed
+
+    def load_state(self):
+        """Load the state of a previous run, unless it mirrored a different label."""
+        state = read_json(self.state_path, {})
+        if (state.get('owner'), state.get('label')) != (self.owner, self.label):
+            state = {}
+        return {
+            'owner': self.owner,
+            'label': self.label,
+            'packages': state.get('packages', {}),
+            'files': state.get('files', {}),
+        }
+
+    def list_label_files(self):
+        """
+        List full names (:code:`owner/package/version/basename`) of all files in the label.
+        """
+        return {file['full_name'] for file in self.aserver_api.show_channel(self.label, self.owner)['files']}
+
+    def refresh_packages(self, names, jobs=1):
+        """
+        Fetch listings of the packages which changed since the previous run.
+
+        Packages are compared by their revision and modification time from the list of packages of the owner, so
+        unchanged ones do not cost a request each.
+        """
+        stamps = {
+            package['name']: [package.get('revision'), package.get('modified_at')]
+            for package in self.aserver_api.user_packages(self.owner)
+        }
+        packages = self.state['packages']
+        for name in set(packages) - names:
+            del packages[name]
+
+        stale = []
+        for name in sorted(names):
+            stamp = stamps.get(name, [None, None])
+            if (name not in packages) or (packages[name]['stamp'] != stamp) or (stamp == [None, None]):
+                stale.append((name, stamp))
+        if not stale:
+            return
+
+        with self.aserver_api.batch(max_workers=jobs) as batch:
+            for name, _ in stale:
+                batch.submit(self.package_files, name)
+        for (name, stamp), files in zip(stale, batch.results()):
+            packages[name] = {'stamp': stamp, 'files': files}
+
+    def package_files(self, name):
+        """List conda files of a package (or none, if the package was removed in the meantime)."""
+        try:
+            files = self.aserver_api.package(self.owner, name)['files']
+        except errors.NotFound:
+            return []
+        return [file for file in files if file.get('type') == PackageType.CONDA.value]
+
+    def list_dists(self, full_names):
+        """
+        Select files of the label from the package listings.
+
+        :return: package names and files, by their basenames (:code:`<subdir>/<filename>`)
+        """
+        result = {}
+        for package_name, package in sorted(self.state['packages'].items()):
+            for dist in package['files']:
+                full_name = '%s/%s/%s/%s' % (self.owner, package_name, dist['version'], dist['basename'])
+                if (full_name in full_names) and ('/' in dist['basename']):
+                    result[dist['basename']] = (package_name, dist)
+        return result
+
+    def fetch(self, package_name, dist):
+        """
+        Download a single file, and record it in the state once it is in place.
+
+        :return: basename of the downloaded file, or None if the local copy is unchanged
+        """
+        downloader = Downloader(self.aserver_api, self.owner, package_name, retry_policy=self.retry_policy)
+        downloader.output = self.output
+        result = downloader.download(dist, update=True)
+        with self._lock:
+            self.state['files'][dist['basename']] = repodata_record(package_name, dist)
+        return result
+
+    def write_repodata(self, subdirs):
+        """
+        Update :code:`repodata.json` of the :code:`subdirs` to match the state.
+
+        Only the listed subdirs are rewritten (as well as the ones which do not have a :code:`repodata.json` yet).
+        """
+        records = {}
+        for basename, record in self.state['files'].items():
+            subdir, _, filename = basename.rpartition('/')
+            records.setdefault(subdir, {})[filename] = record
+
+        for subdir in sorted(set(records) | set(REQUIRED_SUBDIRS) | set(subdirs)):
+            path = os.path.join(self.output, subdir, REPODATA_FILENAME)
+            if (subdir not in subdirs) and os.path.isfile(path):
+                continue
+            repodata = {
+                'info': {'subdir': subdir},
+                'packages': {},
+                'packages.conda': {},
+                'repodata_version': 1,
+            }
+            for filename, record in sorted(records.get(subdir, {}).items()):
+                repodata['packages.conda' if filename.endswith('.conda') else 'packages'][filename] = record
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_json(path, repodata)
+
+
+def add_parser(subparsers):
+    description = 'Mirror conda packages of a label into a local conda channel'
+    parser = subparsers.add_parser(
+        'mirror',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        help=description,
+        description=description,
+        epilog=__doc__,
+    )
+
+    parser.add_argument('handle', help='<owner> or <owner>/<label>', action='store')
+    parser.add_argument('directory', help='Directory of the local channel', action='store')
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=4,
+        help='Number of files to download in parallel (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--limit-rate',
+        type=parse_rate,
+        help='Maximum download rate in bytes per second, with an optional K, M or G suffix (e.g. 50M)',
+    )
+    parser.set_defaults(main=main)
+
+
+def main(args):
+    jobs = max(args.jobs, 1)
+    owner, label = parse(args.handle)
+    hash_cache = HashCache()
+    aserver_api = get_server_api(
+        args.token,
+        args.site,
+        limit_rate=args.limit_rate,
+        transfer_pool_size=max(jobs, TRANSFER_POOL_SIZE),
+        hash_cache=hash_cache,
+    )
+    mirror = Mirror(aserver_api, owner, label, args.directory)
+
+    with hash_cache:
+        downloaded, removed = mirror(jobs=jobs)
+    for filename in downloaded:
+        logger.info('%s has been mirrored', filename)
+    for filename in removed:
+        logger.info('%s has been removed', filename)
+    logger.info(
+        'Mirrored %d files of %s/%s into %s (%d downloaded, %d removed)',
+        len(mirror.state['files']),
+        owner,
+        label,
+        args.directory,
+        len(downloaded),
+        len(removed),
+    )
+    if (bandwidth := aserver_api.bandwidth) is not None:
+        logger.info(
+            'Average transfer rate: %s (limited to %s)',
+            format_rate(bandwidth.effective_rate),
+            format_rate(bandwidth.rate),
+        )
+
+
+def mount_subcommand(app: typer.Typer, name: str, hidden: bool, help_text: str, context_settings: dict) -> None:
+    @app.command(
+        name=name,
+        hidden=hidden,
+        help=help_text,
+        context_settings=context_settings,
+        no_args_is_help=True,
+    )
+    def mirror(
+        ctx: typer.Context,
+        handle: str = typer.Argument(help='<owner> or <owner>/<label>'),
+        directory: str = typer.Argument(help='Directory of the local channel'),
+        jobs: int = typer.Option(
+            4,
+            '-j',
+            '--jobs',
+            min=1,
+            help='Number of files to download in parallel',
+        ),
+        limit_rate: Optional[int] = typer.Option(
+            None,
+            '--limit-rate',
+            help='Maximum download rate in bytes per second, with an optional K, M or G suffix (e.g. 50M)',
+            parser=parse_rate,
+        ),
+    ) -> None:
+        args = argparse.Namespace(
+            token=ctx.obj.params.get('token'),
+            site=ctx.obj.params.get('site'),
+            handle=handle,
+            directory=directory,
+            jobs=jobs,
+            limit_rate=limit_rate,
+        )
+
+        main(args)
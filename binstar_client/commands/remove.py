@@ -19,37 +19,85 @@ from binstar_client.utils import get_server_api, parse_specs, bool_input
 logger = logging.getLogger('binstar.remove')
 
 
+def remove(aserver_api, spec):
+    """Remove a file, a release or a package."""
+    if spec._basename:
+        aserver_api.remove_dist(spec.user, spec.package, spec.version, spec.basename)
+    elif spec._version:
+        aserver_api.remove_release(spec.user, spec.package, spec.version)
+    else:
+        aserver_api.remove_package(spec.user, spec.package)
+
+
+def remove_in_order(aserver_api, specs):
+    """
+    Remove objects of a single package one after another, in the order they are listed.
+
+    :return: errors of the removals (None for the successful ones)
+    """
+    result = []
+    for spec in specs:
+        try:
+            remove(aserver_api, spec)
+        except Exception as error:
+            result.append(error)
+        else:
+            result.append(None)
+    return result
+
+
 def main(args):
     aserver_api = get_server_api(args.token, args.site)
 
+    # All removals are confirmed before any of them starts
+    removed = []
     for spec in args.specs:
-        try:
-            if spec._basename:
-                msg = 'Are you sure you want to remove file %s ?' % (spec,)
-                if args.force or bool_input(msg, False):
-                    aserver_api.remove_dist(spec.user, spec.package, spec.version, spec.basename)
-                else:
-                    logger.warning('Not removing file %s', spec)
-            elif spec._version:
-                msg = 'Are you sure you want to remove the package release %s ? (and all files under it?)' % (spec,)
-                if args.force or bool_input(msg, False):
-                    aserver_api.remove_release(spec.user, spec.package, spec.version)
-                else:
-                    logger.warning('Not removing release %s', spec)
-            elif spec._package:
-                msg = 'Are you sure you want to remove the package %s ? (and all data with it?)' % (spec,)
-                if args.force or bool_input(msg, False):
-                    aserver_api.remove_package(spec.user, spec.package)
-                else:
-                    logger.warning('Not removing release %s', spec)
+        if spec._basename:
+            msg = 'Are you sure you want to remove file %s ?' % (spec,)
+            if args.force or bool_input(msg, False):
+                removed.append(spec)
             else:
-                logger.error('Invalid package specification: %s', spec)
-
-        except errors.NotFound:
-            if args.force:
-                logger.warning('', exc_info=True)
-                continue
-            raise
+                logger.warning('Not removing file %s', spec)
+        elif spec._version:
+            msg = 'Are you sure you want to remove the package release %s ? (and all files under it?)' % (spec,)
+            if args.force or bool_input(msg, False):
+                removed.append(spec)
+            else:
+                logger.warning('Not removing release %s', spec)
+        elif spec._package:
+            msg = 'Are you sure you want to remove the package %s ? (and all data with it?)' % (spec,)
+            if args.force or bool_input(msg, False):
+                removed.append(spec)
+            else:
+                logger.warning('Not removing release %s', spec)
+        else:
+            logger.error('Invalid package specification: %s', spec)
+
+    # Objects of the same package may contain each other, so only different packages are removed concurrently
+    packages = {}
+    for spec in removed:
+        packages.setdefault((spec.user, spec.package), []).append(spec)
+
+    with aserver_api.batch() as batch:
+        for specs in packages.values():
+            batch.submit(remove_in_order, aserver_api, specs)
+
+    failures = []
+    for specs, item in zip(packages.values(), batch.items()):
+        if item.failed:
+            raise item.error
+        for spec, error in zip(specs, item.result):
+            if isinstance(error, errors.NotFound) and args.force:
+                logger.warning('Unable to remove %s: %s', spec, error.message)
+            elif error is not None:
+                failures.append((spec, error))
+
+    if len(failures) == 1:
+        raise failures[0][1]
+    if failures:
+        for spec, error in failures:
+            logger.error('Unable to remove %s: %s', spec, getattr(error, 'message', None) or error)
+        raise errors.BinstarError('Unable to remove %d of %d objects' % (len(failures), len(removed)))
 
 
 def add_parser(subparsers):
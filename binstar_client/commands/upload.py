@@ -16,10 +16,13 @@ from __future__ import annotations
 __all__ = ['add_parser']
 
 import argparse
+import concurrent.futures
 import glob
 import itertools
+import json
 import logging
 import os
+import threading
 import typing
 
 import typer
@@ -30,6 +33,11 @@ from binstar_client.deprecations import DEPRECATION_MESSAGE_NOTEBOOKS_PROJECTS_E
 from binstar_client.utils import bool_input, DEFAULT_CONFIG, get_config, get_server_api
 from binstar_client.utils.config import PackageType
 from binstar_client.utils import detect
+from binstar_client.utils.bandwidth import format_rate, parse_rate
+from binstar_client.utils.hashing import Digests, HashCache, get_digests
+from binstar_client.utils.journal import JournalKey, JournalRecord, UploadJournal, UploadState
+from binstar_client.utils.multipart_uploader import TRANSFER_POOL_SIZE
+from binstar_client.utils.retry import RetryPolicy
 
 if typing.TYPE_CHECKING:
     import typing_extensions
@@ -40,10 +48,14 @@ CacheRecordT = typing.TypeVar('CacheRecordT', bound='CacheRecord')
 
 PackageKey: typing_extensions.TypeAlias = str
 ReleaseKey: typing_extensions.TypeAlias = typing.Tuple[str, str]
+ReleaseFiles: typing_extensions.TypeAlias = typing.Dict[str, typing.Mapping[str, typing.Any]]
 
 
 logger = logging.getLogger('binstar.upload')
 
+LOOKAHEAD: typing.Final[int] = 2
+RETRIES: typing.Final[int] = 3
+
 
 def main(arguments: argparse.Namespace) -> None:
     """Entrypoint of the :code:`upload` command."""
@@ -76,6 +88,7 @@ def main(arguments: argparse.Namespace) -> None:
             channel=arguments.channels,
             namespace=arguments.user,
             package_type=package_type_enum,
+            limit_rate=arguments.limit_rate,
             from_deprecated_channel_flag=True,
         )
         return
@@ -84,13 +97,32 @@ def main(arguments: argparse.Namespace) -> None:
     uploader.api.check_server()
     _ = uploader.username
 
+    jobs: int = max(arguments.jobs, 1)
+    lookahead: int = LOOKAHEAD
+    if arguments.mode == 'interactive':
+        if jobs > 1:
+            logger.warning('Interactive mode does not support parallel uploads, files will be uploaded one at a time')
+        jobs = 1
+        lookahead = 0
+
+    items: typing.List[typing.Union[str, ManifestEntry]] = sorted(set(itertools.chain.from_iterable(arguments.files)))
+    if arguments.manifest:
+        items.extend(read_manifest(arguments.manifest))
+    if not items:
+        message: str = 'Nothing to upload, please provide files or a --manifest'
+        logger.error(message)
+        raise errors.UserError(message)
+
+    if len(items) > 1:
+        uploader.prefetch()
+
     try:
-        filename: str
-        for filename in sorted(set(itertools.chain.from_iterable(arguments.files))):
-            uploader.upload(filename)
+        uploader.upload_all(items, jobs=jobs, lookahead=lookahead)
     finally:
         uploader.print_uploads()
         uploader.cleanup()
+        if uploader.api.hash_cache is not None:
+            uploader.api.hash_cache.flush()
 
 
 class UploadedPackage(typing.TypedDict):
@@ -104,6 +136,101 @@ class UploadedPackage(typing.TypedDict):
     url: str
 
 
+class ManifestEntry(typing.NamedTuple):
+    """Details on a package file provided by a manifest, used instead of inspecting the file."""
+
+    filename: str
+    package_type: PackageType
+    name: str
+    version: str
+    basename: typing.Optional[str] = None
+    attrs: typing.Mapping[str, typing.Any] = {}
+    dependencies: typing.Any = None
+    package_attrs: typing.Mapping[str, typing.Any] = {}
+    release_attrs: typing.Mapping[str, typing.Any] = {}
+    digests: typing.Optional[Digests] = None
+
+    @classmethod
+    def from_dict(cls, content: typing.Mapping[str, typing.Any], root: str = '') -> ManifestEntry:
+        """
+        Parse a single manifest entry.
+
+        Relative paths are resolved against the :code:`root` directory (usually - the one with the manifest).
+        """
+        filename: str = os.path.join(root, content['path'])
+
+        digests: typing.Optional[Digests] = None
+        if content.get('md5') and content.get('sha256'):
+            size: typing.Optional[int] = content.get('size', None)
+            digests = Digests(
+                size=os.path.getsize(filename) if size is None else size,
+                hexdigests={'md5': content['md5'], 'sha256': content['sha256']},
+            )
+
+        return cls(
+            filename=filename,
+            package_type=PackageType(content.get('package_type', PackageType.CONDA.value)),
+            name=content['package'],
+            version=content['version'],
+            basename=content.get('basename', None),
+            attrs=content.get('attrs', {}),
+            dependencies=content.get('dependencies', None),
+            package_attrs=content.get('package_attrs', {}),
+            release_attrs=content.get('release_attrs', {}),
+            digests=digests,
+        )
+
+    def to_meta(self) -> PackageMeta:
+        """Convert manifest entry to the details on a package file."""
+        extension: str = detect.find_postfix(self.filename, '.tar.bz2', '.conda') or os.path.splitext(self.filename)[1]
+        basename: str = self.basename or os.path.basename(self.filename)
+        if (self.basename is None) and (subdir := self.attrs.get('subdir', None)):
+            basename = f'{subdir}/{basename}'
+
+        return PackageMeta.from_dict(
+            self.filename,
+            {
+                'package_type': self.package_type.value,
+                'extension': extension,
+                'name': self.name,
+                'version': self.version,
+                'package_attrs': {'name': self.name, **self.package_attrs},
+                'release_attrs': {'version': self.version, **self.release_attrs},
+                'file_attrs': {'basename': basename, 'attrs': dict(self.attrs), 'dependencies': self.dependencies},
+                'digests': self.digests and {'size': self.digests.size, 'hexdigests': dict(self.digests.hexdigests)},
+            },
+        )
+
+
+def read_manifest(path: str) -> typing.List[ManifestEntry]:
+    """
+    Read a manifest of files to upload.
+
+    Manifest is a JSON-lines file, each line of which describes a single file: its :code:`path`, :code:`package`,
+    :code:`version`, and optionally :code:`package_type` (:code:`conda` by default), :code:`basename`, :code:`attrs`,
+    :code:`dependencies`, :code:`package_attrs`, :code:`release_attrs` and precomputed :code:`md5`, :code:`sha256` and
+    :code:`size`.
+    """
+    root: str = os.path.dirname(os.path.abspath(path))
+    result: typing.List[ManifestEntry] = []
+
+    stream: typing.TextIO
+    with open(path, 'rt', encoding='utf8') as stream:
+        index: int
+        line: str
+        for index, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                result.append(ManifestEntry.from_dict(json.loads(line), root=root))
+            except (ValueError, TypeError, KeyError, OSError) as error:
+                message: str = f'Invalid entry on line {index} of the manifest "{path}": {error!r}'
+                logger.error(message)
+                raise errors.UserError(message) from error
+
+    return result
+
+
 class CacheRecord:
     """Common interface for cached server records."""
 
@@ -179,6 +306,7 @@ class PackageMeta:
     __slots__ = (
         'filename',
         'meta',
+        'digests',
         '__file_attrs',
         '__name',
         '__package_attrs',
@@ -190,6 +318,7 @@ class PackageMeta:
         """Initialize new :class:`~PackageMeta` instance."""
         self.filename: typing.Final[str] = filename
         self.meta: typing.Final[detect.Meta] = meta
+        self.digests: typing.Optional[Digests] = None
 
         self.__file_attrs: typing.Optional[detect.FileAttributes] = None
         self.__name: typing.Optional[str] = None
@@ -197,6 +326,35 @@ class PackageMeta:
         self.__release_attrs: typing.Optional[detect.ReleaseAttributes] = None
         self.__version: typing.Optional[str] = None
 
+    @classmethod
+    def from_dict(cls, filename: str, content: typing.Mapping[str, typing.Any]) -> PackageMeta:
+        """Restore details on a package file previously collected with :meth:`~PackageMeta.to_dict`."""
+        result: PackageMeta = cls(
+            filename=filename,
+            meta=detect.Meta(package_type=PackageType(content['package_type']), extension=content['extension']),
+        )
+        result.__file_attrs = content['file_attrs']
+        result.__name = content['name']
+        result.__package_attrs = content['package_attrs']
+        result.__release_attrs = content['release_attrs']
+        result.__version = content['version']
+        if (digests := content.get('digests', None)) is not None:
+            result.digests = Digests(size=digests['size'], hexdigests=digests['hexdigests'])
+        return result
+
+    def to_dict(self) -> typing.Dict[str, typing.Any]:
+        """Export collected details on a package file, so they can be reused without inspecting the file again."""
+        return {
+            'package_type': self.package_type.value,
+            'extension': self.extension,
+            'name': self.name,
+            'version': self.version,
+            'package_attrs': self.package_attrs,
+            'release_attrs': self.release_attrs,
+            'file_attrs': self.file_attrs,
+            'digests': self.digests and {'size': self.digests.size, 'hexdigests': dict(self.digests.hexdigests)},
+        }
+
     @property
     def extension(self) -> str:  # noqa: D401
         """File extension of the package file."""
@@ -353,9 +511,15 @@ class Uploader:
         'uploaded_packages',
         '__api',
         '__config',
+        '__journal',
+        '__journal_keys',
         '__username',
+        '__lock',
+        '__key_locks',
         '__package_cache',
+        '__package_versions',
         '__release_cache',
+        '__release_files',
     )
 
     def __init__(self, arguments: argparse.Namespace) -> None:
@@ -365,16 +529,32 @@ class Uploader:
 
         self.__api: typing.Optional[binstar_client.Binstar] = None
         self.__config: typing.Optional[typing.Mapping[str, typing.Any]] = None
+        self.__journal: typing.Optional[UploadJournal] = None
+        self.__journal_keys: typing.Final[typing.Dict[str, JournalKey]] = {}
         self.__username: typing.Optional[str] = None
 
+        self.__lock: typing.Final[threading.Lock] = threading.Lock()
+        self.__key_locks: typing.Final[typing.Dict[typing.Union[PackageKey, ReleaseKey], threading.RLock]] = {}
+
         self.__package_cache: typing.Final[typing.Dict[PackageKey, PackageCacheRecord]] = {}
+        self.__package_versions: typing.Final[typing.Dict[PackageKey, typing.FrozenSet[str]]] = {}
         self.__release_cache: typing.Final[typing.Dict[ReleaseKey, ReleaseCacheRecord]] = {}
+        self.__release_files: typing.Final[typing.Dict[ReleaseKey, typing.Optional[ReleaseFiles]]] = {}
 
     @property
     def api(self) -> binstar_client.Binstar:  # noqa: D401
         """Client used to access anaconda.org API."""
         if self.__api is None:
-            self.__api = get_server_api(token=self.arguments.token, site=self.arguments.site, config=self.config)
+            self.__api = get_server_api(
+                token=self.arguments.token,
+                site=self.arguments.site,
+                config=self.config,
+                hash_cache=HashCache() if self.arguments.hash_cache else None,
+                retry_policy=RetryPolicy(max_attempts=max(self.arguments.retries, 0) + 1),
+                transfer_pool_size=max(self.arguments.jobs, TRANSFER_POOL_SIZE),
+                transfer_retries=max(self.arguments.retries, 0),
+                limit_rate=self.arguments.limit_rate,
+            )
         return self.__api
 
     @property
@@ -384,6 +564,13 @@ class Uploader:
             self.__config = get_config(site=self.arguments.site)
         return self.__config
 
+    @property
+    def journal(self) -> UploadJournal:  # noqa: D401
+        """Journal of upload steps completed for each file, used to resume interrupted uploads."""
+        if self.__journal is None:
+            self.__journal = UploadJournal()
+        return self.__journal
+
     @property
     def username(self) -> str:  # noqa: D401
         """Name of the user or organization to upload packages to."""
@@ -438,48 +625,49 @@ class Uploader:
         If not forced - may return cached record.
         """
         key: typing.Final[PackageKey] = meta.package_key
-        cache_record: typing.Optional[PackageCacheRecord]
-        if (not force) and (cache_record := self.__package_cache.get(key, None)):
-            return cache_record
+        with self._lock_for(key):
+            cache_record: typing.Optional[PackageCacheRecord]
+            if (not force) and (cache_record := self.__package_cache.get(key, None)):
+                return cache_record
 
-        try:
-            instance: typing.Mapping[str, typing.Any] = self.api.package(self.username, meta.name)
-            cache_record = PackageCacheRecord(
-                name=meta.name, empty=False, package_types=list(map(PackageType, instance.get('package_types', ())))
-            )
-        except errors.NotFound as error:
-            if not self.arguments.auto_register:
-                message: str = (
-                    f'Anaconda repository package {self.username}/{meta.name} does not exist. '
-                    f'Please run "anaconda package --create" to create this package namespace in the cloud.'
+            try:
+                instance: typing.Mapping[str, typing.Any] = self.api.package(self.username, meta.name)
+                cache_record = PackageCacheRecord(
+                    name=meta.name, empty=False, package_types=list(map(PackageType, instance.get('package_types', ())))
                 )
-                logger.error(message)
-                raise errors.UserError(message) from error
+            except errors.NotFound as error:
+                if not self.arguments.auto_register:
+                    message: str = (
+                        f'Anaconda repository package {self.username}/{meta.name} does not exist. '
+                        f'Please run "anaconda package --create" to create this package namespace in the cloud.'
+                    )
+                    logger.error(message)
+                    raise errors.UserError(message) from error
 
-            summary: typing.Optional[str] = self.arguments.summary
-            if (summary is None) and ((summary := meta.package_attrs.get('summary', None)) is None):
-                message = (
-                    f'Could not detect package summary for package type {meta.package_type.label.lower()}, '
-                    f'please use the --summary option'
+                summary: typing.Optional[str] = self.arguments.summary
+                if (summary is None) and ((summary := meta.package_attrs.get('summary', None)) is None):
+                    message = (
+                        f'Could not detect package summary for package type {meta.package_type.label.lower()}, '
+                        f'please use the --summary option'
+                    )
+                    logger.error(message)
+                    raise errors.BinstarError(message) from error
+
+                self.api.add_package(
+                    self.username,
+                    meta.name,
+                    summary,
+                    meta.package_attrs.get('license'),
+                    public=not self.arguments.private,
+                    attrs=meta.package_attrs,
+                    license_url=meta.package_attrs.get('license_url'),
+                    license_family=meta.package_attrs.get('license_family'),
+                    package_type=meta.package_type,
                 )
-                logger.error(message)
-                raise errors.BinstarError(message) from error
-
-            self.api.add_package(
-                self.username,
-                meta.name,
-                summary,
-                meta.package_attrs.get('license'),
-                public=not self.arguments.private,
-                attrs=meta.package_attrs,
-                license_url=meta.package_attrs.get('license_url'),
-                license_family=meta.package_attrs.get('license_family'),
-                package_type=meta.package_type,
-            )
-            cache_record = PackageCacheRecord(name=meta.name, empty=True, package_types=[])
+                cache_record = PackageCacheRecord(name=meta.name, empty=True, package_types=[])
 
-        self.__package_cache[key] = cache_record
-        return cache_record
+            self.__package_cache[key] = cache_record
+            return cache_record
 
     def get_release(self, meta: PackageMeta, *, force: bool = False) -> ReleaseCacheRecord:
         """
@@ -488,32 +676,99 @@ class Uploader:
         If not forced - may return cached record.
         """
         key: typing.Final[ReleaseKey] = meta.release_key
-        cache_record: typing.Optional[ReleaseCacheRecord]
-        if (not force) and (cache_record := self.__release_cache.get(key, None)):
+        with self._lock_for(key):
+            cache_record: typing.Optional[ReleaseCacheRecord]
+            if (not force) and (cache_record := self.__release_cache.get(key, None)):
+                return cache_record
+
+            if force:
+                self.__release_files.pop(key, None)
+
+            if self.get_release_files(meta) is not None:
+                if self.arguments.force_metadata_update:
+                    self.api.update_release(self.username, meta.name, meta.version, meta.release_attrs)
+                cache_record = ReleaseCacheRecord(name=meta.name, version=meta.version, empty=False)
+            else:
+                announce: typing.Optional[str] = None
+                if self.arguments.mode == 'interactive':
+                    logger.info('The release "%s/%s/%s" does not exist', self.username, meta.name, meta.version)
+                    if not bool_input('Would you like to create it now?'):
+                        logger.info('good-bye')
+                        raise SystemExit(-1) from None
+
+                    logger.info('Announcements are emailed to your package followers.')
+                    if bool_input('Would you like to make an announcement to the package followers?', False):
+                        announce = input('Markdown Announcement:\n')
+
+                self.api.add_release(self.username, meta.name, meta.version, [], announce, meta.release_attrs)
+                self.__release_files[key] = {}
+                cache_record = ReleaseCacheRecord(name=meta.name, version=meta.version, empty=True)
+
+            self.__release_cache[key] = cache_record
             return cache_record
 
+    def get_release_files(self, meta: PackageMeta) -> typing.Optional[ReleaseFiles]:
+        """
+        Retrieve files already stored in a release on the server, indexed by their basenames.
+
+        Listing is requested only once for each release, and shared by all files uploaded to it. :code:`None` is
+        returned if release does not exist yet - which is also known without any request for packages listed by
+        :meth:`~Uploader.prefetch`.
+        """
+        key: typing.Final[ReleaseKey] = meta.release_key
+        with self._lock_for(key):
+            if key not in self.__release_files:
+                result: typing.Optional[ReleaseFiles]
+                versions: typing.Optional[typing.FrozenSet[str]] = self.__package_versions.get(meta.package_key, None)
+                if (versions is not None) and (meta.version not in versions):
+                    self.__release_files[key] = None
+                    return None
+                try:
+                    release: typing.Mapping[str, typing.Any] = self.api.release(self.username, meta.name, meta.version)
+                    result = {item['basename']: item for item in release.get('distributions', ())}
+                except errors.NotFound:
+                    result = None
+                self.__release_files[key] = result
+            return self.__release_files[key]
+
+    def _lock_for(self, key: typing.Union[PackageKey, ReleaseKey]) -> threading.RLock:
+        """
+        Retrieve a lock guarding cached records for a :code:`key`.
+
+        Used to prevent parallel uploads from racing to create the same package or release.
+        """
+        with self.__lock:
+            return self.__key_locks.setdefault(key, threading.RLock())
+
+    def prefetch(self) -> None:
+        """
+        Fill package cache with a single listing of all packages of the owner.
+
+        Versions of the listed packages are remembered as well (if the listing has them), so releases missing from
+        them are known not to exist without requesting each of them.
+        """
         try:
-            self.api.release(self.username, meta.name, meta.version)
-            if self.arguments.force_metadata_update:
-                self.api.update_release(self.username, meta.name, meta.version, meta.release_attrs)
-            cache_record = ReleaseCacheRecord(name=meta.name, version=meta.version, empty=False)
-        except errors.NotFound:
-            announce: typing.Optional[str] = None
-            if self.arguments.mode == 'interactive':
-                logger.info('The release "%s/%s/%s" does not exist', self.username, meta.name, meta.version)
-                if not bool_input('Would you like to create it now?'):
-                    logger.info('good-bye')
-                    raise SystemExit(-1) from None
-
-                logger.info('Announcements are emailed to your package followers.')
-                if bool_input('Would you like to make an announcement to the package followers?', False):
-                    announce = input('Markdown Announcement:\n')
-
-            self.api.add_release(self.username, meta.name, meta.version, [], announce, meta.release_attrs)
-            cache_record = ReleaseCacheRecord(name=meta.name, version=meta.version, empty=True)
-
-        self.__release_cache[key] = cache_record
-        return cache_record
+            packages: typing.List[typing.Mapping[str, typing.Any]] = self.api.user_packages(self.username)
+        except errors.BinstarError as error:
+            logger.debug('Unable to list packages of "%s": %s', self.username, error)
+            return
+
+        item: typing.Mapping[str, typing.Any]
+        for item in packages:
+            name: typing.Optional[str] = item.get('name', None)
+            if not name:
+                continue
+            try:
+                package_types: typing.List[PackageType] = list(map(PackageType, item.get('package_types', ())))
+            except ValueError:
+                continue
+            with self._lock_for(name):
+                if name in self.__package_cache:
+                    continue
+                self.__package_cache[name] = PackageCacheRecord(name=name, empty=False, package_types=package_types)
+                versions: typing.Optional[typing.Iterable[str]] = item.get('versions', None)
+                if versions is not None:
+                    self.__package_versions[name] = frozenset(versions)
 
     def print_uploads(self) -> None:
         """Print details on all successful package uploads."""
@@ -521,14 +776,115 @@ class Uploader:
         for package_info in self.uploaded_packages:
             logger.info('%s located at:\n  %s\n', package_info['package_type'].label.lower(), package_info['url'])
 
+        if (self.__api is not None) and (statistics := self.__api.retry_statistics).retries:
+            logger.info(
+                'Retried %d failed requests, spending %.1f seconds on retries', statistics.retries, statistics.elapsed
+            )
+        if (self.__api is not None) and (throttle := self.__api.throttle).throttled:
+            logger.info(
+                'Server throttled %d of %d requests (%.1f requests per second)',
+                throttle.throttled,
+                throttle.requests,
+                throttle.rate,
+            )
+        if (self.__api is not None) and (bandwidth := self.__api.bandwidth) is not None:
+            logger.info(
+                'Average transfer rate: %s (limited to %s)',
+                format_rate(bandwidth.effective_rate),
+                format_rate(bandwidth.rate),
+            )
+
     def upload(self, filename: str) -> bool:
         """Upload a file to the server."""
+        return self.upload_prepared(self.prepare(filename))
+
+    def upload_all(
+        self,
+        items: typing.Iterable[typing.Union[str, ManifestEntry]],
+        *,
+        jobs: int = 1,
+        lookahead: int = LOOKAHEAD,
+    ) -> None:
+        """
+        Upload multiple files to the server.
+
+        Files are listed either by their names, or as manifest entries which do not require inspection. Each file is
+        processed in two stages: preparation (detection, inspection and hashing of a file) and transfer
+        (creation of a package and release, and the upload itself). Up to :code:`jobs` files are transferred in
+        parallel, while up to :code:`lookahead` next files are being prepared, so metadata extraction overlaps with
+        network transfers. Number of files being prepared or waiting to be transferred is bounded by
+        :code:`jobs + lookahead`.
+
+        Errors are raised in the order files are listed, and files not yet started are cancelled after the first error.
+        With :code:`--resume`, journal records of the files are removed only after all of them are uploaded, so a failed
+        batch might be resumed later.
+        """
+        if jobs > 1:
+            self.api.ensure_pool_size(jobs)
+
+        slots: threading.BoundedSemaphore = threading.BoundedSemaphore(jobs + max(lookahead, 0))
+        failed: threading.Event = threading.Event()
+
+        def transfer(preparation: concurrent.futures.Future[PackageMeta]) -> bool:
+            try:
+                if failed.is_set():
+                    return False
+                return self.upload_prepared(preparation.result())
+            except BaseException:
+                failed.set()
+                raise
+            finally:
+                slots.release()
+
+        transfers: typing.List[concurrent.futures.Future[bool]] = []
+        with (
+            concurrent.futures.ThreadPoolExecutor(max_workers=jobs, thread_name_prefix='prepare') as preparers,
+            concurrent.futures.ThreadPoolExecutor(max_workers=jobs, thread_name_prefix='upload') as uploaders,
+        ):
+            try:
+                item: typing.Union[str, ManifestEntry]
+                for item in items:
+                    slots.acquire()
+                    if failed.is_set():
+                        slots.release()
+                        break
+                    transfers.append(uploaders.submit(transfer, preparers.submit(self.prepare, item)))
+
+                future: concurrent.futures.Future[bool]
+                for future in transfers:
+                    future.result()
+            except BaseException:
+                failed.set()
+                for future in transfers:
+                    future.cancel()
+                raise
+
+        with self.__lock:
+            keys: typing.List[JournalKey] = list(self.__journal_keys.values())
+        if keys:
+            self.journal.forget(keys)
+
+    def prepare(self, item: typing.Union[str, ManifestEntry]) -> PackageMeta:
+        """
+        Collect all details on a file required to upload it to the server.
+
+        :param item: Name of a file to inspect, or a manifest entry with all details on the file already known.
+        """
+        filename: str = item.filename if isinstance(item, ManifestEntry) else item
         if not os.path.exists(filename):
             message: str = f'File "{filename}" does not exist'
             logger.error(message)
             raise errors.BinstarError(message)
         logger.info('Processing "%s"', filename)
 
+        record: typing.Optional[JournalRecord] = self._resumed(filename)
+        if (record is not None) and ('meta' in record):
+            logger.info('Reusing details on "%s" collected by the interrupted upload', filename)
+            return PackageMeta.from_dict(filename, record['meta'])
+
+        if isinstance(item, ManifestEntry):
+            return self._complete_meta(item.to_meta(), rebuild_basename=item.basename is None)
+
         package_meta: detect.Meta = self.detect_package_meta(
             filename,
             package_type=self.arguments.package_type and PackageType(self.arguments.package_type),
@@ -537,12 +893,16 @@ class Uploader:
         if package_meta.package_type in {PackageType.PROJECT, PackageType.NOTEBOOK, PackageType.ENV}:
             raise typer.BadParameter(DEPRECATION_MESSAGE_NOTEBOOKS_PROJECTS_ENVIRONMENTS_REMOVED)
 
-        return self.upload_package(filename, package_meta)
+        return self.prepare_package(filename, package_meta)
 
-    def upload_package(self, filename: str, package_meta: detect.Meta) -> bool:
-        """Upload a package to the server."""
+    def prepare_package(self, filename: str, package_meta: detect.Meta) -> PackageMeta:
+        """Collect all details on a package file of a known type, required to upload it to the server."""
         meta: PackageMeta = PackageMeta(filename=filename, meta=package_meta)
         meta._update_attrs(parser_args=self.arguments)
+        return self._complete_meta(meta)
+
+    def _complete_meta(self, meta: PackageMeta, *, rebuild_basename: bool = True) -> PackageMeta:
+        """Apply command line overrides to the details on a package file, and calculate its digests if not known."""
         meta._update_name(self.arguments.package)
         meta._update_version(self.arguments.version)
         if self.arguments.build_id is not None:
@@ -551,9 +911,28 @@ class Uploader:
             meta.release_attrs['summary'] = self.arguments.summary
         if self.arguments.description is not None:
             meta.release_attrs['description'] = self.arguments.description
-        if (meta.package_type is PackageType.CONDA) and (not self.arguments.keep_basename):
+        if rebuild_basename and (meta.package_type is PackageType.CONDA) and (not self.arguments.keep_basename):
             meta.rebuild_basename()
 
+        if meta.digests is None:
+            stream: typing.BinaryIO
+            with open(meta.filename, 'rb') as stream:
+                meta.digests = get_digests(stream, cache=self.api.hash_cache)
+
+        self._record(meta.filename, UploadState.INSPECTED, meta=meta.to_dict())
+        return meta
+
+    def upload_package(self, filename: str, package_meta: detect.Meta) -> bool:
+        """Upload a package to the server."""
+        return self.upload_prepared(self.prepare_package(filename, package_meta))
+
+    def upload_prepared(self, meta: PackageMeta) -> bool:
+        """Upload a package to the server, after all details on it are collected with :meth:`~Uploader.prepare`."""
+        record: typing.Optional[JournalRecord] = self._resumed(meta.filename)
+        if (record is not None) and (record['state'] == UploadState.COMMITTED):
+            logger.info('File "%s" was uploaded by the interrupted upload. Skipping upload.\n', meta.filename)
+            return False
+
         if not self._check_file(meta):
             return False
 
@@ -569,25 +948,35 @@ class Uploader:
         return self._upload_file(meta)
 
     def _check_file(self, meta: PackageMeta) -> bool:
-        """"""
+        """Check if file might be uploaded, resolving conflicts with files already stored on the server."""
         basename: str = meta.file_attrs['basename']
-        try:
-            self.api.distribution(self.username, meta.name, meta.version, basename)
-        except errors.NotFound:
+        files: typing.Optional[ReleaseFiles] = self.get_release_files(meta)
+        if (files is None) or (basename not in files):
             return True
 
         if self.arguments.mode == 'skip':
             logger.info('Distribution already exists. Skipping upload.\n')
             return False
 
+        if self.arguments.mode == 'skip-identical':
+            if self._is_identical(meta, files[basename]):
+                logger.info('Identical distribution already exists. Skipping upload.\n')
+                return False
+            logger.warning('Distribution "%s" already exists with a different content. Replacing.', basename)
+            self.api.remove_dist(self.username, meta.name, meta.version, basename)
+            files.pop(basename, None)
+            return True
+
         if self.arguments.mode == 'force':
             logger.warning('Distribution "%s" already exists. Removing.', basename)
             self.api.remove_dist(self.username, meta.name, meta.version, basename)
+            files.pop(basename, None)
             return True
 
         if self.arguments.mode == 'interactive':
             if bool_input(f'Distribution "{basename}" already exists. Would you like to replace it?'):
                 self.api.remove_dist(self.username, meta.name, meta.version, basename)
+                files.pop(basename, None)
                 return True
             logger.info('Not replacing distribution "%s"', basename)
             return False
@@ -604,6 +993,30 @@ class Uploader:
         )
         raise errors.Conflict(f'file {basename} already exists for package {meta.name} version {meta.version}', 409)
 
+    def _is_identical(self, meta: PackageMeta, remote: typing.Mapping[str, typing.Any]) -> bool:
+        """
+        Check if content of a local file is the same as of the one stored on the server.
+
+        Digests from the release listing are used when available, otherwise details on the distribution are requested.
+        """
+        if not (remote.get('sha256') or remote.get('md5')):
+            try:
+                remote = self.api.distribution(self.username, meta.name, meta.version, meta.file_attrs['basename'])
+            except errors.NotFound:
+                return False
+
+        digests: typing.Optional[Digests] = meta.digests
+        if digests is None:
+            stream: typing.BinaryIO
+            with open(meta.filename, 'rb') as stream:
+                digests = meta.digests = get_digests(stream, cache=self.api.hash_cache)
+
+        if remote.get('sha256'):
+            return remote['sha256'] == digests.sha256
+        if remote.get('md5'):
+            return remote['md5'] == digests.md5
+        return False
+
     def _upload_file(self, meta: PackageMeta) -> bool:
         """Perform upload of a file after its metadata and related package and release are prepared."""
         basename: str = meta.file_attrs['basename']
@@ -611,18 +1024,8 @@ class Uploader:
 
         stream: typing.BinaryIO
         with open(meta.filename, 'rb') as stream:
-            result: typing.Mapping[str, typing.Any] = self.api.upload(
-                self.username,
-                meta.name,
-                meta.version,
-                basename,
-                stream,
-                package_type,
-                self.arguments.description,
-                dependencies=meta.file_attrs.get('dependencies'),
-                attrs=meta.file_attrs['attrs'],
-                channels=self.arguments.labels,
-            )
+            digests: Digests = meta.digests or get_digests(stream, cache=self.api.hash_cache)
+            result: typing.Mapping[str, typing.Any] = self._transfer_file(meta, package_type, stream, digests)
 
         self.uploaded_packages.append(
             {
@@ -634,11 +1037,100 @@ class Uploader:
                 'url': result.get('url', f'https://anaconda.org/{self.username}/{meta.name}'),
             }
         )
-        self.__package_cache[meta.package_key].update(meta.package_type)
-        self.__release_cache[meta.release_key].update()
+        with self._lock_for(meta.package_key):
+            self.__package_cache[meta.package_key].update(meta.package_type)
+        with self._lock_for(meta.release_key):
+            self.__release_cache[meta.release_key].update()
+            if (files := self.__release_files.get(meta.release_key, None)) is not None:
+                files[basename] = result
         logger.info('Upload complete\n')
         return True
 
+    def _transfer_file(
+        self,
+        meta: PackageMeta,
+        package_type: typing.Union[PackageType, str],
+        stream: typing.BinaryIO,
+        digests: Digests,
+    ) -> typing.Mapping[str, typing.Any]:
+        """
+        Stage, transfer and commit a file, recording each completed step in the journal.
+
+        When resuming - steps already completed by the interrupted upload are reused, as long as the server still
+        accepts the staged distribution. Otherwise upload starts over.
+        """
+        basename: str = meta.file_attrs['basename']
+        record: JournalRecord = self._resumed(meta.filename) or {}
+        stage: typing.Optional[typing.Mapping[str, typing.Any]] = record.get('stage', None)
+        if (stage is not None) and (record['state'] in {UploadState.STAGED, UploadState.TRANSFERRED}):
+            try:
+                if record['state'] == UploadState.STAGED:
+                    logger.info('Resuming transfer of "%s"', basename)
+                    self.api.upload_staged(stage, basename, stream, md5=digests.base64('md5'), size=digests.size)
+                    self._record(meta.filename, UploadState.TRANSFERRED)
+                else:
+                    logger.info('Resuming commit of "%s"', basename)
+                return self._commit_file(meta, stage)
+            except errors.BinstarError as error:
+                logger.info('Unable to resume upload of "%s", starting over: %s', basename, error)
+                stream.seek(0)
+
+        stage = self.api.stage_upload(
+            self.username,
+            meta.name,
+            meta.version,
+            basename,
+            package_type,
+            digests.sha256,
+            description=self.arguments.description,
+            dependencies=meta.file_attrs.get('dependencies'),
+            attrs=meta.file_attrs['attrs'],
+            channels=self.arguments.labels,
+        )
+        self._record(meta.filename, UploadState.STAGED, stage=stage)
+
+        self.api.upload_staged(stage, basename, stream, md5=digests.base64('md5'), size=digests.size)
+        self._record(meta.filename, UploadState.TRANSFERRED)
+
+        return self._commit_file(meta, stage)
+
+    def _commit_file(
+        self,
+        meta: PackageMeta,
+        stage: typing.Mapping[str, typing.Any],
+    ) -> typing.Mapping[str, typing.Any]:
+        """Commit a transferred file, and record it in the journal."""
+        result: typing.Mapping[str, typing.Any] = self.api.commit_upload(
+            self.username, meta.name, meta.version, meta.file_attrs['basename'], stage['dist_id']
+        )
+        self._record(meta.filename, UploadState.COMMITTED)
+        return result
+
+    def _journal_key(self, filename: str) -> JournalKey:
+        """Retrieve a key of a file in the journal."""
+        with self.__lock:
+            key: typing.Optional[JournalKey] = self.__journal_keys.get(filename, None)
+            if key is None:
+                key = self.__journal_keys[filename] = UploadJournal.key_for(
+                    filename, f'{self.api.domain}/{self.username}'
+                )
+            return key
+
+    def _record(self, filename: str, state: UploadState, **details: typing.Any) -> None:
+        """
+        Record a completed upload step of a file in the journal.
+
+        Steps are recorded only for uploads started with :code:`--resume`, as no other upload could be resumed.
+        """
+        if self.arguments.resume:
+            self.journal.record(self._journal_key(filename), state, **details)
+
+    def _resumed(self, filename: str) -> typing.Optional[JournalRecord]:
+        """Retrieve a journal record of a file left by an interrupted upload, if upload should be resumed."""
+        if not self.arguments.resume:
+            return None
+        return self.journal.get(self._journal_key(filename))
+
     @staticmethod
     def detect_package_meta(filename: str, package_type: typing.Optional[PackageType] = None) -> detect.Meta:
         """Detect primary details on package being uploaded."""
@@ -699,7 +1191,14 @@ def add_parser(subparsers: typing.Any) -> None:
         epilog=__doc__,
     )
 
-    parser.add_argument('files', nargs='+', help='Distributions to upload', default=[], type=pathname_list)
+    parser.add_argument('files', nargs='*', help='Distributions to upload', default=[], type=pathname_list)
+    parser.add_argument(
+        '--manifest',
+        help=(
+            'JSON-lines file with details on distributions to upload (path, package, version, basename, attrs, '
+            'dependencies and optional digests), so they do not need to be inspected'
+        ),
+    )
 
     label_help: str = (
         '{deprecation}Add this file to a specific {label}. '
@@ -734,6 +1233,41 @@ def add_parser(subparsers: typing.Any) -> None:
         '--user',
         help='User account or Organization, defaults to the current user',
     )
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=1,
+        help='Number of files to upload in parallel (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--retries',
+        type=int,
+        default=RETRIES,
+        help='Number of times to retry a step of a file upload after a transient error (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--limit-rate',
+        type=parse_rate,
+        help=(
+            'Maximum upload rate in bytes per second, shared by all parallel uploads, '
+            'with an optional K, M or G suffix (e.g. 50M)'
+        ),
+    )
+    parser.add_argument(
+        '--no-hash-cache',
+        dest='hash_cache',
+        help="Don't reuse digests of unchanged files calculated by previous uploads",
+        action='store_false',
+    )
+    parser.add_argument(
+        '--resume',
+        help=(
+            'Record progress of the upload, and continue an interrupted upload of the same files (also started with '
+            '--resume) from the last completed step'
+        ),
+        action='store_true',
+    )
     parser.add_argument(
         '--keep-basename',
         dest='keep_basename',
@@ -831,6 +1365,13 @@ def add_parser(subparsers: typing.Any) -> None:
         dest='mode',
         const='skip',
     )
+    group.add_argument(
+        '--skip-identical',
+        help='Skip files which already exist with the same content, and replace the ones that differ',
+        action='store_const',
+        dest='mode',
+        const='skip-identical',
+    )
     group.add_argument(
         '-m',
         '--force-metadata-update',
@@ -877,7 +1418,14 @@ def mount_subcommand(app: typer.Typer, name: str, hidden: bool, help_text: str,
     )
     def upload(
         ctx: typer.Context,
-        files: typing.List[str] = typer.Argument(),
+        files: typing.List[str] = typer.Argument(None),
+        manifest: typing.Optional[str] = typer.Option(
+            None,
+            help=(
+                'JSON-lines file with details on distributions to upload (path, package, version, basename, attrs, '
+                'dependencies and optional digests), so they do not need to be inspected'
+            ),
+        ),
         channels: typing.List[str] = typer.Option(
             [],
             '-c',
@@ -900,6 +1448,38 @@ def mount_subcommand(app: typer.Typer, name: str, hidden: bool, help_text: str,
             '--user',
             help='User account or Organization, defaults to the current user',
         ),
+        jobs: int = typer.Option(
+            1,
+            '-j',
+            '--jobs',
+            min=1,
+            help='Number of files to upload in parallel',
+        ),
+        retries: int = typer.Option(
+            RETRIES,
+            min=0,
+            help='Number of times to retry a step of a file upload after a transient error',
+        ),
+        limit_rate: typing.Optional[int] = typer.Option(
+            None,
+            '--limit-rate',
+            help=(
+                'Maximum upload rate in bytes per second, shared by all parallel uploads, '
+                'with an optional K, M or G suffix (e.g. 50M)'
+            ),
+            parser=parse_rate,
+        ),
+        hash_cache: bool = typer.Option(
+            True,
+            help='Reuse digests of unchanged files calculated by previous uploads',
+        ),
+        resume: bool = typer.Option(
+            False,
+            help=(
+                'Record progress of the upload, and continue an interrupted upload of the same files (also started with '
+                '--resume) from the last completed step'
+            ),
+        ),
         keep_basename: bool = typer.Option(
             False,
             help='Do not normalize a basename when uploading a conda package.',
@@ -971,6 +1551,11 @@ def mount_subcommand(app: typer.Typer, name: str, hidden: bool, help_text: str,
             help='Skip errors on package batch upload if it already exists',
             callback=_exclusive_mode,
         ),
+        skip_identical: bool = typer.Option(
+            False,
+            help='Skip files which already exist with the same content, and replace the ones that differ',
+            callback=_exclusive_mode,
+        ),
         force_metadata_update: bool = typer.Option(
             False,
             '-m',
@@ -989,6 +1574,8 @@ def mount_subcommand(app: typer.Typer, name: str, hidden: bool, help_text: str,
             mode = 'force'
         elif skip_existing:
             mode = 'skip'
+        elif skip_identical:
+            mode = 'skip-identical'
         else:
             mode = None
 
@@ -1002,7 +1589,8 @@ def mount_subcommand(app: typer.Typer, name: str, hidden: bool, help_text: str,
         arguments = argparse.Namespace(
             # TODO: argparse handles this as a list of lists, with one filename in each.
             #       We should probably fix that one.
-            files=[[f] for f in files],
+            files=[[f] for f in files or []],
+            manifest=manifest,
             token=ctx.obj.params.get('token'),
             site=ctx.obj.params.get('site'),
             disable_ssl_warnings=ctx.obj.params.get('disable_ssl_warnings'),
@@ -1012,6 +1600,11 @@ def mount_subcommand(app: typer.Typer, name: str, hidden: bool, help_text: str,
             labels=labels,
             no_progress=not progress,
             user=user,
+            jobs=jobs,
+            retries=retries,
+            limit_rate=limit_rate,
+            hash_cache=hash_cache,
+            resume=resume,
             keep_basename=keep_basename,
             package=package,
             version=version,
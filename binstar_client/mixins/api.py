@@ -0,0 +1,380 @@
+"""API client methods for users, authentications, packages and their files."""
+
+import collections
+import os
+from urllib.parse import quote
+
+import defusedxml.ElementTree as ET
+
+from binstar_client import errors
+from binstar_client.mixins.core import ApiRequest
+from binstar_client.utils.retry import parse_retry_after
+
+
+class ApiMixin:
+    def _authenticate_request(
+        self,
+        application,
+        application_url=None,
+        for_user=None,
+        scopes=None,
+        max_age=None,
+        strength='strong',
+        fail_if_already_exists=False,
+        hostname=None,
+    ):
+        """Build a request to create an authentication token (see :meth:`~binstar_client.Binstar._authenticate`)."""
+        url = '%s/authentications' % (self.domain)
+        payload = {
+            'scopes': scopes,
+            'note': application,
+            'note_url': application_url,
+            'hostname': hostname,
+            'user': for_user,
+            'max-age': max_age,
+            'strength': strength,
+            'fail-if-exists': fail_if_already_exists,
+        }
+        return ApiRequest('POST', url, json=payload, result=lambda res: self._json(res)['token'])
+
+    def authentication(self):
+        """Retrieve information on the current authentication token."""
+        url = '%s/authentication' % (self.domain)
+        return self._send(ApiRequest('GET', url))
+
+    def authentications(self):
+        """Get a list of the current authentication tokens."""
+
+        url = '%s/authentications' % (self.domain)
+        return self._send(ApiRequest('GET', url))
+
+    def remove_authentication(self, auth_name=None, organization=None):
+        """
+        Remove the current authentication or the one given by `auth_name`
+        """
+        if auth_name:
+            if organization:
+                url = '%s/authentications/org/%s/name/%s' % (self.domain, organization, auth_name)
+            else:
+                url = '%s/authentications/name/%s' % (self.domain, auth_name)
+        else:
+            url = '%s/authentications' % (self.domain,)
+
+        return self._send(ApiRequest('DELETE', url, allowed=(201,), result=None))
+
+    def user(self, login=None):
+        """
+        Get user information.
+
+        :param login: (optional) the login name of the user or None. If login is None
+                      this method will return the information of the authenticated user.
+        """
+        if login:
+            url = f'{self.domain}/user/{login}'
+        elif self.token:
+            url = f'{self.domain}/user'
+        else:
+            raise errors.Unauthorized(
+                'Authentication token is missing. Please, use `anaconda login` to reauthenticate.', 401
+            )
+
+        return self._send(ApiRequest('GET', url, cached=True))
+
+    def user_packages(self, login=None, platform=None, package_type=None, type_=None, access=None):
+        """
+        Returns a list of packages for a given user and optionally filter
+        by `platform`, `package_type` and `type_`.
+
+        :param login: (optional) the login name of the user or None. If login
+                      is None this method will return the packages for the
+                      authenticated user.
+        :param platform: only find packages that include files for this platform.
+           (e.g. 'linux-64', 'osx-64', 'win-32')
+        :param package_type: only find packages that have this kind of file
+           (e.g. 'env', 'conda', 'pypi')
+        :param type_: only find packages that have this conda `type`
+           (i.e. 'app')
+        :param access: only find packages that have this access level
+           (e.g. 'private', 'authenticated', 'public')
+        """
+        if login:
+            url = '{0}/packages/{1}'.format(self.domain, login)
+        else:
+            url = '{0}/packages'.format(self.domain)
+
+        arguments = collections.OrderedDict()
+
+        if platform:
+            arguments['platform'] = platform
+        if package_type:
+            arguments['package_type'] = package_type
+        if type_:
+            arguments['type'] = type_
+        if access:
+            arguments['access'] = access
+
+        return self._send(ApiRequest('GET', url, params=arguments))
+
+    def package(self, login, package_name):
+        """
+        Get information about a specific package
+
+        :param login: the login of the package owner
+        :param package_name: the name of the package
+        """
+        url = '%s/package/%s/%s' % (self.domain, login, package_name)
+        return self._send(ApiRequest('GET', url, cached=True))
+
+    def package_add_collaborator(self, owner, package_name, collaborator):
+        url = '%s/packages/%s/%s/collaborators/%s' % (self.domain, owner, package_name, collaborator)
+        return self._send(ApiRequest('PUT', url, allowed=(201,), result=None))
+
+    def package_remove_collaborator(self, owner, package_name, collaborator):
+        url = '%s/packages/%s/%s/collaborators/%s' % (self.domain, owner, package_name, collaborator)
+        return self._send(ApiRequest('DELETE', url, allowed=(201,), result=None))
+
+    def package_collaborators(self, owner, package_name):
+        url = '%s/packages/%s/%s/collaborators' % (self.domain, owner, package_name)
+        return self._send(ApiRequest('GET', url))
+
+    def all_packages(self, modified_after=None):
+        url = '%s/package_listing' % (self.domain)
+        data = {'modified_after': modified_after or ''}
+        return self._send(ApiRequest('GET', url, data=data))
+
+    def add_package(
+        self,
+        login,
+        package_name,
+        summary=None,
+        license=None,
+        public=True,
+        license_url=None,
+        license_family=None,
+        attrs=None,
+        package_type=None,
+    ):
+        """
+        Add a new package to a users account
+
+        :param login: the login of the package owner
+        :param package_name: the name of the package to be created
+        :param package_type: A type identifier for the package (eg. 'pypi' or 'conda', etc.)
+        :param summary: A short summary about the package
+        :param license: the name of the package license
+        :param license_url: the url of the package license
+        :param public: if true then the package will be hosted publicly
+        :param attrs: A dictionary of extra attributes for this package
+        """
+        package_types = [] if package_type is None else [package_type.value]
+
+        url = '%s/package/%s/%s' % (self.domain, login, package_name)
+
+        attrs = attrs or {}
+        attrs['summary'] = summary
+        attrs['package_types'] = package_types
+        attrs['license'] = {
+            'name': license,
+            'url': license_url,
+            'family': license_family,
+        }
+
+        payload = {'public': bool(public), 'publish': False, 'public_attrs': dict(attrs or {})}
+
+        return self._send(ApiRequest('POST', url, json=payload))
+
+    def update_package(self, login, package_name, attrs):
+        """
+        Update public_attrs of the package on a users account
+
+        :param login: the login of the package owner
+        :param package_name: the name of the package to be updated
+        :param attrs: A dictionary of attributes to update
+        """
+        url = '{}/package/{}/{}'.format(self.domain, login, package_name)
+
+        payload = {'public_attrs': dict(attrs)}
+        return self._send(ApiRequest('PATCH', url, json=payload))
+
+    def update_release(self, login, package_name, version, attrs):
+        """
+        Update release public_attrs of the package on a users account
+
+        :param login: the login of the package owner
+        :param package_name: the name of the package to be updated
+        :param version: version of the package to update
+        :param attrs: A dictionary of attributes to update
+        """
+        url = '{}/release/{}/{}/{}'.format(self.domain, login, package_name, version)
+        payload = {'public_attrs': dict(attrs)}
+        return self._send(ApiRequest('PATCH', url, json=payload))
+
+    def remove_package(self, username, package_name):
+        url = '%s/package/%s/%s' % (self.domain, username, package_name)
+
+        return self._send(ApiRequest('DELETE', url, allowed=(201,), result=None))
+
+    def release(self, login, package_name, version):
+        """
+        Get information about a specific release
+
+        :param login: the login of the package owner
+        :param package_name: the name of the package
+        :param version: the name of the package
+        """
+        url = '%s/release/%s/%s/%s' % (self.domain, login, package_name, version)
+        return self._send(ApiRequest('GET', url, cached=True))
+
+    def remove_release(self, username, package_name, version):
+        """
+        Remove a release and all files under it.
+
+        :param username: the login of the package owner
+        :param package_name: the name of the package
+        :param version: the name of the package
+        """
+        url = '%s/release/%s/%s/%s' % (self.domain, username, package_name, version)
+        return self._send(ApiRequest('DELETE', url, allowed=(201,), result=None))
+
+    def add_release(self, login, package_name, version, requirements, announce, release_attrs):
+        """
+        Add a new release to a package.
+
+        :param login: the login of the package owner
+        :param package_name: the name of the package
+        :param version: the version string of the release
+        :param requirements: A dict of requirements NOTE: describe
+        :param announce: An announcement that will be posted to all package watchers
+        """
+
+        url = '%s/release/%s/%s/%s' % (self.domain, login, package_name, version)
+
+        if not release_attrs:
+            release_attrs = {}
+
+        payload = {
+            'requirements': requirements,
+            'announce': announce,
+            'description': None,  # Will be updated with the one on release_attrs
+        }
+        payload.update(release_attrs)
+
+        return self._send(ApiRequest('POST', url, json=payload))
+
+    def distribution(self, login, package_name, release, basename=None):
+        url = '%s/dist/%s/%s/%s/%s' % (self.domain, login, package_name, release, basename)
+        return self._send(ApiRequest('GET', url, cached=True))
+
+    def remove_dist(self, login, package_name, release, basename=None, _id=None):
+        if basename:
+            url = '%s/dist/%s/%s/%s/%s' % (self.domain, login, package_name, release, basename)
+        elif _id:
+            url = '%s/dist/%s/%s/%s/-/%s' % (self.domain, login, package_name, release, _id)
+        else:
+            raise TypeError("method remove_dist expects either 'basename' or '_id' arguments")
+
+        return self._send(ApiRequest('DELETE', url))
+
+    def _download_request(self, login, package_name, release, basename, md5=None):
+        """
+        Build the request for a distribution to the API (see :meth:`~binstar_client.Binstar.download`).
+
+        The API either sends the content directly, or redirects to the storage. Redirects must not be followed by the
+        API client, as the storage rejects requests with the custom headers of the API.
+        """
+        url = '%s/download/%s/%s/%s/%s' % (self.domain, login, package_name, release, basename)
+        if md5:
+            headers = {'ETag': md5}
+        else:
+            headers = {}
+        return ApiRequest('GET', url, headers=headers, allowed=(200, 302, 304), result=None)
+
+    @staticmethod
+    def _range_headers(offset=0):
+        """Headers to request the rest of a distribution from the storage, after the first :code:`offset` bytes."""
+        return {'Range': 'bytes=%d-' % offset} if offset else {}
+
+    @staticmethod
+    def _upload_size(file, size=None):
+        """Detect number of bytes left to read from a :code:`file`, unless it is already known."""
+        if size is None:
+            spos = file.tell()
+            file.seek(0, os.SEEK_END)
+            size = file.tell() - spos
+            file.seek(spos)
+        return size
+
+    def _stage_request(
+        self,
+        login,
+        package_name,
+        release,
+        basename,
+        distribution_type,
+        sha256,
+        description='',
+        dependencies=None,
+        attrs=None,
+        channels=('main',),
+    ):
+        """Build the request to stage an upload (see :meth:`~binstar_client.Binstar.stage_upload`)."""
+        url = '%s/stage/%s/%s/%s/%s' % (self.domain, login, package_name, release, quote(basename))
+        if attrs is None:
+            attrs = {}
+        if not isinstance(attrs, dict):
+            raise TypeError('argument attrs must be a dictionary')
+
+        if not isinstance(distribution_type, str):
+            distribution_type = distribution_type.value
+
+        payload = {
+            'distribution_type': distribution_type,
+            'description': description,
+            'attrs': attrs,
+            'dependencies': dependencies,
+            'channels': channels,
+            'sha256': sha256,
+        }
+        return ApiRequest('POST', url, json=payload)
+
+    @staticmethod
+    def _upload_form(stage, md5, size):
+        """Build fields of the form to post a staged distribution to the storage with."""
+        s3data = dict(stage['form_data'])
+        s3data['Content-Length'] = str(size)
+        s3data['Content-MD5'] = md5
+        return s3data
+
+    @staticmethod
+    def _upload_error(s3res):
+        """Build an error for a response of the storage, which rejected an upload."""
+        msg_tail = ''
+        try:
+            if ET.fromstring(s3res.text).find('Code').text == 'InvalidDigest':
+                msg_tail = ' The Content-MD5 or checksum value is not valid.'
+        except (ET.ParseError, AttributeError):
+            pass
+        error = errors.BinstarError('Error uploading package!%s' % msg_tail, s3res.status_code)
+        error.retry_after = parse_retry_after(s3res.headers.get('Retry-After'))
+        return error
+
+    def _commit_request(self, login, package_name, release, basename, dist_id):
+        """Build the request to publish an upload (see :meth:`~binstar_client.Binstar.commit_upload`)."""
+        url = '%s/commit/%s/%s/%s/%s' % (self.domain, login, package_name, release, quote(basename))
+        payload = {'dist_id': dist_id}
+        return ApiRequest('POST', url, json=payload)
+
+    def search(self, query, package_type=None, platform=None):
+        if package_type is not None:
+            package_type = package_type.value
+
+        url = '%s/search' % self.domain
+        params = {'name': query, 'type': package_type, 'platform': platform}
+        return self._send(
+            ApiRequest('GET', url, params={key: value for key, value in params.items() if value is not None})
+        )
+
+    def user_licenses(self):
+        """Download the user current trial/paid licenses."""
+        url = '{domain}/license'.format(domain=self.domain)
+        return self._send(ApiRequest('GET', url))
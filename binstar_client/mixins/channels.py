@@ -1,3 +1,6 @@
+from binstar_client.mixins.core import ApiRequest
+
+
 class ChannelsMixin:
     def list_channels(self, owner):
         """
@@ -7,9 +10,7 @@ class ChannelsMixin:
         """
         url = '%s/channels/%s' % (self.domain, owner)
 
-        res = self.session.get(url)
-        self._check_response(res, [200])
-        return res.json()
+        return self._send(ApiRequest('GET', url, cached=True))
 
     def show_channel(self, channel, owner):
         """
@@ -19,9 +20,7 @@ class ChannelsMixin:
         """
         url = '%s/channels/%s/%s' % (self.domain, owner, channel)
 
-        res = self.session.get(url)
-        self._check_response(res, [200])
-        return res.json()
+        return self._send(ApiRequest('GET', url, cached=True))
 
     def add_channel(self, channel, owner, package=None, version=None, filename=None):
         """
@@ -36,8 +35,7 @@ class ChannelsMixin:
         url = '%s/channels/%s/%s' % (self.domain, owner, channel)
         payload = dict(package=package, version=version, basename=filename)
 
-        res = self.session.post(url, json=payload)
-        self._check_response(res, [201])
+        return self._send(ApiRequest('POST', url, json=payload, allowed=(201,), result=None))
 
     def remove_channel(self, channel, owner, package=None, version=None, filename=None):
         """
@@ -52,8 +50,7 @@ class ChannelsMixin:
         url = '%s/channels/%s/%s' % (self.domain, owner, channel)
         payload = dict(package=package, version=version, basename=filename)
 
-        res = self.session.delete(url, json=payload)
-        self._check_response(res, [201])
+        return self._send(ApiRequest('DELETE', url, json=payload, allowed=(201,), result=None))
 
     def copy_channel(self, channel, owner, to_channel):
         """
@@ -64,8 +61,7 @@ class ChannelsMixin:
         :param to_channel: Destination name (may be a channel that already exists)
         """
         url = '%s/channels/%s/%s/copy/%s' % (self.domain, owner, channel, to_channel)
-        res = self.session.post(url)
-        self._check_response(res, [201])
+        return self._send(ApiRequest('POST', url, allowed=(201,), result=None))
 
     def lock_channel(self, channel, owner):
         """
@@ -76,8 +72,7 @@ class ChannelsMixin:
         :param to_channel: Destination name (may be a channel that already exists)
         """
         url = '%s/channels/%s/%s/lock' % (self.domain, owner, channel)
-        res = self.session.post(url)
-        self._check_response(res, [201])
+        return self._send(ApiRequest('POST', url, allowed=(201,), result=None))
 
     def unlock_channel(self, channel, owner):
         """
@@ -88,5 +83,4 @@ class ChannelsMixin:
         :param to_channel: Destination name (may be a channel that already exists)
         """
         url = '%s/channels/%s/%s/lock' % (self.domain, owner, channel)
-        res = self.session.delete(url)
-        self._check_response(res, [201])
+        return self._send(ApiRequest('DELETE', url, allowed=(201,), result=None))
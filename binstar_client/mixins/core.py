@@ -0,0 +1,155 @@
+"""Transport-independent parts of the API clients."""
+
+import logging
+import typing
+
+from binstar_client import errors
+from binstar_client._version import __version__
+from binstar_client.utils import json_codec
+from binstar_client.utils.http_codes import STATUS_CODES
+from binstar_client.utils.retry import parse_retry_after
+
+logger = logging.getLogger('binstar')
+
+
+def json_result(res):
+    """Decode JSON content of a response with the fastest available :mod:`~binstar_client.utils.json_codec`."""
+    return json_codec.loads(res.content)
+
+
+class ApiRequest(typing.NamedTuple):
+    """
+    Description of a single request to the API, which each client sends with its own transport.
+
+    Cached requests are served from the :code:`http_cache` of the client (if it has one), keyed by their :code:`url`
+    alone, so they must not have any :code:`params` or body.
+    """
+
+    method: str
+    url: str
+    params: typing.Optional[typing.Mapping[str, typing.Any]] = None
+    json: typing.Any = None
+    data: typing.Optional[typing.Mapping[str, typing.Any]] = None
+    content: typing.Optional[str] = None
+    headers: typing.Optional[typing.Mapping[str, str]] = None
+    allowed: typing.Sequence[int] = (200,)
+    parse_error: typing.Optional[typing.Callable[[dict, str], str]] = None
+    wrap_error: typing.Optional[typing.Callable[[errors.BinstarError], typing.Optional[Exception]]] = None
+    result: typing.Optional[typing.Callable[[typing.Any], typing.Any]] = json_result
+    cached: bool = False
+
+
+class CoreMixin:
+    """
+    Request preparation and response checks shared by :class:`~binstar_client.Binstar` and
+    :class:`~binstar_client.aio.AsyncBinstar`.
+
+    API methods build an :class:`~ApiRequest`, and return the result of :code:`self._send(request)`. Each client sends
+    requests with its own transport, so methods of :class:`~binstar_client.aio.AsyncBinstar` return awaitables.
+
+    Responses may come from either :code:`requests` or :code:`httpx`, so only the attributes both of them have are used.
+    """
+
+    _token_warning_sent = False
+    http_cache = None
+
+    @staticmethod
+    def _normalize_domain(domain):
+        if domain.endswith('/'):
+            domain = domain[:-1]
+        if not domain.startswith(('http://', 'https://')):
+            domain = 'https://' + domain
+        return domain
+
+    @staticmethod
+    def _default_headers(token=None):
+        headers = {
+            'x-binstar-api-version': __version__,
+            'User-Agent': 'Anaconda-Client/{} (+https://anaconda.org)'.format(__version__),
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+        }
+        if token:
+            headers['Authorization'] = 'token {}'.format(token)
+        return headers
+
+    @staticmethod
+    def _json(res):
+        """Decode JSON content of a response with the fastest available :mod:`~binstar_client.utils.json_codec`."""
+        return json_result(res)
+
+    def _http_cache_scope(self):
+        """Identity to scope cached responses by, so they are never shared between tokens."""
+        return self.session.headers.get('Authorization')
+
+    def _cached_entry(self, request):
+        """Find a cached response to a :class:`~ApiRequest`, if it is cached and the client has an HTTP cache."""
+        if (not request.cached) or (self.http_cache is None):
+            return None
+        return self.http_cache.get(request.url, self._http_cache_scope())
+
+    @staticmethod
+    def _request_headers(request, entry=None):
+        """Headers to send a :class:`~ApiRequest` with, including validators of its cached response (if any)."""
+        if entry is None:
+            return request.headers
+        return {**(request.headers or {}), **entry.validators}
+
+    def _result(self, request, res, entry=None):
+        """
+        Check a response to a :class:`~ApiRequest`, and extract its result.
+
+        :param entry: cached response the request was revalidating, which is used again if it has not changed
+        """
+        if (entry is not None) and (res.status_code == 304):
+            self.http_cache.refresh(entry, self._http_cache_scope())
+            return entry.content
+
+        try:
+            self._check_response(res, request.allowed, parse_error=request.parse_error)
+        except errors.BinstarError as error:
+            replacement = None if request.wrap_error is None else request.wrap_error(error)
+            if replacement is None:
+                raise
+            raise replacement from error
+
+        if request.result is None:
+            return None
+        result = request.result(res)
+        if request.cached and (self.http_cache is not None):
+            self.http_cache.put(request.url, self._http_cache_scope(), result, res.headers)
+        return result
+
+    def _invalidates_http_cache(self, res):
+        """Check if a response confirms a change made through the API, after which cached responses are stale."""
+        return (self.http_cache is not None) and (res.request.method not in ('GET', 'HEAD')) and (res.status_code < 400)
+
+    def _check_response(self, res, allowed=None, parse_error=None):
+        allowed = [200] if allowed is None else allowed
+
+        if not self._token_warning_sent and 'Conda-Token-Warning' in res.headers:
+            logger.warning('Token warning: %s', res.headers['Conda-Token-Warning'])
+            self._token_warning_sent = True
+
+        if 'X-Anaconda-Lockdown' in res.headers:
+            logger.warning('Anaconda repository is currently in LOCKDOWN mode.')
+
+        if 'X-Anaconda-Read-Only' in res.headers:
+            logger.warning('Anaconda repository is currently in READ ONLY mode.')
+
+        if res.status_code not in allowed:
+            short, long = STATUS_CODES.get(res.status_code, ('?', 'Undefined error'))
+            msg = '%s: %s ([%s] %s -> %s)' % (short, long, res.request.method, res.request.url, res.status_code)
+
+            try:
+                data = self._json(res)
+            except Exception:
+                data = {}
+
+            if parse_error is not None:
+                msg = parse_error(data, msg)
+            else:
+                msg = data.get('error', msg)
+            error = errors.error_class_for_status_code(res.status_code)(msg, res.status_code)
+            error.retry_after = parse_retry_after(res.headers.get('Retry-After'))
+            raise error
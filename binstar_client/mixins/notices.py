@@ -1,5 +1,6 @@
 """API client methods for conda channel notices."""
 
+from binstar_client.mixins.core import ApiRequest
 from binstar_client.utils import jencode
 
 
@@ -15,8 +16,8 @@ def notice_error_message(data: dict, fallback: str) -> str:
 
 
 class NoticesMixin:
-    def _check_notice_response(self, res, allowed=None):
-        self._check_response(res, allowed, parse_error=notice_error_message)
+    def _notice_request(self, method, url, allowed=(200,), **kwargs):
+        return ApiRequest(method, url, allowed=allowed, parse_error=notice_error_message, **kwargs)
 
     def _notice_url(self, channel, notice_id, action=None):
         url = f'{self.domain}/{channel}/notices/{notice_id}'
@@ -31,15 +32,11 @@ class NoticesMixin:
         if status:
             params['status'] = status
 
-        res = self.session.get(url, params=params)
-        self._check_notice_response(res, [200])
-        return res.json()
+        return self._send(self._notice_request('GET', url, params=params))
 
     def get_notice(self, channel, notice_id):
         """Get a single notice (admin)."""
-        res = self.session.get(self._notice_url(channel, notice_id))
-        self._check_notice_response(res, [200])
-        return res.json()
+        return self._send(self._notice_request('GET', self._notice_url(channel, notice_id)))
 
     def create_notice(self, channel, message, level, expires_at):
         """Create a draft notice (server assigns id)."""
@@ -49,27 +46,21 @@ class NoticesMixin:
             level=level,
             expires_at=expires_at,
         )
-        res = self.session.post(url, data=data, headers=headers)
-        self._check_notice_response(res, [201])
-        return res.json()
+        return self._send(self._notice_request('POST', url, (201,), content=data, headers=headers))
 
     def update_notice(self, channel, notice_id, **fields):
         """Update a notice (partial)."""
         payload = {key: value for key, value in fields.items() if value is not None}
         data, headers = jencode(**payload)
-        res = self.session.patch(self._notice_url(channel, notice_id), data=data, headers=headers)
-        self._check_notice_response(res, [200])
-        return res.json()
+        url = self._notice_url(channel, notice_id)
+        return self._send(self._notice_request('PATCH', url, content=data, headers=headers))
 
     def delete_notice(self, channel, notice_id):
         """Soft-delete a notice."""
-        res = self.session.delete(self._notice_url(channel, notice_id))
-        self._check_notice_response(res, [204])
+        return self._send(self._notice_request('DELETE', self._notice_url(channel, notice_id), (204,), result=None))
 
     def _lifecycle_notice(self, channel, notice_id, action):
-        res = self.session.post(self._notice_url(channel, notice_id, action))
-        self._check_notice_response(res, [200])
-        return res.json()
+        return self._send(self._notice_request('POST', self._notice_url(channel, notice_id, action)))
 
     def publish_notice(self, channel, notice_id):
         """Publish a draft notice."""
@@ -1,3 +1,6 @@
+from binstar_client.mixins.core import ApiRequest
+
+
 class OrgMixin:
     def user_orgs(self, username=None):
         if username:
@@ -5,10 +8,7 @@ class OrgMixin:
         else:
             url = '%s/user/orgs' % (self.domain)
 
-        res = self.session.get(url)
-        self._check_response(res)
-
-        return res.json()
+        return self._send(ApiRequest('GET', url, cached=True))
 
     def groups(self, owner=None):
         if owner:
@@ -16,60 +16,43 @@ class OrgMixin:
         else:
             url = '%s/groups' % (self.domain,)
 
-        res = self.session.get(url)
-        self._check_response(res)
-
-        return res.json()
+        return self._send(ApiRequest('GET', url))
 
     def group(self, owner, group_name):
         url = '%s/group/%s/%s' % (self.domain, owner, group_name)
-        res = self.session.get(url)
-        self._check_response(res)
-        return res.json()
+        return self._send(ApiRequest('GET', url))
 
     def group_members(self, org, name):
         url = '%s/group/%s/%s/members' % (self.domain, org, name)
-        res = self.session.get(url)
-        self._check_response(res)
-
-        return res.json()
+        return self._send(ApiRequest('GET', url))
 
     def is_group_member(self, org, name, member):
         url = '%s/group/%s/%s/members/%s' % (self.domain, org, name, member)
-        res = self.session.get(url)
-        self._check_response(res, [204, 404])
-        return res.status_code == 204
+        return self._send(ApiRequest('GET', url, allowed=(204, 404), result=lambda res: res.status_code == 204))
 
     def add_group_member(self, org, name, member):
         url = '%s/group/%s/%s/members/%s' % (self.domain, org, name, member)
-        res = self.session.put(url)
-        self._check_response(res, [204])
+        return self._send(ApiRequest('PUT', url, allowed=(204,), result=None))
 
     def remove_group_member(self, org, name, member):
         url = '%s/group/%s/%s/members/%s' % (self.domain, org, name, member)
-        res = self.session.delete(url)
-        self._check_response(res, [204])
+        return self._send(ApiRequest('DELETE', url, allowed=(204,), result=None))
 
     def remove_group_package(self, org, name, package):
         url = '%s/group/%s/%s/packages/%s' % (self.domain, org, name, package)
-        res = self.session.delete(url)
-        self._check_response(res, [204])
+        return self._send(ApiRequest('DELETE', url, allowed=(204,), result=None))
 
     def group_packages(self, org, name):
         url = '%s/group/%s/%s/packages' % (self.domain, org, name)
-        res = self.session.get(url)
-        self._check_response(res, [200])
-        return res.json()
+        return self._send(ApiRequest('GET', url))
 
     def add_group_package(self, org, name, package):
         url = '%s/group/%s/%s/packages/%s' % (self.domain, org, name, package)
-        res = self.session.put(url)
-        self._check_response(res, [204])
+        return self._send(ApiRequest('PUT', url, allowed=(204,), result=None))
 
     def add_group(self, org, name, perms='read'):
         url = '%s/group/%s/%s' % (self.domain, org, name)
 
         payload = {'perms': perms}
 
-        res = self.session.post(url, json=payload)
-        self._check_response(res, [204])
+        return self._send(ApiRequest('POST', url, json=payload, allowed=(204,), result=None))
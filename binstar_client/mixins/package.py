@@ -1,4 +1,12 @@
 from binstar_client.errors import Conflict
+from binstar_client.mixins.core import ApiRequest
+
+
+def copy_error(error):
+    """Explain how to resolve conflicts of copied files."""
+    if isinstance(error, Conflict):
+        return Conflict('File conflict while copying! Try to use --replace or --update options for force copying')
+    return None
 
 
 class PackageMixin:
@@ -20,17 +28,10 @@ class PackageMixin:
         payload = {'to_owner': to_owner, 'from_channel': from_label, 'to_channel': to_label}
 
         if replace:
-            res = self.session.put(url, json=payload)
+            method = 'PUT'
         elif update:
-            res = self.session.patch(url, json=payload)
+            method = 'PATCH'
         else:
-            res = self.session.post(url, json=payload)
-
-        try:
-            self._check_response(res)
-        except Conflict as conflict:
-            raise Conflict(
-                'File conflict while copying! Try to use --replace or --update options for force copying'
-            ) from conflict
+            method = 'POST'
 
-        return res.json()
+        return self._send(ApiRequest(method, url, json=payload, wrap_error=copy_error))
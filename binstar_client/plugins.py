@@ -49,6 +49,7 @@ ALL_SUBCOMMANDS = {
     "label",
     "login",
     "logout",
+    "mirror",
     "move",
     "package",
     "remove",
@@ -65,6 +66,7 @@ NON_HIDDEN_SUBCOMMANDS = {
     "copy",
     "download",
     "label",
+    "mirror",
     "move",
     "package",
     "remove",
@@ -83,6 +85,7 @@ SUBCOMMANDS_WITH_NEW_CLI = {
     "download",
     "groups",
     "label",
+    "mirror",
     "move",
     "package",
     "remove",
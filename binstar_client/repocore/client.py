@@ -8,6 +8,8 @@ from posixpath import join
 from typing import Optional
 
 from anaconda_auth.client import BaseClient
+from requests_toolbelt import MultipartEncoder, MultipartEncoderMonitor
+from tqdm import tqdm
 
 from binstar_client.repocore.errors import InvalidName, RepoCoreError, Unauthorized
 from binstar_client.repocore.models import (
@@ -17,6 +19,9 @@ from binstar_client.repocore.models import (
     NamespaceChannel,
 )
 from binstar_client.repocore.package_utils import PackageType
+from binstar_client.utils import json_codec
+from binstar_client.utils.bandwidth import ThrottledReader, TokenBucket, format_rate, parse_rate
+from binstar_client.utils.throttle import AdaptiveLimiter, install_throttling
 
 logger = logging.getLogger(__name__)
 
@@ -31,7 +36,9 @@ class RepoCoreClient(BaseClient):
     Bearer token injection, and login-required prompting automatically.
     """
 
-    def __init__(self, site=None, ssl_verify=None, version=None):
+    bandwidth = None
+
+    def __init__(self, site=None, ssl_verify=None, version=None, limit_rate=None):
         kwargs = {}
         if site:
             kwargs["site"] = site
@@ -39,6 +46,10 @@ class RepoCoreClient(BaseClient):
             kwargs["ssl_verify"] = ssl_verify
 
         super().__init__(**kwargs)
+        self.throttle = AdaptiveLimiter()
+        install_throttling(self, self.throttle)
+        if limit_rate:
+            self.bandwidth = TokenBucket(parse_rate(limit_rate))
 
         if version:
             self._user_agent = f"anaconda-client/{version}"
@@ -93,7 +104,7 @@ class RepoCoreClient(BaseClient):
     def _extract_error_message(self, response, action=""):
         """Extract a user-friendly error message from a response."""
         try:
-            data = response.json()
+            data = json_codec.loads(response.content)
             if isinstance(data, dict):
                 error = data.get("error")
                 if isinstance(error, dict):
@@ -111,7 +122,7 @@ class RepoCoreClient(BaseClient):
 
         Resolution order:
           1. If status code has no content (empty success code), return None
-          2. If status code is a non empty success code, return response.json()
+          2. If status code is a non empty success code, return decoded JSON content
           3. Extract error message
           4. If status code is 401 or 403, raise Unauthorized error with extracted msg
           5. If status code is any other, raise RepoCoreError with extracted msg
@@ -120,7 +131,7 @@ class RepoCoreClient(BaseClient):
         if response.status_code in success_codes:
             if response.status_code in empty_success_codes:  # No Content responses
                 return None
-            return response.json()
+            return json_codec.loads(response.content)
 
         msg = self._extract_error_message(response, action)
 
@@ -201,13 +212,28 @@ class RepoCoreClient(BaseClient):
         statinfo = os.stat(filepath)
         filename = basename(filepath)
 
-        with open(filepath, "rb") as f:
-            multipart_form_data: list[tuple[str, tuple[str | None, str | bytes]]] = [
-                ("content", (filename, f.read())),
-                ("filetype", (None, artifact_type)),
-                ("size", (None, str(statinfo.st_size))),
-            ]
-            response = self.post(url, files=multipart_form_data)
+        # Stream the form from the open file, so memory usage does not depend on the artifact size
+        with (
+            open(filepath, "rb") as f,
+            tqdm(total=statinfo.st_size, unit="B", unit_scale=True, unit_divisor=1024) as bar,
+        ):
+            encoder = MultipartEncoder(
+                fields=[
+                    ("content", (filename, f)),
+                    ("filetype", (None, artifact_type)),
+                    ("size", (None, str(statinfo.st_size))),
+                ]
+            )
+            monitor = MultipartEncoderMonitor(encoder, lambda m: bar.update(min(m.bytes_read, bar.total) - bar.n))
+            body = monitor if self.bandwidth is None else ThrottledReader(monitor, self.bandwidth)
+            response = self.post(url, data=body, headers={"Content-Type": monitor.content_type})
+
+        if self.bandwidth is not None:
+            logger.info(
+                "Average transfer rate: %s (limited to %s)",
+                format_rate(self.bandwidth.effective_rate),
+                format_rate(self.bandwidth.rate),
+            )
 
         return self._manage_response(response, f"uploading {filename}", success_codes=[200, 201])
 
@@ -10,6 +10,7 @@ from hashlib import md5
 # Re-export config
 from .config import (
     get_server_api,
+    close_shared_clients,
     dirs,
     load_token,
     store_token,
@@ -23,6 +24,7 @@ from .config import (
     SITE_CONFIG,
     DEFAULT_CONFIG,
 )
+from .hashing import Digests, HashCache, compute_digests, get_digests
 from .spec import PackageSpec, package_specs, parse_specs
 from binstar_client.deprecations import deprecated, DEPRECATE_IN_1_15_0, REMOVE_IN_2_0_0
 
@@ -0,0 +1,157 @@
+# -*- coding: utf8 -*-
+
+"""Limits of bandwidth used to transfer files to and from the storage."""
+
+from __future__ import annotations
+
+__all__ = ['TokenBucket', 'ThrottledReader', 'format_rate', 'parse_rate', 'throttled_chunks', 'throttled_chunks_async']
+
+import asyncio
+import re
+import threading
+import time
+import typing
+
+
+MIN_READ_SIZE: typing.Final[int] = 16 * 1024
+
+RATE_PATTERN: typing.Final[typing.Pattern[str]] = re.compile(
+    r'^\s*(?P<value>\d+(?:\.\d+)?)\s*(?P<unit>[kmg]?)(?:i?b)?(?:/s)?\s*$',
+    re.IGNORECASE,
+)
+RATE_UNITS: typing.Final[typing.Mapping[str, int]] = {'': 1, 'k': 1024, 'm': 1024**2, 'g': 1024**3}
+
+
+def parse_rate(value: typing.Union[str, int, float]) -> int:
+    """
+    Parse a transfer rate in bytes per second.
+
+    Rates may have a :code:`K`, :code:`M` or :code:`G` suffix (powers of 1024), e.g. :code:`50M` or :code:`512k`.
+
+    :raises ValueError: if :code:`value` is not a valid positive rate.
+    """
+    result: float
+    if isinstance(value, (int, float)):
+        result = value
+    else:
+        match: typing.Optional[typing.Match[str]] = RATE_PATTERN.match(value)
+        if match is None:
+            raise ValueError(f'invalid transfer rate: {value!r}')
+        result = float(match.group('value')) * RATE_UNITS[match.group('unit').lower()]
+    if result < 1:
+        raise ValueError(f'transfer rate must be positive: {value!r}')
+    return int(result)
+
+
+def format_rate(value: float) -> str:
+    """Format a transfer rate in bytes per second for humans."""
+    unit: str
+    for unit in ('B', 'KiB', 'MiB'):
+        if value < 1024:
+            return f'{value:.1f} {unit}/s'
+        value /= 1024
+    return f'{value:.1f} GiB/s'
+
+
+class TokenBucket:
+    """
+    Token bucket, which limits the rate of transferred bytes.
+
+    A single bucket may be shared between concurrent transfers, in which case all of them share the same budget. Bursts
+    up to :code:`burst` bytes are sent at full speed, while each transfer beyond it waits until the bucket refills.
+    """
+
+    __slots__ = ('rate', 'burst', 'transferred', '__lock', '__tokens', '__updated', '__started')
+
+    def __init__(self, rate: float, burst: typing.Optional[float] = None) -> None:
+        """Initialize new :class:`~TokenBucket` instance."""
+        self.rate: typing.Final[float] = rate
+        self.burst: typing.Final[float] = rate if burst is None else burst
+        self.transferred: int = 0
+
+        self.__lock: typing.Final[threading.Lock] = threading.Lock()
+        self.__tokens: float = self.burst
+        self.__updated: float = time.monotonic()
+        self.__started: typing.Optional[float] = None
+
+    @property
+    def read_size(self) -> int:  # noqa: D401
+        """Maximum size of a single read, so transfers are paced several times per second instead of in bursts."""
+        return max(MIN_READ_SIZE, int(self.rate / 4))
+
+    @property
+    def effective_rate(self) -> float:  # noqa: D401
+        """Average number of bytes transferred per second, since the first transfer."""
+        if self.__started is None:
+            return 0.0
+        return self.transferred / max(time.monotonic() - self.__started, 1e-3)
+
+    def consume(self, amount: int) -> None:
+        """Register transfer of :code:`amount` bytes, waiting until the bucket has enough tokens for them."""
+        delay: float = self.__take(amount)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def consume_async(self, amount: int) -> None:
+        """Same as :meth:`~TokenBucket.consume`, but waits without blocking the event loop."""
+        delay: float = self.__take(amount)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def __take(self, amount: int) -> float:
+        """Take tokens for :code:`amount` bytes from the bucket, and return how long to wait until it refills."""
+        with self.__lock:
+            now: float = time.monotonic()
+            if self.__started is None:
+                self.__started = now
+            self.__tokens = min(self.burst, self.__tokens + (now - self.__updated) * self.rate) - amount
+            self.__updated = now
+            self.transferred += amount
+            return -self.__tokens / self.rate
+
+
+class ThrottledReader:
+    """Wrapper for a request body, which reads it within the budget of a :class:`~TokenBucket`."""
+
+    __slots__ = ('stream', 'bucket')
+
+    def __init__(self, stream: typing.Any, bucket: TokenBucket) -> None:
+        """Initialize new :class:`~ThrottledReader` instance."""
+        self.stream: typing.Final[typing.Any] = stream
+        self.bucket: typing.Final[TokenBucket] = bucket
+
+    @property
+    def len(self) -> int:
+        """Number of bytes left to read (used by :code:`requests` to set the :code:`Content-Length`)."""
+        return self.stream.len
+
+    def read(self, size: int = -1) -> bytes:
+        """Read next chunk of the body."""
+        result: bytes
+        if (size is None) or (size < 0):
+            result = self.stream.read()
+        else:
+            result = self.stream.read(min(size, self.bucket.read_size))
+        self.bucket.consume(len(result))
+        return result
+
+
+def throttled_chunks(chunks: typing.Iterable[bytes], bucket: typing.Optional[TokenBucket]) -> typing.Iterator[bytes]:
+    """Iterate over chunks of a response body within the budget of a :class:`~TokenBucket` (if there is one)."""
+    chunk: bytes
+    for chunk in chunks:
+        if bucket is not None:
+            bucket.consume(len(chunk))
+        yield chunk
+
+
+async def throttled_chunks_async(
+    chunks: typing.AsyncIterable[bytes],
+    bucket: typing.Optional[TokenBucket],
+) -> typing.AsyncIterator[bytes]:
+    """Same as :func:`~throttled_chunks`, but for asynchronous iterables of chunks (e.g. of :code:`httpx` responses)."""
+    chunk: bytes
+    async for chunk in chunks:
+        if bucket is not None:
+            await bucket.consume_async(len(chunk))
+        yield chunk
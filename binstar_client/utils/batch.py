@@ -0,0 +1,112 @@
+# -*- coding: utf8 -*-
+
+"""Concurrent execution of independent API calls."""
+
+from __future__ import annotations
+
+__all__ = ['Batch', 'BatchItem']
+
+import logging
+import types
+import typing
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from binstar_client import errors
+
+
+logger = logging.getLogger('binstar.batch')
+
+BATCH_WORKERS: typing.Final[int] = 4
+
+
+class BatchItem(typing.NamedTuple):
+    """Outcome of a single call queued in a :class:`~Batch`."""
+
+    description: str
+    result: typing.Any = None
+    error: typing.Optional[BaseException] = None
+
+    @property
+    def failed(self) -> bool:  # noqa: D401
+        """Call raised an error."""
+        return self.error is not None
+
+
+class Batch:
+    """
+    Queue of independent API calls, executed concurrently over a shared connection pool.
+
+    Each queued call runs to completion regardless of failures of the other ones. Outcomes are available in the order
+    calls were queued.
+
+    Use :meth:`binstar_client.Binstar.batch` to create a batch for a client.
+    """
+
+    __slots__ = ('__executor', '__items')
+
+    def __init__(self, max_workers: int = BATCH_WORKERS) -> None:
+        """Initialize new :class:`~Batch` instance."""
+        self.__executor: typing.Final[ThreadPoolExecutor] = ThreadPoolExecutor(
+            max_workers=max(max_workers, 1),
+            thread_name_prefix='binstar-batch',
+        )
+        self.__items: typing.Final[typing.List[typing.Tuple[str, Future]]] = []
+
+    def __enter__(self) -> Batch:
+        """Start a batch."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: typing.Optional[typing.Type[BaseException]],
+        exc_val: typing.Optional[BaseException],
+        exc_tb: typing.Optional[types.TracebackType],
+    ) -> None:
+        """Wait for all queued calls to finish (or cancel the pending ones, if the batch is interrupted)."""
+        self.__executor.shutdown(wait=True, cancel_futures=exc_type is not None)
+
+    def submit(self, function: typing.Callable[..., typing.Any], /, *args: typing.Any, **kwargs: typing.Any) -> Future:
+        """
+        Queue a call of an API method.
+
+        :param function: API method to call (e.g. :code:`api.remove_dist`).
+        :return: Future of the call result.
+        """
+        description: str = '{}({})'.format(
+            getattr(function, '__name__', 'call'),
+            ', '.join([*map(repr, args), *(f'{key}={value!r}' for key, value in kwargs.items())]),
+        )
+        future: Future = self.__executor.submit(function, *args, **kwargs)
+        self.__items.append((description, future))
+        return future
+
+    def items(self) -> typing.List[BatchItem]:
+        """Wait for all queued calls and collect their outcomes, in the order they were queued."""
+        result: typing.List[BatchItem] = []
+        description: str
+        future: Future
+        for description, future in self.__items:
+            error: typing.Optional[BaseException] = future.exception()
+            if error is None:
+                result.append(BatchItem(description=description, result=future.result()))
+            else:
+                result.append(BatchItem(description=description, error=error))
+        return result
+
+    def results(self) -> typing.List[typing.Any]:
+        """
+        Wait for all queued calls and collect their results, in the order they were queued.
+
+        If any call failed - all failures are logged, and a :class:`~binstar_client.errors.BinstarError` is raised.
+        The error of the first failed call is raised as is if it is the only one.
+        """
+        items: typing.List[BatchItem] = self.items()
+        failures: typing.List[BatchItem] = [item for item in items if item.failed]
+        if len(failures) == 1:
+            raise typing.cast(BaseException, failures[0].error)
+        if failures:
+            item: BatchItem
+            for item in failures:
+                logger.error('%s failed: %s', item.description, getattr(item.error, 'message', None) or item.error)
+            raise errors.BinstarError(f'{len(failures)} of {len(items)} requests failed')
+        return [item.result for item in items]
@@ -0,0 +1,85 @@
+# -*- coding: utf8 -*-
+
+"""Compression of large request bodies sent to the API."""
+
+from __future__ import annotations
+
+__all__ = ['COMPRESS_THRESHOLD', 'CompressingAdapter', 'install_compression']
+
+import gzip
+import logging
+import typing
+
+import requests
+
+
+logger = logging.getLogger('binstar.compression')
+
+COMPRESS_THRESHOLD: typing.Final[int] = 64 * 1024
+"""Minimum size of a request body (in bytes) worth compressing."""
+
+COMPRESS_LEVEL: typing.Final[int] = 6
+
+
+class CompressingAdapter(requests.adapters.BaseAdapter):
+    """
+    Transport adapter which sends large JSON request bodies with :code:`Content-Encoding: gzip`.
+
+    Servers have no way to announce they accept compressed requests, so the first request rejected with
+    :code:`415 Unsupported Media Type` is sent again uncompressed, and compression is disabled for the rest of the
+    session.
+    """
+
+    def __init__(self, adapter: requests.adapters.BaseAdapter, threshold: int = COMPRESS_THRESHOLD) -> None:
+        """Initialize new :class:`~CompressingAdapter` instance."""
+        super().__init__()
+        self.adapter: typing.Final[requests.adapters.BaseAdapter] = adapter
+        self.threshold: typing.Final[int] = threshold
+        self.enabled: bool = True
+
+    def send(self, request: requests.PreparedRequest, **kwargs: typing.Any) -> requests.Response:  # type: ignore
+        """Send a request, compressing its body if it is large enough."""
+        compressed: typing.Optional[requests.PreparedRequest] = self.compress(request)
+        if compressed is None:
+            return self.adapter.send(request, **kwargs)
+
+        response: requests.Response = self.adapter.send(compressed, **kwargs)
+        if response.status_code != 415:
+            return response
+
+        logger.debug('Server does not accept compressed requests, disabling compression')
+        self.enabled = False
+        response.close()
+        return self.adapter.send(request, **kwargs)
+
+    def compress(self, request: requests.PreparedRequest) -> typing.Optional[requests.PreparedRequest]:
+        """Build a compressed copy of a :code:`request` (or :code:`None` if it should be sent as is)."""
+        body: typing.Any = request.body
+        if (not self.enabled) or (not isinstance(body, (bytes, str))) or (len(body) < self.threshold):
+            return None
+        if 'Content-Encoding' in request.headers:
+            return None
+        if not request.headers.get('Content-Type', '').startswith('application/json'):
+            return None
+
+        if isinstance(body, str):
+            body = body.encode('utf8')
+        result: requests.PreparedRequest = request.copy()
+        result.body = gzip.compress(body, compresslevel=COMPRESS_LEVEL)
+        result.headers['Content-Encoding'] = 'gzip'
+        result.headers['Content-Length'] = str(len(result.body))
+        return result
+
+    def close(self) -> None:
+        """Close the wrapped adapter."""
+        self.adapter.close()
+
+
+def install_compression(session: requests.Session, threshold: int = COMPRESS_THRESHOLD) -> None:
+    """Wrap transport adapters of a :code:`session` with :class:`~CompressingAdapter`."""
+    prefix: str
+    for prefix in ('https://', 'http://'):
+        adapter: requests.adapters.BaseAdapter = session.get_adapter(prefix)
+        if isinstance(adapter, CompressingAdapter):
+            adapter = adapter.adapter
+        session.mount(prefix, CompressingAdapter(adapter, threshold))
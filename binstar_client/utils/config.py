@@ -1,6 +1,7 @@
 # -*- coding: utf8 -*-
 from __future__ import annotations
 
+import atexit
 import collections
 import enum
 import itertools
@@ -8,6 +9,7 @@ import logging
 import os
 import shutil
 import stat
+import threading
 import typing
 import warnings
 from urllib.parse import quote_plus
@@ -95,6 +97,10 @@ CONFIGURATION_KEYS = [
     'url',
     'verify_ssl',
     'ssl_verify',
+    'http_cache',
+    'http_cache_ttl',
+    'compress_requests',
+    'limit_rate',
 ]
 
 SEARCH_PATH = (
@@ -118,8 +124,35 @@ def recursive_update(config, update_dict):
     return config
 
 
-def get_server_api(token=None, site=None, cls=None, config=None, **kwargs):
-    """Get the anaconda server api class."""
+SHARED_CLIENTS: typing.Dict[typing.Hashable, typing.Any] = {}
+SHARED_CLIENTS_LOCK: typing.Final[threading.Lock] = threading.Lock()
+
+
+def close_shared_clients():
+    """Close all clients shared by :func:`~get_server_api` (called automatically at exit)."""
+    with SHARED_CLIENTS_LOCK:
+        clients = list(SHARED_CLIENTS.values())
+        SHARED_CLIENTS.clear()
+    for client in clients:
+        close = getattr(client, 'close', None)
+        if close is not None:
+            close()
+
+
+atexit.register(close_shared_clients)
+
+
+def get_server_api(token=None, site=None, cls=None, config=None, shared=False, **kwargs):
+    """
+    Get the anaconda server api class.
+
+    :param shared: reuse a single client (with its pool of open connections) for all calls with the same site URL,
+                   token, SSL verification, extra arguments and related configuration values in this process. Shared
+                   clients are closed at exit, or with :func:`~close_shared_clients`. They must not be mutated (e.g.
+                   by mounting adapters on their sessions, or changing their headers), as every other holder of the
+                   client would be affected - apart from :meth:`~binstar_client.Binstar.ensure_pool_size`, which keeps
+                   the behavior of the client. Shared clients refuse to :meth:`~binstar_client.Binstar.authenticate`.
+    """
     if not cls:
         from binstar_client import Binstar
 
@@ -148,7 +181,43 @@ def get_server_api(token=None, site=None, cls=None, config=None, **kwargs):
     if verify is None:
         verify = True
 
-    return cls(token, domain=url, verify=verify, **kwargs)
+    http_cache_ttl = None
+    if config.get('http_cache', False) and ('http_cache' not in kwargs):
+        from binstar_client.utils.http_cache import HTTP_CACHE_TTL
+
+        http_cache_ttl = float(config.get('http_cache_ttl', HTTP_CACHE_TTL))
+
+    if config.get('compress_requests', False) and ('compress_threshold' not in kwargs):
+        from binstar_client.utils.compression import COMPRESS_THRESHOLD
+
+        kwargs['compress_threshold'] = COMPRESS_THRESHOLD
+
+    if (kwargs.get('limit_rate', None) is None) and config.get('limit_rate', None):
+        kwargs['limit_rate'] = config['limit_rate']
+
+    key = None
+    if shared:
+        try:
+            key = (cls, url, token, verify, http_cache_ttl, tuple(sorted(kwargs.items())))
+            hash(key)
+        except TypeError:
+            logger.debug('Unable to share a client created with unhashable arguments')
+            key = None
+
+    if http_cache_ttl is not None:
+        from binstar_client.utils.http_cache import ResponseCache
+
+        kwargs['http_cache'] = ResponseCache(ttl=http_cache_ttl)
+
+    if key is None:
+        return cls(token, domain=url, verify=verify, **kwargs)
+
+    with SHARED_CLIENTS_LOCK:
+        client = SHARED_CLIENTS.get(key, None)
+        if client is None:
+            client = SHARED_CLIENTS[key] = cls(token, domain=url, verify=verify, **kwargs)
+            client.shared = True
+        return client
 
 
 def get_binstar(args=None, cls=None):
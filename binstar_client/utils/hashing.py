@@ -0,0 +1,247 @@
+# -*- coding: utf8 -*-
+
+"""Calculation of package file digests."""
+
+from __future__ import annotations
+
+__all__ = ['DEFAULT_ALGORITHMS', 'Digests', 'HashCache', 'compute_digests', 'get_digests']
+
+import atexit
+import base64
+import collections
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import typing
+import weakref
+
+from binstar_client.utils.config import dirs
+
+if typing.TYPE_CHECKING:
+    import typing_extensions
+
+
+logger = logging.getLogger('binstar.hashing')
+
+DEFAULT_ALGORITHMS: typing.Final[typing.Tuple[str, ...]] = ('md5', 'sha256')
+BUFFER_SIZE: typing.Final[int] = 1024 * 1024
+
+HASH_CACHE_FILE: typing.Final[str] = os.path.join(dirs.user_cache_dir, 'digests.json')
+HASH_CACHE_SIZE: typing.Final[int] = 2048
+
+FileKey: typing_extensions.TypeAlias = typing.Tuple[str, int, int, int]
+
+
+class Digests(typing.NamedTuple):
+    """Digests of a file content, calculated in a single pass over the file."""
+
+    size: int
+    hexdigests: typing.Mapping[str, str]
+
+    @property
+    def md5(self) -> str:  # noqa: D401
+        """Hexadecimal md5 digest of the file."""
+        return self.hexdigests['md5']
+
+    @property
+    def sha256(self) -> str:  # noqa: D401
+        """Hexadecimal sha256 digest of the file."""
+        return self.hexdigests['sha256']
+
+    def base64(self, algorithm: str) -> str:
+        """Retrieve base64 encoded digest for a particular :code:`algorithm`."""
+        return base64.b64encode(bytes.fromhex(self.hexdigests[algorithm])).decode('ascii')
+
+
+def compute_digests(
+    file: typing.BinaryIO,
+    algorithms: typing.Iterable[str] = DEFAULT_ALGORITHMS,
+    *,
+    size: typing.Optional[int] = None,
+    buffer_size: int = BUFFER_SIZE,
+) -> Digests:
+    """
+    Calculate multiple digests of a :code:`file` content in a single read.
+
+    Content is read from the current position of the :code:`file` into a single reusable buffer, which is fed to all
+    hash objects. After digests are calculated - :code:`file` is rewound to its original position.
+
+    :param file: Binary file to calculate digests for.
+    :param algorithms: Names of :mod:`hashlib` algorithms to use (e.g. :code:`md5`, :code:`sha256`, :code:`blake2b`).
+    :param size: Maximum number of bytes to read. Read till the end of the file if not set.
+    :param buffer_size: Size of a single read.
+    """
+    hashers: typing.Dict[str, typing.Any] = {algorithm: hashlib.new(algorithm) for algorithm in algorithms}
+    buffer: memoryview = memoryview(bytearray(buffer_size))
+
+    start: int = file.tell()
+    remaining: typing.Optional[int] = size
+    total: int = 0
+    while (remaining is None) or (remaining > 0):
+        target: memoryview = buffer if (remaining is None) or (remaining >= buffer_size) else buffer[:remaining]
+        count: typing.Optional[int] = file.readinto(target)  # type: ignore[attr-defined]
+        if not count:
+            break
+
+        chunk: memoryview = target[:count]
+        hasher: typing.Any
+        for hasher in hashers.values():
+            hasher.update(chunk)
+
+        total += count
+        if remaining is not None:
+            remaining -= count
+
+    file.seek(start)
+    return Digests(size=total, hexdigests={algorithm: hasher.hexdigest() for algorithm, hasher in hashers.items()})
+
+
+class HashCache:
+    """
+    Persistent cache of file digests.
+
+    Records are keyed by file identity: its real path, size, modification time and inode. Any change to the file makes
+    its previous record unreachable, so there is no need to check the content itself. The least recently used records
+    are evicted once there are more than :code:`max_entries` of them.
+
+    New records are kept in memory, and written to disk at once with :meth:`~HashCache.flush` (called on exit from the
+    :code:`with` block, and at the latest when the interpreter exits).
+    """
+
+    __slots__ = ('path', 'max_entries', '__lock', '__records', '__dirty', '__weakref__')
+
+    def __init__(self, path: typing.Optional[str] = None, max_entries: int = HASH_CACHE_SIZE) -> None:
+        """Initialize new :class:`~HashCache` instance."""
+        self.path: typing.Final[str] = path or HASH_CACHE_FILE
+        self.max_entries: typing.Final[int] = max_entries
+
+        self.__lock: typing.Final[threading.Lock] = threading.Lock()
+        self.__records: typing.Optional[typing.OrderedDict[FileKey, Digests]] = None
+        self.__dirty: bool = False
+        _CACHES.add(self)
+
+    def __enter__(self) -> typing_extensions.Self:
+        """Start a batch of updates, which are written to disk at the end of it."""
+        return self
+
+    def __exit__(self, *args: typing.Any) -> None:
+        """Write records collected during the batch to disk."""
+        self.flush()
+
+    @staticmethod
+    def key_for(file: typing.BinaryIO) -> typing.Optional[FileKey]:
+        """Build a cache key for an open :code:`file`, if its identity can be determined."""
+        name: typing.Any = getattr(file, 'name', None)
+        if not isinstance(name, str):
+            return None
+        try:
+            stat: os.stat_result = os.fstat(file.fileno())
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            return None
+        return os.path.realpath(name), stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+    def get(self, key: FileKey, algorithms: typing.Iterable[str] = DEFAULT_ALGORITHMS) -> typing.Optional[Digests]:
+        """Retrieve cached digests for a file, if all of the :code:`algorithms` are available."""
+        with self.__lock:
+            records: typing.OrderedDict[FileKey, Digests] = self._records()
+            result: typing.Optional[Digests] = records.get(key, None)
+            if (result is None) or (not set(algorithms).issubset(result.hexdigests)):
+                return None
+            records.move_to_end(key)
+            return result
+
+    def put(self, key: FileKey, digests: Digests) -> None:
+        """Store digests of a file (see :meth:`~HashCache.flush` to persist them)."""
+        with self.__lock:
+            records: typing.OrderedDict[FileKey, Digests] = self._records()
+            previous: typing.Optional[Digests] = records.pop(key, None)
+            if previous is not None:
+                digests = Digests(size=digests.size, hexdigests={**previous.hexdigests, **digests.hexdigests})
+            records[key] = digests
+            while len(records) > self.max_entries:
+                records.popitem(last=False)
+            self.__dirty = True
+
+    def flush(self) -> None:
+        """Write records to disk, if any of them were stored since the last flush."""
+        with self.__lock:
+            if self.__dirty and (self.__records is not None):
+                self._save(self.__records)
+                self.__dirty = False
+
+    def _records(self) -> typing.OrderedDict[FileKey, Digests]:
+        """Retrieve cached records, loading them from disk on the first access."""
+        if self.__records is None:
+            self.__records = collections.OrderedDict()
+            try:
+                stream: typing.TextIO
+                with open(self.path, 'rt', encoding='utf8') as stream:
+                    item: typing.Mapping[str, typing.Any]
+                    for item in json.load(stream).get('entries', []):
+                        key: FileKey = (item['path'], item['size'], item['mtime_ns'], item['inode'])
+                        self.__records[key] = Digests(size=item['size'], hexdigests=item['digests'])
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, TypeError, KeyError, AttributeError) as error:
+                logger.debug('Ignoring unreadable hash cache %s: %s', self.path, error)
+        return self.__records
+
+    def _save(self, records: typing.OrderedDict[FileKey, Digests]) -> None:
+        """Atomically write :code:`records` to disk."""
+        content: typing.Dict[str, typing.Any] = {
+            'entries': [
+                {'path': path, 'size': size, 'mtime_ns': mtime_ns, 'inode': inode, 'digests': dict(value.hexdigests)}
+                for (path, size, mtime_ns, inode), value in records.items()
+            ],
+        }
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path: str = f'{self.path}.{os.getpid()}~'
+            stream: typing.TextIO
+            with open(temp_path, 'wt', encoding='utf8') as stream:
+                json.dump(content, stream)
+            os.replace(temp_path, self.path)
+        except OSError as error:
+            logger.debug('Unable to write hash cache %s: %s', self.path, error)
+
+
+_CACHES: typing.Final[weakref.WeakSet[HashCache]] = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all() -> None:
+    """Persist records of all caches which are still in use when the interpreter exits."""
+    cache: HashCache
+    for cache in list(_CACHES):
+        cache.flush()
+
+
+def get_digests(
+    file: typing.BinaryIO,
+    algorithms: typing.Iterable[str] = DEFAULT_ALGORITHMS,
+    *,
+    size: typing.Optional[int] = None,
+    cache: typing.Optional[HashCache] = None,
+) -> Digests:
+    """
+    Same as :func:`~compute_digests`, but consults a :code:`cache` before reading the :code:`file`.
+
+    Cache is used only for digests of the whole file.
+    """
+    algorithms = tuple(algorithms)
+    key: typing.Optional[FileKey] = None
+    if (cache is not None) and (size is None) and (file.tell() == 0):
+        key = cache.key_for(file)
+
+    result: typing.Optional[Digests]
+    if (key is not None) and ((result := cache.get(key, algorithms)) is not None):  # type: ignore[union-attr]
+        logger.debug('Using cached digests of %s', key[0])
+        return result
+
+    result = compute_digests(file, algorithms, size=size)
+    if key is not None:
+        cache.put(key, result)  # type: ignore[union-attr]
+    return result
@@ -0,0 +1,199 @@
+# -*- coding: utf8 -*-
+
+"""Disk cache of responses from read-only API endpoints."""
+
+from __future__ import annotations
+
+__all__ = ['CachedResponse', 'ResponseCache']
+
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+import typing
+
+from binstar_client.utils import json_codec
+from binstar_client.utils.config import dirs
+
+
+logger = logging.getLogger('binstar.http_cache')
+
+HTTP_CACHE_DIR: typing.Final[str] = os.path.join(dirs.user_cache_dir, 'http')
+HTTP_CACHE_TTL: typing.Final[float] = 60.0
+HTTP_CACHE_SIZE: typing.Final[int] = 32 * 1024 * 1024
+HTTP_CACHE_LOW_WATER: typing.Final[float] = 0.75
+"""Share of the maximum size to shrink a full cache to, so it is not scanned again on the next store."""
+
+
+class CachedResponse(typing.NamedTuple):
+    """Content of a response stored in the cache, with validators to revalidate it with."""
+
+    url: str
+    content: typing.Any
+    stored: float
+    etag: typing.Optional[str] = None
+    last_modified: typing.Optional[str] = None
+
+    def is_fresh(self, ttl: float) -> bool:
+        """Check if response may be used without revalidating it with the server."""
+        return time.time() - self.stored < ttl
+
+    @property
+    def validators(self) -> typing.Dict[str, str]:  # noqa: D401
+        """Conditional request headers to revalidate the response with."""
+        result: typing.Dict[str, str] = {}
+        if self.etag:
+            result['If-None-Match'] = self.etag
+        if self.last_modified:
+            result['If-Modified-Since'] = self.last_modified
+        return result
+
+
+class ResponseCache:
+    """
+    Disk cache of JSON responses, revalidated with conditional requests.
+
+    Responses are stored in a separate directory for each identity (value of the :code:`Authorization` header), so
+    private content fetched with one token is never returned for another one, or for anonymous requests.
+
+    Responses younger than :code:`ttl` seconds are used without contacting the server. Older ones are revalidated with
+    :code:`If-None-Match`/:code:`If-Modified-Since`, and used again if the server replies with :code:`304`. Least
+    recently validated responses are evicted once total size of the cache exceeds :code:`max_size` bytes.
+
+    Total size is measured by scanning the cache on the first store, and tracked in memory after that, so the cache is
+    scanned again only once it might be full (other processes may add to it in the meantime, so it is not exact).
+    """
+
+    __slots__ = ('path', 'ttl', 'max_size', '__lock', '__size')
+
+    def __init__(
+        self,
+        path: typing.Optional[str] = None,
+        *,
+        ttl: float = HTTP_CACHE_TTL,
+        max_size: int = HTTP_CACHE_SIZE,
+    ) -> None:
+        """Initialize new :class:`~ResponseCache` instance."""
+        self.path: typing.Final[str] = path or HTTP_CACHE_DIR
+        self.ttl: typing.Final[float] = ttl
+        self.max_size: typing.Final[int] = max_size
+
+        self.__lock: typing.Final[threading.Lock] = threading.Lock()
+        self.__size: typing.Optional[int] = None
+
+    def get(self, url: str, scope: typing.Optional[str]) -> typing.Optional[CachedResponse]:
+        """Retrieve a stored response for a :code:`url`, requested by a :code:`scope` identity."""
+        path: str = self._entry_path(url, scope)
+        try:
+            stream: typing.BinaryIO
+            with open(path, 'rb') as stream:
+                result: CachedResponse = CachedResponse(**json_codec.loads(stream.read()))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as error:
+            logger.debug('Ignoring unreadable cached response %s: %s', path, error)
+            return None
+        if result.url != url:
+            return None
+        return result
+
+    def put(
+        self,
+        url: str,
+        scope: typing.Optional[str],
+        content: typing.Any,
+        headers: typing.Mapping[str, str],
+    ) -> None:
+        """Store a response to a :code:`url`, requested by a :code:`scope` identity."""
+        if 'no-store' in headers.get('Cache-Control', ''):
+            return
+        growth: int = self._write(
+            self._entry_path(url, scope),
+            CachedResponse(
+                url=url,
+                content=content,
+                stored=time.time(),
+                etag=headers.get('ETag', None),
+                last_modified=headers.get('Last-Modified', None),
+            ),
+        )
+        with self.__lock:
+            if self.__size is not None:
+                self.__size += growth
+                if self.__size <= self.max_size:
+                    return
+            self.__size = self._evict()
+
+    def refresh(self, entry: CachedResponse, scope: typing.Optional[str]) -> None:
+        """Mark a stored response as fresh again, after the server confirmed it has not changed."""
+        self._write(self._entry_path(entry.url, scope), entry._replace(stored=time.time()))
+
+    def clear(self, scope: typing.Optional[str]) -> None:
+        """Remove all responses stored for a :code:`scope` identity."""
+        shutil.rmtree(self._scope_path(scope), ignore_errors=True)
+
+    def _scope_path(self, scope: typing.Optional[str]) -> str:
+        """Build path to the directory of responses for a :code:`scope` identity."""
+        return os.path.join(self.path, hashlib.sha256((scope or '').encode('utf8')).hexdigest()[:32])
+
+    def _entry_path(self, url: str, scope: typing.Optional[str]) -> str:
+        """Build path to the file of a single cached response."""
+        return os.path.join(self._scope_path(scope), f"{hashlib.sha256(url.encode('utf8')).hexdigest()}.json")
+
+    def _write(self, path: str, entry: CachedResponse) -> int:
+        """
+        Write a single cached response to a file.
+
+        :return: number of bytes the cache grew by
+        """
+        try:
+            os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+            temp_path: str = f'{path}.{os.getpid()}.{threading.get_ident()}~'
+            content: bytes = json_codec.dumps(entry._asdict())
+            stream: typing.BinaryIO
+            with open(temp_path, 'wb') as stream:
+                stream.write(content)
+            previous: int = 0
+            try:
+                previous = os.path.getsize(path)
+            except OSError:
+                pass
+            os.replace(temp_path, path)
+        except (OSError, TypeError, ValueError) as error:
+            logger.debug('Unable to cache response in %s: %s', path, error)
+            return 0
+        return len(content) - previous
+
+    def _evict(self) -> int:
+        """
+        Remove least recently validated responses, if the cache does not fit into :attr:`~ResponseCache.max_size`.
+
+        :return: total size of the remaining responses
+        """
+        entries: typing.List[typing.Tuple[float, int, str]] = []
+        root: str
+        files: typing.List[str]
+        for root, _, files in os.walk(self.path):
+            name: str
+            for name in files:
+                path: str = os.path.join(root, name)
+                try:
+                    stat: os.stat_result = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total: int = sum(size for _, size, _ in entries)
+        if total <= self.max_size:
+            return total
+        entries.sort()
+        while entries and (total > self.max_size * HTTP_CACHE_LOW_WATER):
+            _, size, path = entries.pop(0)
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        return total
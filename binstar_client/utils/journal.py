@@ -0,0 +1,217 @@
+# -*- coding: utf8 -*-
+
+"""Journal of upload progress, used to resume interrupted batch uploads."""
+
+from __future__ import annotations
+
+__all__ = ['JournalKey', 'UploadJournal', 'UploadState']
+
+import contextlib
+import enum
+import json
+import logging
+import os
+import threading
+import typing
+
+from binstar_client.utils.config import dirs
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+if typing.TYPE_CHECKING:
+    import typing_extensions
+
+
+logger = logging.getLogger('binstar.journal')
+
+JOURNAL_FILE: typing.Final[str] = os.path.join(dirs.user_cache_dir, 'uploads.jsonl')
+
+FORGOTTEN: typing.Final[str] = 'forgotten'
+"""Key of tombstone lines, which remove previous records of a file from the journal."""
+
+JournalKey: typing_extensions.TypeAlias = typing.Tuple[str, str, int, int]
+JournalRecord: typing_extensions.TypeAlias = typing.Dict[str, typing.Any]
+
+
+class UploadState(str, enum.Enum):
+    """Durable steps of a single file upload."""
+
+    INSPECTED = 'inspected'
+    STAGED = 'staged'
+    TRANSFERRED = 'transferred'
+    COMMITTED = 'committed'
+
+
+class UploadJournal:
+    """
+    Append-only log of upload steps completed for each file.
+
+    Each line of the journal is a JSON object with the complete state of a single file upload, so the last line written
+    for a file is enough to continue its upload. Files are identified by the upload destination, their real path, size
+    and modification time - any change to the file makes previous records of it unreachable.
+
+    The journal is shared by all processes, so every change of it is made under an exclusive lock of the
+    :code:`<journal>.lock` file. Finished uploads are forgotten by appending tombstone lines, while the journal is
+    compacted once there are more outdated lines than live records (and removed once there are no live records left).
+    Records may contain presigned storage credentials, so the journal is readable only by its owner.
+    """
+
+    __slots__ = ('path', '__lock', '__records')
+
+    def __init__(self, path: typing.Optional[str] = None) -> None:
+        """Initialize new :class:`~UploadJournal` instance."""
+        self.path: typing.Final[str] = path or JOURNAL_FILE
+
+        self.__lock: typing.Final[threading.Lock] = threading.Lock()
+        self.__records: typing.Optional[typing.Dict[JournalKey, JournalRecord]] = None
+
+    def __len__(self) -> int:
+        """Number of files with unfinished uploads in the journal."""
+        with self.__lock:
+            return len(self._records())
+
+    @staticmethod
+    def key_for(filename: str, destination: str) -> JournalKey:
+        """Build a journal key for a file uploaded to a :code:`destination`."""
+        stat: os.stat_result = os.stat(filename)
+        return destination, os.path.realpath(filename), stat.st_size, stat.st_mtime_ns
+
+    def get(self, key: JournalKey) -> typing.Optional[JournalRecord]:
+        """Retrieve the latest record of a file upload."""
+        with self.__lock:
+            return self._records().get(key, None)
+
+    def record(self, key: JournalKey, state: UploadState, **details: typing.Any) -> None:
+        """
+        Record a completed upload step.
+
+        :code:`details` are merged with the ones recorded for previous steps of the same file.
+        """
+        with self.__lock:
+            records: typing.Dict[JournalKey, JournalRecord] = self._records()
+            record: JournalRecord = {**records.get(key, {}), **details, 'state': state.value}
+            records[key] = record
+            try:
+                with self._locked():
+                    self._append([self._dump(key, record)])
+            except OSError as error:
+                logger.debug('Unable to write upload journal %s: %s', self.path, error)
+
+    def forget(self, keys: typing.Iterable[JournalKey]) -> None:
+        """
+        Remove records of finished uploads from the journal.
+
+        Journal is read again before the change, so records appended by other processes in the meantime are kept.
+        """
+        with self.__lock:
+            try:
+                with self._locked():
+                    lines: int
+                    self.__records, lines = self._load()
+                    forgotten: typing.List[str] = []
+                    key: JournalKey
+                    for key in keys:
+                        if self.__records.pop(key, None) is not None:
+                            forgotten.append(self._dump(key, {FORGOTTEN: True}))
+                    if not forgotten:
+                        return
+                    if not self.__records:
+                        os.remove(self.path)
+                    elif lines + len(forgotten) > 2 * len(self.__records):
+                        self._rewrite()
+                    else:
+                        self._append(forgotten)
+            except OSError as error:
+                logger.debug('Unable to write upload journal %s: %s', self.path, error)
+
+    @contextlib.contextmanager
+    def _locked(self) -> typing.Iterator[None]:
+        """Hold an exclusive lock of the journal, shared with other processes."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        descriptor: int = os.open(f'{self.path}.lock', os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.name == 'nt':
+                msvcrt.locking(descriptor, msvcrt.LK_LOCK, 1)
+            else:
+                fcntl.flock(descriptor, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if os.name == 'nt':
+                    msvcrt.locking(descriptor, msvcrt.LK_UNLCK, 1)
+                else:
+                    fcntl.flock(descriptor, fcntl.LOCK_UN)
+        finally:
+            os.close(descriptor)
+
+    def _append(self, lines: typing.Iterable[str]) -> None:
+        """Append lines to the journal, creating it readable only by its owner."""
+        descriptor: int = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        stream: typing.TextIO
+        with open(descriptor, 'at', encoding='utf8') as stream:
+            stream.write(''.join(lines))
+            stream.flush()
+            os.fsync(stream.fileno())
+
+    def _rewrite(self) -> None:
+        """Replace the journal with the live records only."""
+        temp_path: str = f'{self.path}.{os.getpid()}.tmp'
+        descriptor: int = os.open(temp_path, os.O_WRONLY | os.O_TRUNC | os.O_CREAT, 0o600)
+        stream: typing.TextIO
+        with open(descriptor, 'wt', encoding='utf8') as stream:
+            stream.write(''.join(self._dump(key, record) for key, record in (self.__records or {}).items()))
+            stream.flush()
+            os.fsync(stream.fileno())
+        os.replace(temp_path, self.path)
+
+    @staticmethod
+    def _dump(key: JournalKey, record: JournalRecord) -> str:
+        """Serialize a single journal line."""
+        destination, path, size, mtime_ns = key
+        content: JournalRecord = {'destination': destination, 'path': path, 'size': size, 'mtime_ns': mtime_ns}
+        return json.dumps({**content, **record}) + '\n'
+
+    def _records(self) -> typing.Dict[JournalKey, JournalRecord]:
+        """Retrieve journal records, loading them from disk on the first access."""
+        if self.__records is None:
+            self.__records, _ = self._load()
+        return self.__records
+
+    def _load(self) -> typing.Tuple[typing.Dict[JournalKey, JournalRecord], int]:
+        """
+        Read live records from the journal.
+
+        :return: records, and the number of lines they were read from
+        """
+        records: typing.Dict[JournalKey, JournalRecord] = {}
+        lines: int = 0
+        try:
+            stream: typing.TextIO
+            with open(self.path, 'rt', encoding='utf8') as stream:
+                line: str
+                for line in stream:
+                    lines += 1
+                    try:
+                        item: JournalRecord = json.loads(line)
+                        key: JournalKey = (
+                            item.pop('destination'),
+                            item.pop('path'),
+                            item.pop('size'),
+                            item.pop('mtime_ns'),
+                        )
+                        if item.get(FORGOTTEN, False):
+                            records.pop(key, None)
+                            continue
+                        UploadState(item['state'])
+                    except (ValueError, TypeError, KeyError, AttributeError):
+                        logger.debug('Ignoring malformed upload journal line: %r', line)
+                        continue
+                    records[key] = item
+        except FileNotFoundError:
+            pass
+        except OSError as error:
+            logger.debug('Ignoring unreadable upload journal %s: %s', self.path, error)
+        return records, lines
@@ -0,0 +1,64 @@
+# -*- coding: utf8 -*-
+
+"""
+JSON codec for API payloads.
+
+Uses the fastest available backend: :code:`orjson` or :code:`msgspec` if either is installed, with the standard
+:mod:`json` module as a fallback.
+"""
+
+from __future__ import annotations
+
+__all__ = ['BACKEND', 'dumps', 'loads']
+
+import json
+import typing
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover
+    msgspec = None
+
+
+def _select_backend() -> str:
+    """Detect the name of the backend to use."""
+    if orjson is not None:
+        return 'orjson'
+    if msgspec is not None:
+        return 'msgspec'
+    return 'json'
+
+
+BACKEND: typing.Final[str] = _select_backend()
+"""Name of the backend used to encode and decode JSON."""
+
+
+def loads(content: typing.Union[bytes, bytearray, memoryview, str]) -> typing.Any:
+    """
+    Decode JSON document.
+
+    :param content: Raw document (usually :code:`response.content`, which does not have to be decoded to text first).
+    :raises ValueError: if :code:`content` is not a valid JSON document.
+    """
+    if BACKEND == 'orjson':
+        return orjson.loads(content)
+    if BACKEND == 'msgspec':
+        try:
+            return msgspec.json.decode(content)
+        except msgspec.DecodeError as error:
+            raise ValueError(str(error)) from error
+    return json.loads(content)
+
+
+def dumps(content: typing.Any) -> bytes:
+    """Encode :code:`content` into a compact UTF-8 JSON document."""
+    if BACKEND == 'orjson':
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    if BACKEND == 'msgspec':
+        return msgspec.json.encode(content)
+    return json.dumps(content, separators=(',', ':'), ensure_ascii=False).encode('utf8')
@@ -4,16 +4,131 @@ import typing
 
 import requests
 from requests_toolbelt import MultipartEncoder, MultipartEncoderMonitor
+from urllib3.util.retry import Retry
+
+from binstar_client.utils.bandwidth import ThrottledReader, TokenBucket
 
 if typing.TYPE_CHECKING:
     import tqdm
 
 
+TRANSFER_POOL_SIZE: typing.Final[int] = 10
+
+MIN_CHUNK_SIZE: typing.Final[int] = 1024 * 1024
+MAX_CHUNK_SIZE: typing.Final[int] = 16 * 1024 * 1024
+
+
+def transfer_chunk_size(size: typing.Optional[int]) -> int:
+    """
+    Choose size of chunks to transfer content of :code:`size` bytes in.
+
+    Chunks grow with the content, from :data:`~MIN_CHUNK_SIZE` up to :data:`~MAX_CHUNK_SIZE`, so large files are sent
+    in a few hundred iterations instead of hundreds of thousands of small reads and socket writes.
+    """
+    result: int = MIN_CHUNK_SIZE
+    while (result < MAX_CHUNK_SIZE) and (result * 64 < (size or 0)):
+        result *= 2
+    return result
+
+
+class ChunkedReader:
+    """
+    Wrapper for a request body, which reads it in chunks of at least :code:`chunk_size` bytes.
+
+    Connections read request bodies in small fixed-size blocks (8-16 KiB), regardless of their size.
+    """
+
+    __slots__ = ('stream', 'chunk_size')
+
+    def __init__(self, stream: typing.Any, chunk_size: int) -> None:
+        """Initialize new :class:`~ChunkedReader` instance."""
+        self.stream: typing.Final[typing.Any] = stream
+        self.chunk_size: typing.Final[int] = chunk_size
+
+    @property
+    def len(self) -> int:
+        """Number of bytes left to read (used by :code:`requests` to set the :code:`Content-Length`)."""
+        return self.stream.len
+
+    def read(self, size: int = -1) -> bytes:
+        """Read next chunk of the body."""
+        if (size is None) or (size < 0):
+            return self.stream.read()
+        return self.stream.read(max(size, self.chunk_size))
+
+
+def create_transfer_session(
+    pool_size: int = TRANSFER_POOL_SIZE,
+    keep_alive: bool = True,
+    retries: int = 0,
+) -> requests.Session:
+    """
+    Create a session for transfers of files to and from the storage.
+
+    Session is separate from the one used to access the API, so none of the API headers (including authorization) are
+    sent to the storage, while connections to the storage are pooled and reused between transfers.
+
+    :param pool_size: Maximum number of connections to keep open for each storage host.
+    :param keep_alive: Reuse connections between transfers.
+    :param retries: Number of times to retry a connection to the storage, before any content is sent.
+    """
+    session: requests.Session = requests.Session()
+    adapter: requests.adapters.HTTPAdapter = requests.adapters.HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(total=retries, connect=retries, read=0, redirect=0, status=0),
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+    return session
+
+
+def multipart_form(
+    data: typing.MutableMapping,
+    files: typing.Optional[typing.Mapping[str, tuple]] = None,
+    progress_bar: typing.Optional['tqdm.tqdm'] = None,
+    chunk_size: typing.Optional[int] = None,
+    bandwidth: typing.Optional[TokenBucket] = None,
+) -> typing.Tuple[ChunkedReader, str]:
+    """
+    Encode one or more files as a multipart form, which is read in chunks.
+
+    Reads of the form are blocking (including the waits for the :code:`bandwidth`), so asynchronous clients read it in
+    a worker thread.
+
+    See :func:`~multipart_files_upload` for the description of arguments.
+
+    :return: Body of the form (with the :code:`len` of it), and its content type.
+    """
+    if files:
+        data.update(files)
+
+    encoder = MultipartEncoder(data)
+    if chunk_size is None:
+        chunk_size = transfer_chunk_size(encoder.len)
+
+    if progress_bar:
+        encoder = MultipartEncoderMonitor(
+            encoder, lambda monitor: progress_bar.update(monitor.bytes_read - progress_bar.n)
+        )
+
+    body: typing.Any = encoder
+    if bandwidth is not None:
+        body = ThrottledReader(encoder, bandwidth)
+
+    return ChunkedReader(body, chunk_size), encoder.content_type
+
+
 def multipart_files_upload(
     url: str,
     data: typing.MutableMapping,
     files: typing.Optional[typing.Mapping[str, tuple]] = None,
     progress_bar: typing.Optional['tqdm.tqdm'] = None,
+    session: typing.Optional[requests.Session] = None,
+    chunk_size: typing.Optional[int] = None,
+    bandwidth: typing.Optional[TokenBucket] = None,
     **request_kwargs: typing.Any,
 ) -> requests.Response:
     """
@@ -23,23 +138,19 @@ def multipart_files_upload(
     :param data: Dictionary, list of tuples, bytes, or file-like object to send in as a multipart form.
     :param files: Dictionary of ``{'name': file-tuple}`` for multipart encoding upload.
     :param progress_bar: An optional progress bar to display the upload progress.
+    :param session: An optional session (see :func:`~create_transfer_session`) to reuse connections from.
+    :param chunk_size: Size of chunks to send the form in (chosen from the size of the form by default).
+    :param bandwidth: An optional bandwidth limit to send the form within (may be shared with other transfers).
     :param request_kwargs: Any additional keyword arguments to pass to the `requests.post()` function.
 
     """
-    if files:
-        data.update(files)
-
-    encoder = MultipartEncoder(data)
-
-    if progress_bar:
-        encoder = MultipartEncoderMonitor(
-            encoder, lambda monitor: progress_bar.update(monitor.bytes_read - progress_bar.n)
-        )
+    body, content_type = multipart_form(data, files, progress_bar, chunk_size=chunk_size, bandwidth=bandwidth)
 
-    return requests.post(
+    post: typing.Callable[..., requests.Response] = requests.post if session is None else session.post
+    return post(
         url,
-        data=encoder,
-        headers={'Content-Type': encoder.content_type},
+        data=body,
+        headers={'Content-Type': content_type},
         timeout=request_kwargs.pop('timeout', 10 * 60 * 60),
         **request_kwargs,
     )
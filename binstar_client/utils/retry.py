@@ -0,0 +1,219 @@
+# -*- coding: utf8 -*-
+
+"""Retries of network requests failed due to transient errors."""
+
+from __future__ import annotations
+
+__all__ = ['RetryPolicy', 'RetryStatistics', 'parse_retry_after']
+
+import asyncio
+import email.utils
+import logging
+import random
+import sys
+import threading
+import time
+import typing
+
+import requests
+
+from binstar_client import errors
+
+
+logger = logging.getLogger('binstar.retry')
+
+ResultT = typing.TypeVar('ResultT')
+
+RETRY_STATUS_CODES: typing.Final[typing.FrozenSet[int]] = frozenset({408, 429, 500, 502, 503, 504})
+"""Status codes of responses which might succeed if the same request is sent again."""
+
+UNPROCESSED_STATUS_CODES: typing.Final[typing.FrozenSet[int]] = frozenset({429, 503})
+"""Status codes of responses for requests which were rejected before being processed."""
+
+
+def parse_retry_after(value: typing.Optional[str]) -> typing.Optional[float]:
+    """Convert value of a :code:`Retry-After` header to a number of seconds to wait."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(email.utils.parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class RetryStatistics:
+    """Summary of retries performed by a client."""
+
+    __slots__ = ('retries', 'elapsed', '__lock')
+
+    def __init__(self) -> None:
+        """Initialize new :class:`~RetryStatistics` instance."""
+        self.retries: int = 0
+        self.elapsed: float = 0.0
+
+        self.__lock: typing.Final[threading.Lock] = threading.Lock()
+
+    def add(self, elapsed: float) -> None:
+        """Register a single retry, and time spent on the failed attempt and the wait after it."""
+        with self.__lock:
+            self.retries += 1
+            self.elapsed += elapsed
+
+
+class RetryPolicy(typing.NamedTuple):
+    """
+    Policy of retrying requests failed due to transient errors.
+
+    Delay before each next attempt grows exponentially from :code:`backoff_factor`, up to the :code:`max_backoff`, and
+    is randomly reduced by up to a :code:`jitter` share of it, so parallel clients do not retry in lockstep. Delay
+    requested by the server with a :code:`Retry-After` header takes precedence, if it is longer. Requests are not
+    retried at all if the server asks to wait for longer than :code:`max_retry_after`.
+    """
+
+    max_attempts: int = 4
+    backoff_factor: float = 0.5
+    max_backoff: float = 30.0
+    jitter: float = 1.0
+    max_retry_after: float = 300.0
+
+    def delay(self, attempt: int, retry_after: typing.Optional[float] = None) -> float:
+        """Calculate delay in seconds after a failed :code:`attempt` (starting from 1)."""
+        result: float = min(self.max_backoff, self.backoff_factor * (2 ** (attempt - 1)))
+        result *= random.uniform(1.0 - self.jitter, 1.0)  # nosec
+        if retry_after is not None:
+            result = max(result, min(retry_after, self.max_retry_after))
+        return result
+
+    def waits_for(self, retry_after: typing.Optional[float]) -> bool:
+        """Check if it is worth waiting for the delay requested with a :code:`Retry-After` header before a retry."""
+        return (retry_after is None) or (retry_after <= self.max_retry_after)
+
+    @staticmethod
+    def is_transient(error: BaseException, *, idempotent: bool = True) -> bool:
+        """
+        Check if request might succeed if it is sent again after an :code:`error`.
+
+        Requests that are not :code:`idempotent` are retried only if it is known they were not processed by the server.
+        """
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        if isinstance(
+            error,
+            (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.ChunkedEncodingError,
+                requests.exceptions.Timeout,
+            ),
+        ):
+            return idempotent
+
+        # httpx is optional: if it is not imported yet, the error can not come from it
+        httpx: typing.Any = sys.modules.get('httpx')
+        if (httpx is not None) and isinstance(error, httpx.ConnectTimeout):
+            return True
+        if (httpx is not None) and isinstance(error, httpx.TransportError):
+            return idempotent
+
+        if isinstance(error, errors.BinstarError) and (len(error.args) >= 2):
+            return error.args[1] in (RETRY_STATUS_CODES if idempotent else UNPROCESSED_STATUS_CODES)
+        return False
+
+    def call(
+        self,
+        function: typing.Callable[[], ResultT],
+        *,
+        description: str,
+        idempotent: bool = True,
+        before_retry: typing.Optional[typing.Callable[[], typing.Any]] = None,
+        statistics: typing.Optional[RetryStatistics] = None,
+    ) -> ResultT:
+        """
+        Call a :code:`function`, retrying it after transient errors.
+
+        :param function: Function which sends a request.
+        :param description: Short description of the request for log messages.
+        :param idempotent: Whether it is safe to repeat a request which might have been processed by the server.
+        :param before_retry: Function to call before each retry (e.g. to rewind a file being sent).
+        :param statistics: Container to register performed retries in.
+        """
+        attempt: int = 1
+        while True:
+            started: float = time.monotonic()
+            try:
+                return function()
+            except (requests.exceptions.RequestException, errors.BinstarError) as error:
+                delay: typing.Optional[float] = self._retry_delay(error, attempt, description, idempotent)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                if before_retry is not None:
+                    before_retry()
+                if statistics is not None:
+                    statistics.add(time.monotonic() - started)
+                attempt += 1
+
+    async def call_async(
+        self,
+        function: typing.Callable[[], typing.Awaitable[ResultT]],
+        *,
+        description: str,
+        idempotent: bool = True,
+        before_retry: typing.Optional[typing.Callable[[], typing.Any]] = None,
+        statistics: typing.Optional[RetryStatistics] = None,
+    ) -> ResultT:
+        """
+        Await a coroutine :code:`function`, retrying it after transient errors.
+
+        Same as :meth:`~RetryPolicy.call`, but waits between attempts without blocking the event loop.
+        """
+        import httpx
+
+        attempt: int = 1
+        while True:
+            started: float = time.monotonic()
+            try:
+                return await function()
+            except (httpx.TransportError, errors.BinstarError) as error:
+                delay: typing.Optional[float] = self._retry_delay(error, attempt, description, idempotent)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                if before_retry is not None:
+                    before_retry()
+                if statistics is not None:
+                    statistics.add(time.monotonic() - started)
+                attempt += 1
+
+    def _retry_delay(
+        self,
+        error: BaseException,
+        attempt: int,
+        description: str,
+        idempotent: bool,
+    ) -> typing.Optional[float]:
+        """Calculate delay before retrying after a failed :code:`attempt`, or :code:`None` if it should not be."""
+        if (attempt >= self.max_attempts) or (not self.is_transient(error, idempotent=idempotent)):
+            return None
+        retry_after: typing.Optional[float] = getattr(error, 'retry_after', None)
+        if not self.waits_for(retry_after):
+            logger.warning(
+                '%s failed (%s), and the server asks to retry in %.1f seconds, which is too long to wait for',
+                description,
+                getattr(error, 'message', None) or error,
+                retry_after,
+            )
+            return None
+        delay: float = self.delay(attempt, retry_after)
+        logger.warning(
+            '%s failed (%s), retrying in %.1f seconds (attempt %d of %d)',
+            description,
+            getattr(error, 'message', None) or error,
+            delay,
+            attempt + 1,
+            self.max_attempts,
+        )
+        return delay
@@ -0,0 +1,216 @@
+# -*- coding: utf8 -*-
+
+"""Adaptive limits of concurrent requests to servers which throttle clients."""
+
+from __future__ import annotations
+
+__all__ = ['AdaptiveLimiter', 'ThrottlingAdapter', 'install_throttling']
+
+import asyncio
+import logging
+import threading
+import time
+import typing
+
+import requests
+
+from binstar_client.utils.retry import UNPROCESSED_STATUS_CODES, RetryPolicy, parse_retry_after
+
+
+logger = logging.getLogger('binstar.throttle')
+
+THROTTLE_RETRIES: typing.Final[int] = 3
+"""Number of times to resend a request rejected by a throttling server."""
+
+THROTTLE_POLL_INTERVAL: typing.Final[float] = 0.05
+"""Time between checks for a free slot, while coroutines wait for one (see :meth:`~AdaptiveLimiter.acquire_async`)."""
+
+IDEMPOTENT_METHODS: typing.Final[typing.FrozenSet[str]] = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+"""Methods of requests which are safe to send again, even if the server might have processed them already."""
+
+
+def _throttling_delay(
+    status_code: int,
+    headers: typing.Mapping[str, str],
+    attempt: int,
+) -> typing.Optional[float]:
+    """Time to pause requests for after a response, or :code:`None` if the server did not throttle the request."""
+    if status_code not in UNPROCESSED_STATUS_CODES:
+        return None
+    return RetryPolicy().delay(attempt, parse_retry_after(headers.get('Retry-After')))
+
+
+def _may_resend(method: typing.Optional[str], status_code: int, headers: typing.Mapping[str, str]) -> bool:
+    """
+    Check if a throttled request may be sent again.
+
+    :code:`429 Too Many Requests` is always sent before processing a request. :code:`503 Service Unavailable` might
+    come from a proxy after the request reached the server, so non-idempotent requests are sent again only if the
+    server asks to retry with :code:`Retry-After`. Otherwise, they are left to
+    :class:`~binstar_client.utils.retry.RetryPolicy`.
+    """
+    retry_after: typing.Optional[float] = parse_retry_after(headers.get('Retry-After'))
+    if (status_code == 503) and (retry_after is None) and ((method or '').upper() not in IDEMPOTENT_METHODS):
+        return False
+    return RetryPolicy().waits_for(retry_after)
+
+
+class AdaptiveLimiter:
+    """
+    Limit of concurrent requests, adjusted with additive-increase/multiplicative-decrease (AIMD) control.
+
+    Each successful request raises the limit by :code:`1 / limit` (so by one after a full window of requests), while
+    each throttled one halves it. Throttled requests also pause sending of all new requests until the delay requested
+    with :code:`Retry-After` (or an exponential backoff) passes.
+    """
+
+    __slots__ = (
+        'min_limit',
+        'max_limit',
+        'limit',
+        'requests',
+        'throttled',
+        'started',
+        '__condition',
+        '__in_flight',
+        '__resume_at',
+    )
+
+    def __init__(self, limit: float = 8.0, *, min_limit: float = 1.0, max_limit: float = 64.0) -> None:
+        """Initialize new :class:`~AdaptiveLimiter` instance."""
+        self.min_limit: typing.Final[float] = min_limit
+        self.max_limit: typing.Final[float] = max_limit
+        self.limit: float = min(max(limit, min_limit), max_limit)
+        self.requests: int = 0
+        self.throttled: int = 0
+        self.started: float = time.monotonic()
+
+        self.__condition: typing.Final[threading.Condition] = threading.Condition()
+        self.__in_flight: int = 0
+        self.__resume_at: float = 0.0
+
+    @property
+    def rate(self) -> float:  # noqa: D401
+        """Average number of requests sent per second."""
+        return self.requests / max(time.monotonic() - self.started, 1e-3)
+
+    def acquire(self) -> None:
+        """Wait until a new request may be sent."""
+        with self.__condition:
+            delay: typing.Optional[float]
+            while (delay := self.__admit()) is not None:
+                self.__condition.wait(delay or None)
+
+    async def acquire_async(self) -> None:
+        """
+        Same as :meth:`~AdaptiveLimiter.acquire`, but waits without blocking the event loop.
+
+        Coroutines are not notified about finished requests, so they check for a free slot every
+        :data:`~THROTTLE_POLL_INTERVAL` seconds.
+        """
+        while True:
+            with self.__condition:
+                delay: typing.Optional[float] = self.__admit()
+            if delay is None:
+                return
+            await asyncio.sleep(delay or THROTTLE_POLL_INTERVAL)
+
+    def __admit(self) -> typing.Optional[float]:
+        """
+        Take a slot for a new request, if sending is not paused and the limit is not reached.
+
+        :return: :code:`None` if the slot is taken, or time until sending resumes (:code:`0.0` if the limit is reached)
+        """
+        delay: float = self.__resume_at - time.monotonic()
+        if delay > 0:
+            return delay
+        if self.__in_flight >= int(self.limit):
+            return 0.0
+        self.__in_flight += 1
+        self.requests += 1
+        return None
+
+    def release(self, *, throttled: typing.Optional[bool] = None, delay: float = 0.0) -> None:
+        """
+        Register a finished request.
+
+        :param throttled: Whether the server throttled the request (:code:`None` if there was no response at all).
+        :param delay: Time to pause all requests for, if the request was throttled.
+        """
+        with self.__condition:
+            self.__in_flight -= 1
+            if throttled:
+                self.throttled += 1
+                self.limit = max(self.min_limit, self.limit / 2)
+                self.__resume_at = max(self.__resume_at, time.monotonic() + delay)
+            elif throttled is not None:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self.__condition.notify_all()
+
+
+class ThrottlingAdapter(requests.adapters.BaseAdapter):
+    """
+    Transport adapter which sends requests within an :class:`~AdaptiveLimiter`.
+
+    Requests rejected with :code:`429 Too Many Requests` or :code:`503 Service Unavailable` are sent again after the
+    requested delay (see :func:`~_may_resend`), unless their body is a stream which can not be replayed.
+    """
+
+    def __init__(
+        self,
+        adapter: requests.adapters.BaseAdapter,
+        limiter: AdaptiveLimiter,
+        max_retries: int = THROTTLE_RETRIES,
+    ) -> None:
+        """Initialize new :class:`~ThrottlingAdapter` instance."""
+        super().__init__()
+        self.adapter: typing.Final[requests.adapters.BaseAdapter] = adapter
+        self.limiter: typing.Final[AdaptiveLimiter] = limiter
+        self.max_retries: typing.Final[int] = max_retries
+
+    def send(self, request: requests.PreparedRequest, **kwargs: typing.Any) -> requests.Response:  # type: ignore
+        """Send a request, waiting for the limiter and resending it if it is throttled."""
+        attempt: int = 1
+        while True:
+            self.limiter.acquire()
+            response: typing.Optional[requests.Response] = None
+            delay: typing.Optional[float] = None
+            try:
+                response = self.adapter.send(request, **kwargs)
+            finally:
+                throttled: typing.Optional[bool] = None
+                if response is not None:
+                    delay = _throttling_delay(response.status_code, response.headers, attempt)
+                    throttled = delay is not None
+                self.limiter.release(throttled=throttled, delay=delay or 0.0)
+
+            if (
+                (delay is None)
+                or (attempt > self.max_retries)
+                or hasattr(request.body, 'read')
+                or not _may_resend(request.method, response.status_code, response.headers)
+            ):
+                return response
+            logger.debug(
+                'Request %s %s throttled with %s, retrying in %.1f seconds',
+                request.method,
+                request.url,
+                response.status_code,
+                delay,
+            )
+            response.close()
+            attempt += 1
+
+    def close(self) -> None:
+        """Close the wrapped adapter."""
+        self.adapter.close()
+
+
+def install_throttling(session: requests.Session, limiter: AdaptiveLimiter) -> None:
+    """Wrap transport adapters of a :code:`session` with :class:`~ThrottlingAdapter`, sharing a single limiter."""
+    prefix: str
+    for prefix in ('https://', 'http://'):
+        adapter: requests.adapters.BaseAdapter = session.get_adapter(prefix)
+        if isinstance(adapter, ThrottlingAdapter):
+            adapter = adapter.adapter
+        session.mount(prefix, ThrottlingAdapter(adapter, limiter))
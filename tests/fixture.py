@@ -8,6 +8,9 @@ __all__ = ['main', 'AnyIO', 'CLITestCase']
 
 import io
 import logging
+import os
+import shutil
+import tempfile
 import typing
 import unittest.mock
 
@@ -42,6 +45,16 @@ class CLITestCase(unittest.TestCase):
         self.setup_logging_patch = unittest.mock.patch('binstar_client.utils.logging_utils.setup_logging')
         self.setup_logging_patch.start()
 
+        self.cache_dir = tempfile.mkdtemp()
+        self.hash_cache_patch = unittest.mock.patch(
+            'binstar_client.utils.hashing.HASH_CACHE_FILE', os.path.join(self.cache_dir, 'digests.json')
+        )
+        self.hash_cache_patch.start()
+        self.journal_patch = unittest.mock.patch(
+            'binstar_client.utils.journal.JOURNAL_FILE', os.path.join(self.cache_dir, 'uploads.jsonl')
+        )
+        self.journal_patch.start()
+
         self.logger = logger = logging.getLogger('binstar')
         logger.setLevel(logging.INFO)
         self.stream = AnyIO()
@@ -54,5 +67,8 @@ class CLITestCase(unittest.TestCase):
         self.get_config_patch.stop()
         self.load_token_patch.stop()
         self.store_token_patch.stop()
+        self.hash_cache_patch.stop()
+        self.journal_patch.stop()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
 
         self.logger.removeHandler(self.hndlr)
@@ -0,0 +1,217 @@
+# -*- coding: utf8 -*-
+"""Tests for the asynchronous API client."""
+
+from __future__ import annotations
+
+__all__ = ()
+
+import asyncio
+import io
+import json
+import threading
+import unittest.mock
+
+import httpx
+import pytest
+
+from binstar_client import errors
+from binstar_client.aio import AsyncBinstar
+from binstar_client.utils.http_cache import ResponseCache
+from binstar_client.utils.retry import RetryPolicy
+
+
+def run(client: AsyncBinstar, function):
+    async def wrapper():
+        async with client:
+            return await function()
+
+    return asyncio.run(wrapper())
+
+
+def test_metadata_calls_are_concurrent():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={'name': request.url.path.rsplit('/', 1)[-1]})
+
+    client = AsyncBinstar(token='abc', domain='api.example.com/', transport=httpx.MockTransport(handler))
+    names = [f'package-{index}' for index in range(50)]
+
+    result = run(client, lambda: asyncio.gather(*(client.package('eggs', name) for name in names)))
+
+    assert [item['name'] for item in result] == names
+    assert str(requests[0].url).startswith('https://api.example.com/package/eggs/')
+    assert requests[0].headers['Authorization'] == 'token abc'
+    assert 'x-binstar-api-version' in requests[0].headers
+
+
+def test_errors_match_sync_client():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(404, json={'error': 'package eggs/spam does not exist'}, headers={'Retry-After': '3'})
+
+    client = AsyncBinstar(domain='https://api.example.com', transport=httpx.MockTransport(handler))
+
+    with pytest.raises(errors.NotFound) as error:
+        run(client, lambda: client.package('eggs', 'spam'))
+    assert error.value.args == ('package eggs/spam does not exist', 404)
+    assert error.value.retry_after == 3.0
+
+
+def test_notice_errors():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(400, json={'code': 'invalid', 'message': 'Bad level', 'requestId': 'r1'})
+
+    client = AsyncBinstar(domain='https://api.example.com', transport=httpx.MockTransport(handler))
+
+    with pytest.raises(errors.BinstarError, match=r'invalid: Bad level \(requestId: r1\)'):
+        run(client, lambda: client.create_notice('eggs', 'message', 'info', None))
+
+
+def test_upload():
+    requests = []
+    stage_failed = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path.startswith('/stage/'):
+            if not stage_failed:
+                stage_failed.append(True)
+                return httpx.Response(502)
+            return httpx.Response(
+                200, json={'dist_id': 'dist', 'post_url': 'https://s3.example.com/', 'form_data': {'key': 'value'}}
+            )
+        if request.url.host == 's3.example.com':
+            assert b'package content' in request.read()
+            return httpx.Response(201)
+        if request.url.path.startswith('/commit/'):
+            assert json.loads(request.content) == {'dist_id': 'dist'}
+            return httpx.Response(200, json={'basename': 'eggs-1.0.tar.bz2'})
+        return httpx.Response(404)
+
+    client = AsyncBinstar(
+        token='abc',
+        domain='https://api.example.com',
+        retry_policy=RetryPolicy(max_attempts=2),
+        transport=httpx.MockTransport(handler),
+    )
+
+    with unittest.mock.patch('asyncio.sleep', new=unittest.mock.AsyncMock()) as sleep:
+        result = run(
+            client,
+            lambda: client.upload('eggs', 'eggs', '1.0', 'eggs-1.0.tar.bz2', io.BytesIO(b'package content'), 'conda'),
+        )
+
+    assert result == {'basename': 'eggs-1.0.tar.bz2'}
+    assert sleep.await_count == client.retry_statistics.retries == 1
+    assert [request.url.host for request in requests] == [
+        'api.example.com',
+        'api.example.com',
+        's3.example.com',
+        'api.example.com',
+    ]
+    assert 'Authorization' not in requests[2].headers
+    assert 'x-binstar-api-version' not in requests[2].headers
+
+
+def test_throttled_requests_are_resent():
+    statuses = [429, 200]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(statuses.pop(0), json={'name': 'spam'})
+
+    client = AsyncBinstar(domain='https://api.example.com', transport=httpx.MockTransport(handler))
+
+    with unittest.mock.patch('random.uniform', return_value=0.0):
+        assert run(client, lambda: client.package('eggs', 'spam')) == {'name': 'spam'}
+    assert statuses == []
+    assert client.throttle.throttled == 1
+
+
+def test_cached_responses(tmp_path):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.method == 'PUT':
+            return httpx.Response(204)
+        if request.headers.get('If-None-Match') == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json={'name': 'spam'}, headers={'ETag': '"v1"'})
+
+    cache = ResponseCache(str(tmp_path), ttl=60)
+    client = AsyncBinstar(
+        token='abc', domain='https://api.example.com', http_cache=cache, transport=httpx.MockTransport(handler)
+    )
+
+    async def scenario():
+        first = await client.package('eggs', 'spam')
+        second = await client.package('eggs', 'spam')
+        await client.add_group_member('eggs', 'owners', 'ham')
+        third = await client.package('eggs', 'spam')
+        return first, second, third
+
+    assert run(client, scenario) == ({'name': 'spam'},) * 3
+    assert [request.method for request in requests] == ['GET', 'PUT', 'GET']
+    assert 'If-None-Match' not in requests[2].headers
+
+    client = AsyncBinstar(
+        token='abc',
+        domain='https://api.example.com',
+        http_cache=ResponseCache(str(tmp_path), ttl=0),
+        transport=httpx.MockTransport(handler),
+    )
+    assert run(client, lambda: client.package('eggs', 'spam')) == {'name': 'spam'}
+    assert requests[-1].headers['If-None-Match'] == '"v1"'
+
+
+def test_download_range():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.host == 'api.example.com':
+            return httpx.Response(302, headers={'Location': 'https://s3.example.com/eggs-1.0.tar.bz2'})
+        return httpx.Response(206, content=b'content')
+
+    client = AsyncBinstar(token='abc', domain='https://api.example.com', transport=httpx.MockTransport(handler))
+
+    async def download():
+        response = await client.download('eggs', 'eggs', '1.0', 'eggs-1.0.tar.bz2', offset=8)
+        try:
+            return response.status_code, await response.aread()
+        finally:
+            await response.aclose()
+
+    assert run(client, download) == (206, b'content')
+    assert requests[1].headers['Range'] == 'bytes=8-'
+    assert 'Authorization' not in requests[1].headers
+
+
+def test_upload_reads_file_in_threads(tmp_path):
+    loop_thread = threading.get_ident()
+    read_threads = set()
+
+    class File(io.FileIO):
+        def read(self, *args):
+            read_threads.add(threading.get_ident())
+            return super().read(*args)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.startswith('/stage/'):
+            return httpx.Response(200, json={'dist_id': 'dist', 'post_url': 'https://s3.example.com/', 'form_data': {}})
+        if request.url.host == 's3.example.com':
+            assert b'package content' in request.read()
+            return httpx.Response(201)
+        return httpx.Response(200, json={'basename': 'eggs-1.0.tar.bz2'})
+
+    client = AsyncBinstar(domain='https://api.example.com', limit_rate='1G', transport=httpx.MockTransport(handler))
+    (tmp_path / 'eggs-1.0.tar.bz2').write_bytes(b'package content')
+    with File(str(tmp_path / 'eggs-1.0.tar.bz2')) as file:
+        run(
+            client,
+            lambda: client.upload('eggs', 'eggs', '1.0', 'eggs-1.0.tar.bz2', file, 'conda', md5='md5', sha256='sha'),
+        )
+
+    assert read_threads and (loop_thread not in read_threads)
+    assert client.bandwidth.transferred > len(b'package content')
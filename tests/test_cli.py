@@ -376,6 +376,13 @@ class CLICase:
         CLICase("--no-progress", dict(no_progress=True), id="no-progress"),
         CLICase("-u username", dict(user="username"), id="username-short"),
         CLICase("--user username", dict(user="username"), id="username-long"),
+        CLICase("-j 4", dict(jobs=4), id="jobs-short"),
+        CLICase("--jobs 4", dict(jobs=4), id="jobs-long"),
+        CLICase("--retries 0", dict(retries=0), id="retries"),
+        CLICase("--limit-rate 50M", dict(limit_rate=50 * 1024 * 1024), id="limit-rate"),
+        CLICase("--no-hash-cache", dict(hash_cache=False), id="no-hash-cache"),
+        CLICase("--resume", dict(resume=True), id="resume"),
+        CLICase("--manifest uploads.jsonl", dict(manifest="uploads.jsonl"), id="manifest"),
         CLICase("--keep-basename", dict(keep_basename=True), id="keep-basename-long"),
         CLICase("-p my_package", dict(package="my_package"), id="package-short"),
         CLICase("--package my_package", dict(package="my_package"), id="package-long"),
@@ -402,6 +409,7 @@ class CLICase:
         CLICase("--fail", dict(mode="fail"), id="fail-long"),
         CLICase("--force", dict(mode="force"), id="force-long"),
         CLICase("--skip-existing", dict(mode="skip"), id="skip-existing-long"),
+        CLICase("--skip-identical", dict(mode="skip-identical"), id="skip-identical-long"),
         CLICase("-m", dict(force_metadata_update=True), id="force-metadata-update-short"),
         CLICase("--force-metadata-update", dict(force_metadata_update=True), id="force-metadata-update-long"),  # noqa: E501
         CLICase("--token TOKEN", dict(token="TOKEN"), id="token", prefix=True),  # nosec
@@ -421,12 +429,18 @@ def test_upload_arg_parsing(case: CLICase, cli_mocker: InvokerFactory) -> None:
         token=None,
         site=None,
         files=[[filename]],
+        manifest=None,
         disable_ssl_warnings=False,
         show_traceback=False,
         log_level=20,
         labels=[],
         no_progress=False,
         user=None,
+        jobs=1,
+        retries=3,
+        limit_rate=None,
+        hash_cache=True,
+        resume=False,
         keep_basename=False,
         package=None,
         version=None,
@@ -1072,6 +1086,10 @@ def test_package_mutually_exclusive_options_required(mocker):
         CLICase("--package-type conda", dict(package_type=["conda"]), id="package-type-long"),
         CLICase("-t conda", dict(package_type=["conda"]), id="package-type-short"),
         CLICase("-t conda -t pypi", dict(package_type=["conda", "pypi"]), id="package-type-multiple"),
+        CLICase("--jobs 4", dict(jobs=4), id="jobs-long"),
+        CLICase("-j 4", dict(jobs=4), id="jobs-short"),
+        CLICase("--update", dict(update=True), id="update"),
+        CLICase("--limit-rate 512k", dict(limit_rate=512 * 1024), id="limit-rate"),
         CLICase("--token TOKEN", dict(token="TOKEN"), id="token", prefix=True),  # nosec
         CLICase("--site my-site.com", dict(site="my-site.com"), id="site", prefix=True),
     ],
@@ -1084,8 +1102,11 @@ def test_download_arg_parsing(case: CLICase, cli_mocker: InvokerFactory) -> None
         site=None,
         handle="handle",
         force=False,
+        update=False,
         output=".",
         package_type=None,
+        jobs=1,
+        limit_rate=None,
     )
     expected = {**defaults, **case.mods}
 
@@ -1094,3 +1115,34 @@ def test_download_arg_parsing(case: CLICase, cli_mocker: InvokerFactory) -> None
     assert result.exit_code == 0, result.stdout
     mock.assert_main_called_once()
     mock.assert_main_args_contains(expected)
+
+
+@pytest.mark.parametrize(
+    "case",
+    [
+        CLICase(id="defaults"),
+        CLICase("--jobs 8", dict(jobs=8), id="jobs-long"),
+        CLICase("-j 8", dict(jobs=8), id="jobs-short"),
+        CLICase("--limit-rate 512k", dict(limit_rate=512 * 1024), id="limit-rate"),
+        CLICase("--token TOKEN", dict(token="TOKEN"), id="token", prefix=True),  # nosec
+        CLICase("--site my-site.com", dict(site="my-site.com"), id="site", prefix=True),
+    ],
+)
+def test_mirror_arg_parsing(case: CLICase, cli_mocker: InvokerFactory) -> None:
+    args = ["mirror"] + case.args + ["owner/label", "directory"]
+
+    defaults: Dict[str, Any] = dict(
+        token=None,
+        site=None,
+        handle="owner/label",
+        directory="directory",
+        jobs=4,
+        limit_rate=None,
+    )
+    expected = {**defaults, **case.mods}
+
+    mock = cli_mocker("binstar_client.commands.mirror.main")
+    result = mock.invoke(args, prefix_args=case.prefix_args)
+    assert result.exit_code == 0, result.stdout
+    mock.assert_main_called_once()
+    mock.assert_main_args_contains(expected)
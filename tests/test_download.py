@@ -0,0 +1,302 @@
+# -*- coding: utf8 -*-
+"""Tests for the download command."""
+
+from __future__ import annotations
+
+__all__ = ()
+
+import hashlib
+import http.server
+import json
+import os
+import re
+import threading
+import typing
+import unittest.mock
+
+import pytest
+import requests
+
+from binstar_client import Binstar
+from binstar_client.commands.download import Downloader
+from binstar_client.errors import BinstarError, DestinationPathExists
+from binstar_client.utils.config import PackageType
+from binstar_client.utils.retry import RetryPolicy
+from tests.urlmock import Registry
+
+
+FILES = {
+    'linux-64/spam-1.0-0.tar.bz2': b'linux content',
+    'osx-64/spam-1.0-0.tar.bz2': b'osx content',
+    'noarch/spam-1.0-0.tar.bz2': b'noarch content',
+}
+
+
+def register_package(registry, md5s=None):
+    registry.register(
+        path='/package/eggs/spam',
+        content=json.dumps(
+            {
+                'files': [
+                    {
+                        'basename': basename,
+                        'version': '1.0',
+                        'type': 'conda',
+                        'size': len(content),
+                        'md5': (md5s or {}).get(basename),
+                        'upload_time': '2024-01-01 00:00:00.000000+00:00',
+                    }
+                    for basename, content in FILES.items()
+                ],
+            },
+        ),
+    )
+    result = {}
+    for basename, content in FILES.items():
+        result[basename] = registry.register(
+            path=f'/download/eggs/spam/1.0/{basename}',
+            status=302,
+            headers={'Location': f'https://storage.example.com/{basename}'},
+        )
+        registry.register(url=f'https://storage.example.com/{basename}', content=content)
+    return result
+
+
+def list_output(path):
+    return sorted(os.path.relpath(os.path.join(root, name), path) for root, _, files in os.walk(path) for name in files)
+
+
+def test_parallel_download(tmp_path):
+    downloader = Downloader(Binstar(domain='https://api.example.com'), 'eggs', 'spam')
+
+    with Registry() as registry:
+        register_package(registry)
+        downloader.output = str(tmp_path)
+        assert downloader.download_files([PackageType.CONDA], jobs=3) == sorted(FILES)
+
+    assert list_output(str(tmp_path)) == sorted(FILES)
+    for basename, content in FILES.items():
+        assert (tmp_path / basename).read_bytes() == content
+
+
+def test_existing_files(tmp_path):
+    downloader = Downloader(Binstar(domain='https://api.example.com'), 'eggs', 'spam')
+    downloader.output = str(tmp_path)
+    (tmp_path / 'osx-64').mkdir()
+    (tmp_path / 'osx-64' / 'spam-1.0-0.tar.bz2').write_bytes(b'old content')
+
+    with Registry() as registry:
+        register_package(registry)
+        with pytest.raises(DestinationPathExists):
+            downloader.download_files([PackageType.CONDA], jobs=3)
+        assert list_output(str(tmp_path)) == ['osx-64/spam-1.0-0.tar.bz2']
+
+        downloader.download_files([PackageType.CONDA], force=True, jobs=3)
+        assert (tmp_path / 'osx-64' / 'spam-1.0-0.tar.bz2').read_bytes() == b'osx content'
+
+
+def test_update_skips_unchanged_files(tmp_path):
+    downloader = Downloader(Binstar(domain='https://api.example.com'), 'eggs', 'spam')
+    downloader.output = str(tmp_path)
+    for basename in FILES:
+        (tmp_path / basename).parent.mkdir()
+    (tmp_path / 'linux-64' / 'spam-1.0-0.tar.bz2').write_bytes(FILES['linux-64/spam-1.0-0.tar.bz2'])
+    (tmp_path / 'osx-64' / 'spam-1.0-0.tar.bz2').write_bytes(b'old content')
+    (tmp_path / 'noarch' / 'spam-1.0-0.tar.bz2').write_bytes(FILES['noarch/spam-1.0-0.tar.bz2'])
+
+    with Registry() as registry:
+        downloads = register_package(
+            registry,
+            md5s={
+                'linux-64/spam-1.0-0.tar.bz2': hashlib.md5(FILES['linux-64/spam-1.0-0.tar.bz2']).hexdigest(),
+                'osx-64/spam-1.0-0.tar.bz2': hashlib.md5(FILES['osx-64/spam-1.0-0.tar.bz2']).hexdigest(),
+            },
+        )
+        unchanged = registry.register(
+            path='/download/eggs/spam/1.0/noarch/spam-1.0-0.tar.bz2',
+            status=304,
+            expected_headers={'ETag': hashlib.md5(FILES['noarch/spam-1.0-0.tar.bz2']).hexdigest()},
+        )
+
+        assert downloader.download_files([PackageType.CONDA], jobs=3, update=True) == ['osx-64/spam-1.0-0.tar.bz2']
+        assert not downloads['linux-64/spam-1.0-0.tar.bz2'].called
+        assert unchanged.called == 1
+
+    for basename, content in FILES.items():
+        assert (tmp_path / basename).read_bytes() == content
+    assert list_output(str(tmp_path)) == sorted(FILES)
+
+
+def test_interrupted_download(tmp_path):
+    def iter_content(chunk_size):
+        yield b'partial'
+        raise requests.ConnectionError('connection dropped')
+
+    api = Binstar(domain='https://api.example.com')
+    downloader = Downloader(api, 'eggs', 'spam', retry_policy=RetryPolicy(max_attempts=1))
+    downloader.output = str(tmp_path)
+    response = unittest.mock.Mock(status_code=200, headers={'Content-Length': '100'}, iter_content=iter_content)
+
+    with unittest.mock.patch.object(api, 'download', return_value=response):
+        with pytest.raises(requests.ConnectionError):
+            downloader.download({'basename': 'noarch/spam-1.0-0.tar.bz2', 'version': '1.0', 'size': 100})
+
+    assert list_output(str(tmp_path)) == ['noarch/spam-1.0-0.tar.bz2.part']
+    assert (tmp_path / 'noarch' / 'spam-1.0-0.tar.bz2.part').read_bytes() == b'partial'
+    response.close.assert_called_once_with()
+
+
+class RangeHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Local stand-in for the API and the storage, which supports :code:`Range` requests.
+
+    The first :code:`drop_after` bytes sent are followed by a dropped connection.
+    """
+
+    content: bytes = b''
+    ranges: typing.List[typing.Optional[str]] = []
+    drop_after: typing.Optional[int] = None
+    support_ranges: bool = True
+    misaligned: bool = False
+
+    def do_GET(self):
+        if self.path.startswith('/download/'):
+            self.send_response(302)
+            self.send_header('Location', f"http://{self.headers['Host']}/storage/{self.path.rsplit('/', 1)[-1]}")
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        RangeHandler.ranges.append(self.headers.get('Range'))
+        start = 0
+        match = re.match(r'^bytes=(\d+)-$', self.headers.get('Range') or '')
+        if match and self.support_ranges:
+            start = int(match.group(1))
+            if RangeHandler.misaligned:
+                start, RangeHandler.misaligned = start // 2, False
+            if start >= len(self.content):
+                self.send_response(416)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{len(self.content) - 1}/{len(self.content)}')
+        else:
+            self.send_response(200)
+        body = self.content[start:]
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+
+        if RangeHandler.drop_after is not None:
+            body, RangeHandler.drop_after = body[: RangeHandler.drop_after], None
+            self.close_connection = True
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def range_server():
+    RangeHandler.content = bytes(range(256)) * 16384
+    RangeHandler.ranges = []
+    RangeHandler.drop_after = None
+    RangeHandler.support_ranges = True
+    RangeHandler.misaligned = False
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), RangeHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_address[1]}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def make_downloader(url, output):
+    downloader = Downloader(
+        Binstar(domain=url), 'eggs', 'spam', retry_policy=RetryPolicy(backoff_factor=0.0, max_attempts=2)
+    )
+    downloader.output = output
+    return downloader
+
+
+DIST = {'basename': 'noarch/spam-1.0-0.tar.bz2', 'version': '1.0', 'size': 256 * 16384}
+
+
+def test_resume_from_part_file(range_server, tmp_path):
+    (tmp_path / 'noarch').mkdir()
+    (tmp_path / 'noarch' / 'spam-1.0-0.tar.bz2.part').write_bytes(RangeHandler.content[:1000])
+
+    make_downloader(range_server, str(tmp_path)).download(DIST)
+
+    assert RangeHandler.ranges == ['bytes=1000-']
+    assert (tmp_path / 'noarch' / 'spam-1.0-0.tar.bz2').read_bytes() == RangeHandler.content
+    assert list_output(str(tmp_path)) == ['noarch/spam-1.0-0.tar.bz2']
+
+
+def test_resume_after_dropped_connection(range_server, tmp_path):
+    RangeHandler.drop_after = 2560 * 1024
+
+    make_downloader(range_server, str(tmp_path)).download(DIST)
+
+    # content is written in whole chunks of 1 MiB, so the last incomplete one is downloaded again
+    assert RangeHandler.ranges == [None, 'bytes=2097152-']
+    assert (tmp_path / 'noarch' / 'spam-1.0-0.tar.bz2').read_bytes() == RangeHandler.content
+
+
+def test_restart_without_range_support(range_server, tmp_path):
+    RangeHandler.support_ranges = False
+    (tmp_path / 'noarch').mkdir()
+    (tmp_path / 'noarch' / 'spam-1.0-0.tar.bz2.part').write_bytes(b'stale')
+
+    make_downloader(range_server, str(tmp_path)).download(DIST)
+
+    assert RangeHandler.ranges == ['bytes=5-']
+    assert (tmp_path / 'noarch' / 'spam-1.0-0.tar.bz2').read_bytes() == RangeHandler.content
+
+
+def test_restart_after_misaligned_range(range_server, tmp_path):
+    RangeHandler.misaligned = True
+    (tmp_path / 'noarch').mkdir()
+    (tmp_path / 'noarch' / 'spam-1.0-0.tar.bz2.part').write_bytes(RangeHandler.content[:1000])
+
+    make_downloader(range_server, str(tmp_path)).download(DIST)
+
+    assert RangeHandler.ranges == ['bytes=1000-', None]
+    assert (tmp_path / 'noarch' / 'spam-1.0-0.tar.bz2').read_bytes() == RangeHandler.content
+    assert list_output(str(tmp_path)) == ['noarch/spam-1.0-0.tar.bz2']
+
+
+def test_size_is_verified(range_server, tmp_path):
+    with pytest.raises(requests.ConnectionError):
+        make_downloader(range_server, str(tmp_path)).download({**DIST, 'size': DIST['size'] + 1})
+
+    assert not (tmp_path / 'noarch' / 'spam-1.0-0.tar.bz2').exists()
+    assert RangeHandler.ranges == [None, 'bytes=4194304-']
+
+
+def test_digests_are_verified_while_resuming(range_server, tmp_path):
+    (tmp_path / 'noarch').mkdir()
+    (tmp_path / 'noarch' / 'spam-1.0-0.tar.bz2.part').write_bytes(RangeHandler.content[:1000])
+    dist = {
+        **DIST,
+        'md5': hashlib.md5(RangeHandler.content).hexdigest(),
+        'sha256': hashlib.sha256(RangeHandler.content).hexdigest(),
+    }
+
+    make_downloader(range_server, str(tmp_path)).download(dist)
+
+    assert RangeHandler.ranges == ['bytes=1000-']
+    assert (tmp_path / 'noarch' / 'spam-1.0-0.tar.bz2').read_bytes() == RangeHandler.content
+
+
+def test_digest_mismatch(range_server, tmp_path):
+    dist = {**DIST, 'sha256': hashlib.sha256(b'other content').hexdigest()}
+
+    with pytest.raises(BinstarError, match='sha256 of the downloaded noarch/spam-1.0-0.tar.bz2 does not match'):
+        make_downloader(range_server, str(tmp_path)).download(dist)
+
+    assert RangeHandler.ranges == [None]
+    assert list_output(str(tmp_path)) == []
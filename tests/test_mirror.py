@@ -0,0 +1,149 @@
+# -*- coding: utf8 -*-
+"""Tests for the mirror command."""
+
+from __future__ import annotations
+
+__all__ = ()
+
+import hashlib
+import json
+
+import pytest
+
+from binstar_client import Binstar
+from binstar_client.commands.mirror import Mirror, parse
+from binstar_client.errors import BinstarError
+from tests.test_download import list_output
+from tests.urlmock import Registry
+
+
+FILES = {
+    'spam': {
+        'linux-64/spam-1.0-0.tar.bz2': b'linux content',
+        'osx-64/spam-1.0-0.tar.bz2': b'osx content',
+        'linux-64/spam-0.9-0.tar.bz2': b'unlabeled content',
+    },
+    'ham': {
+        'noarch/ham-2.0-py_0.conda': b'noarch content',
+    },
+}
+
+
+def make_dist(basename, content):
+    subdir, _, filename = basename.partition('/')
+    return {
+        'basename': basename,
+        'version': filename.split('-')[1],
+        'type': 'conda',
+        'size': len(content),
+        'md5': hashlib.md5(content).hexdigest(),
+        'attrs': {'subdir': subdir, 'build': filename.split('-')[2].split('.')[0], 'build_number': 0},
+    }
+
+
+def register_channel(registry, files, revisions):
+    registry.register(
+        path='/packages/eggs',
+        content=json.dumps([{'name': name, 'revision': revision} for name, revision in revisions.items()]),
+    )
+    registry.register(
+        path='/channels/eggs/dev',
+        content={
+            'files': [
+                {'full_name': 'eggs/{}/{}/{}'.format(name, make_dist(basename, content)['version'], basename)}
+                for name, contents in files.items()
+                for basename, content in contents.items()
+                if 'unlabeled' not in content.decode()
+            ],
+        },
+    )
+
+    result = {}
+    for name, contents in files.items():
+        result[name] = registry.register(
+            path=f'/package/eggs/{name}',
+            content={'files': [make_dist(basename, content) for basename, content in contents.items()]},
+        )
+        for basename, content in contents.items():
+            version = make_dist(basename, content)['version']
+            result[basename] = registry.register(
+                path=f'/download/eggs/{name}/{version}/{basename}',
+                status=302,
+                headers={'Location': f'https://storage.example.com/{basename}'},
+            )
+            registry.register(url=f'https://storage.example.com/{basename}', content=content)
+    return result
+
+
+def read_repodata(path, subdir):
+    return json.loads((path / subdir / 'repodata.json').read_bytes())
+
+
+def test_parse():
+    assert parse('eggs') == ('eggs', 'main')
+    assert parse('eggs/dev') == ('eggs', 'dev')
+    with pytest.raises(BinstarError):
+        parse('eggs/dev/spam')
+
+
+def test_mirror(tmp_path):
+    mirror = Mirror(Binstar(domain='https://api.example.com'), 'eggs', 'dev', str(tmp_path))
+
+    with Registry() as registry:
+        register_channel(registry, FILES, {'spam': 1, 'ham': 1})
+        downloaded, removed = mirror(jobs=3)
+
+    expected = ['linux-64/spam-1.0-0.tar.bz2', 'noarch/ham-2.0-py_0.conda', 'osx-64/spam-1.0-0.tar.bz2']
+    assert (downloaded, removed) == (expected, [])
+    assert list_output(str(tmp_path)) == sorted(
+        expected + ['.mirror-state.json', 'linux-64/repodata.json', 'noarch/repodata.json', 'osx-64/repodata.json']
+    )
+
+    repodata = read_repodata(tmp_path, 'linux-64')
+    assert repodata['info'] == {'subdir': 'linux-64'}
+    assert repodata['packages.conda'] == {}
+    assert repodata['packages'] == {
+        'spam-1.0-0.tar.bz2': {
+            'build': '0',
+            'build_number': 0,
+            'depends': [],
+            'name': 'spam',
+            'version': '1.0',
+            'subdir': 'linux-64',
+            'md5': hashlib.md5(b'linux content').hexdigest(),
+            'size': len(b'linux content'),
+        },
+    }
+    assert list(read_repodata(tmp_path, 'noarch')['packages.conda']) == ['ham-2.0-py_0.conda']
+
+
+def test_mirror_is_incremental(tmp_path):
+    api = Binstar(domain='https://api.example.com')
+
+    with Registry() as registry:
+        register_channel(registry, FILES, {'spam': 1, 'ham': 1})
+        Mirror(api, 'eggs', 'dev', str(tmp_path))(jobs=3)
+
+    with Registry() as registry:
+        rules = register_channel(registry, FILES, {'spam': 1, 'ham': 1})
+        assert Mirror(api, 'eggs', 'dev', str(tmp_path))(jobs=3) == ([], [])
+        assert not any(rule.called for rule in rules.values())
+
+    files = {
+        'spam': {
+            'linux-64/spam-1.0-0.tar.bz2': FILES['spam']['linux-64/spam-1.0-0.tar.bz2'],
+            'linux-64/spam-1.1-0.tar.bz2': b'new content',
+        },
+        'ham': FILES['ham'],
+    }
+    with Registry() as registry:
+        rules = register_channel(registry, files, {'spam': 2, 'ham': 1})
+        downloaded, removed = Mirror(api, 'eggs', 'dev', str(tmp_path))(jobs=3)
+        assert (downloaded, removed) == (['linux-64/spam-1.1-0.tar.bz2'], ['osx-64/spam-1.0-0.tar.bz2'])
+        assert rules['spam'].called == 1
+        assert not rules['ham'].called
+        assert not rules['linux-64/spam-1.0-0.tar.bz2'].called
+
+    assert not (tmp_path / 'osx-64' / 'spam-1.0-0.tar.bz2').exists()
+    assert read_repodata(tmp_path, 'osx-64')['packages'] == {}
+    assert sorted(read_repodata(tmp_path, 'linux-64')['packages']) == ['spam-1.0-0.tar.bz2', 'spam-1.1-0.tar.bz2']
@@ -0,0 +1,70 @@
+# -*- coding: utf8 -*-
+"""Tests for removal of packages, releases and files."""
+
+import unittest.mock
+
+from binstar_client import errors
+from tests.urlmock import urlpatch
+from tests.fixture import CLITestCase, main
+
+
+class Test(CLITestCase):
+    """Tests for removal of packages, releases and files."""
+
+    @urlpatch
+    def test_remove_multiple(self, urls):
+        package = urls.register(method='DELETE', path='/package/u1/p1', status=201)
+        release = urls.register(method='DELETE', path='/release/u1/p2/1.0', status=201)
+        dist = urls.register(method='DELETE', path='/dist/u1/p3/1.0/p3-1.0.tar.bz2', content='{}')
+
+        main(['--show-traceback', 'remove', '-f', 'u1/p1', 'u1/p2/1.0', 'u1/p3/1.0/p3-1.0.tar.bz2'])
+
+        package.assertCalled()
+        release.assertCalled()
+        dist.assertCalled()
+
+    @urlpatch
+    def test_remove_objects_of_a_package_in_order(self, urls):
+        order = []
+        dist = urls.register(
+            method='DELETE',
+            path='/dist/u1/p1/1.0/p1-1.0.tar.bz2',
+            content='{}',
+            side_effect=lambda: order.append('dist'),
+        )
+        release = urls.register(
+            method='DELETE',
+            path='/release/u1/p1/1.0',
+            status=201,
+            side_effect=lambda: order.append('release'),
+        )
+
+        with unittest.mock.patch('binstar_client.commands.remove.bool_input', return_value=True) as prompt:
+            prompt.side_effect = lambda *args: not order
+            main(['--show-traceback', 'remove', 'u1/p1/1.0/p1-1.0.tar.bz2', 'u1/p1/1.0'])
+
+        self.assertEqual(prompt.call_count, 2)
+        self.assertEqual(order, ['dist', 'release'])
+        dist.assertCalled()
+        release.assertCalled()
+
+    @urlpatch
+    def test_remove_continues_after_failure(self, urls):
+        missing = urls.register(method='DELETE', path='/package/u1/p1', status=404)
+        failed = urls.register(method='DELETE', path='/package/u1/p2', status=500)
+        removed = urls.register(method='DELETE', path='/package/u1/p3', status=201)
+
+        with self.assertRaises(errors.ServerError):
+            main(['--show-traceback', 'remove', '-f', 'u1/p1', 'u1/p2', 'u1/p3'])
+
+        missing.assertCalled()
+        failed.assertCalled()
+        removed.assertCalled()
+
+    @urlpatch
+    def test_remove_reports_all_failures(self, urls):
+        urls.register(method='DELETE', path='/package/u1/p1', status=500)
+        urls.register(method='DELETE', path='/package/u1/p2', status=403)
+
+        with self.assertRaisesRegex(errors.BinstarError, 'Unable to remove 2 of 2 objects'):
+            main(['--show-traceback', 'remove', '-f', 'u1/p1', 'u1/p2'])
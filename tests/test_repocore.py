@@ -1,5 +1,7 @@
 """Tests for the repocore client and CLI commands."""
 
+import json
+import tracemalloc
 from unittest.mock import MagicMock, PropertyMock, patch
 
 import pytest
@@ -18,6 +20,7 @@ from binstar_client.repocore.errors import (
     RepoCoreError,
     Unauthorized,
 )
+from binstar_client.utils.bandwidth import ThrottledReader, TokenBucket
 
 
 class TestPydanticModels:
@@ -206,6 +209,67 @@ class TestRepoCoreClientAPI:
         call_args = client.put.call_args
         assert call_args[1]["json"] == {"privacy": "private"}
 
+    def test_upload_file_streams_content(self, tmp_path):
+        filepath = tmp_path / "test-1.0-py39_0.conda"
+        filepath.write_bytes(b"conda package content")
+        client = _make_client()
+        bodies = []
+        client.post = MagicMock(
+            side_effect=lambda url, data, headers: bodies.append(data.read()) or _mock_response(201, {"id": "1"})
+        )
+
+        assert client.upload_file(str(filepath), "dev", "conda") == {"id": "1"}
+
+        call_args = client.post.call_args
+        assert call_args[0][0].endswith("/channels/dev/artifacts")
+        assert not isinstance(call_args[1]["data"], bytes)
+        assert call_args[1]["headers"]["Content-Type"].startswith("multipart/form-data; boundary=")
+        assert b'name="content"; filename="test-1.0-py39_0.conda"' in bodies[0]
+        assert b"conda package content" in bodies[0]
+        assert b'name="filetype"\r\n\r\nconda1' in bodies[0]
+        assert b'name="size"\r\n\r\n21\r\n' in bodies[0]
+
+    def test_upload_file_within_bandwidth_limit(self, tmp_path):
+        filepath = tmp_path / "test-1.0-py39_0.conda"
+        filepath.write_bytes(b"x" * 64 * 1024)
+        client = _make_client()
+        client.bandwidth = TokenBucket(1024 * 1024)
+
+        def consume(url, data, headers):
+            assert isinstance(data, ThrottledReader)
+            while data.read(8192):
+                pass
+            return _mock_response(201, {"id": "1"})
+
+        client.post = MagicMock(side_effect=consume)
+
+        client.upload_file(str(filepath), "dev", "conda")
+        assert client.bandwidth.transferred > 64 * 1024
+
+    def test_upload_file_memory_does_not_grow_with_size(self, tmp_path):
+        client = _make_client()
+
+        def consume(url, data, headers):
+            while data.read(64 * 1024):
+                pass
+            return _mock_response(201, {"id": "1"})
+
+        client.post = MagicMock(side_effect=consume)
+
+        peaks = []
+        for size in (1024 * 1024, 64 * 1024 * 1024):
+            filepath = tmp_path / f"test-{size}-py39_0.conda"
+            with open(filepath, "wb") as stream:
+                stream.truncate(size)
+            tracemalloc.start()
+            try:
+                client.upload_file(str(filepath), "dev", "conda")
+                peaks.append(tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+
+        assert peaks[1] < peaks[0] + 4 * 1024 * 1024
+
     def test_manage_response_401_raises_unauthorized(self):
         client = _make_client()
         mock_response = _mock_response(401, {"error": {"code": "auth_required", "message": "Invalid token"}})
@@ -1265,11 +1329,7 @@ def _make_client():
 def _mock_response(status_code, json_data):
     response = MagicMock()
     response.status_code = status_code
-    response.content = b""
-    if json_data is not None:
-        response.json.return_value = json_data
-    else:
-        response.json.side_effect = ValueError("No JSON")
+    response.content = b"" if json_data is None else json.dumps(json_data).encode("utf8")
     return response
 
 
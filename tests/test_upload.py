@@ -1,14 +1,24 @@
 # -*- coding: utf8 -*-
 """Tests for package upload commands."""
 
+import argparse
+import hashlib
 import json
+import os
+import shutil
+import tempfile
+import threading
+import time
 import unittest.mock
 
 import pytest
 
 from binstar_client import errors
+from binstar_client.commands.upload import PackageMeta, Uploader
+from binstar_client.utils import detect, multipart_uploader
+from binstar_client.utils.config import PackageType
 from tests.fixture import CLITestCase, main
-from tests.urlmock import urlpatch
+from tests.urlmock import Registry, urlpatch
 from tests.utils.utils import data_dir
 
 
@@ -22,7 +32,6 @@ class Test(CLITestCase):
         registry.register(method='GET', path='/package/eggs/foo', content='{}', status=404)
         registry.register(method='POST', path='/package/eggs/foo', content={'package_types': ['conda']}, status=200)
         registry.register(method='GET', path='/release/eggs/foo/0.1', content='{}')
-        registry.register(method='GET', path='/dist/eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2', status=404, content='{}')
         staging_response = registry.register(
             method='POST',
             path='/stage/eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2',
@@ -39,7 +48,7 @@ class Test(CLITestCase):
     def test_upload_bad_package_no_register(self, registry):
         registry.register(method='HEAD', path='/', status=200)
         registry.register(method='GET', path='/user', content='{"login": "eggs"}')
-        registry.register(method='GET', path='/dist/eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2', status=404)
+        registry.register(method='GET', path='/release/eggs/foo/0.1', status=404)
         registry.register(method='GET', path='/package/eggs/foo', status=404)
 
         with self.assertRaises(errors.UserError):
@@ -51,7 +60,6 @@ class Test(CLITestCase):
     def test_upload_conda(self, registry):
         registry.register(method='HEAD', path='/', status=200)
         registry.register(method='GET', path='/user', content='{"login": "eggs"}')
-        registry.register(method='GET', path='/dist/eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2', status=404)
         registry.register(method='GET', path='/package/eggs/foo', content={'package_types': ['conda']})
         registry.register(method='GET', path='/release/eggs/foo/0.1', content='{}')
         staging_response = registry.register(
@@ -66,12 +74,12 @@ class Test(CLITestCase):
 
         registry.assertAllCalled()
         self.assertIsNotNone(json.loads(staging_response.req.body).get('sha256'))
+        self.assertFalse(os.path.exists(os.path.join(self.cache_dir, 'uploads.jsonl')))
 
     @urlpatch
     def test_upload_conda_v2(self, registry):
         registry.register(method='HEAD', path='/', status=200)
         registry.register(method='GET', path='/user', content='{"login": "eggs"}')
-        registry.register(method='GET', path='/dist/eggs/mock/2.0.0/osx-64/mock-2.0.0-py37_1000.conda', status=404)
         registry.register(method='GET', path='/package/eggs/mock', content={'package_types': ['conda']})
         registry.register(method='GET', path='/release/eggs/mock/2.0.0', content='{}')
         staging_response = registry.register(
@@ -96,7 +104,6 @@ class Test(CLITestCase):
     def test_upload_use_pkg_metadata(self, registry):
         registry.register(method='HEAD', path='/', status=200)
         registry.register(method='GET', path='/user', content='{"login": "eggs"}')
-        registry.register(method='GET', path='/dist/eggs/mock/2.0.0/osx-64/mock-2.0.0-py37_1000.conda', status=404)
         registry.register(method='GET', path='/package/eggs/mock', content={'package_types': ['conda']})
         registry.register(method='GET', path='/release/eggs/mock/2.0.0', content='{}')
         registry.register(method='PATCH', path='/release/eggs/mock/2.0.0', content='{}')
@@ -118,11 +125,423 @@ class Test(CLITestCase):
         registry.assertAllCalled()
         self.assertIsNotNone(json.loads(staging_response.req.body).get('sha256'))
 
+    @urlpatch
+    def test_upload_transfer_session(self, registry):
+        registry.register(method='HEAD', path='/', status=200)
+        registry.register(method='GET', path='/user', content='{"login": "eggs"}')
+        registry.register(method='GET', path='/packages/eggs', content='[]')
+        registry.register(method='GET', path='/package/eggs/foo', content={'package_types': ['conda']})
+        registry.register(method='GET', path='/package/eggs/mock', content={'package_types': ['conda']})
+        registry.register(method='GET', path='/release/eggs/foo/0.1', content='{}')
+        registry.register(method='GET', path='/release/eggs/mock/2.0.0', content='{}')
+        for path in ('eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2', 'eggs/mock/2.0.0/osx-64/mock-2.0.0-py37_1000.conda'):
+            registry.register(
+                method='POST',
+                path=f'/stage/{path}',
+                content={'post_url': 'http://s3url.com/s3_url', 'form_data': {}, 'dist_id': 'dist_id'},
+            )
+            registry.register(method='POST', path=f'/commit/{path}', status=200, content={})
+        s3_response = registry.register(method='POST', path='/s3_url', status=201)
+
+        with unittest.mock.patch(
+            'binstar_client.create_transfer_session', wraps=multipart_uploader.create_transfer_session
+        ) as create_mock:
+            main(['--show-traceback', 'upload', data_dir('foo-0.1-0.tar.bz2'), data_dir('mock-2.0.0-py37_1000.conda')])
+
+        registry.assertAllCalled()
+        create_mock.assert_called_once()
+        self.assertEqual(s3_response.called, 2)
+        for _, request in s3_response._resps:
+            self.assertNotIn('Authorization', request.headers)
+            self.assertNotIn('x-binstar-api-version', request.headers)
+
+    @urlpatch
+    def test_upload_parallel(self, registry):
+        registry.register(method='HEAD', path='/', status=200)
+        registry.register(method='GET', path='/user', content='{"login": "eggs"}')
+        registry.register(method='GET', path='/packages/eggs', content='[]')
+        registry.register(method='GET', path='/package/eggs/foo', content={'package_types': ['conda']})
+        registry.register(method='GET', path='/package/eggs/mock', content={'package_types': ['conda']})
+        registry.register(method='GET', path='/release/eggs/foo/0.1', content='{}')
+        registry.register(method='GET', path='/release/eggs/mock/2.0.0', content='{}')
+        registry.register(
+            method='POST',
+            path='/stage/eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2',
+            content={'post_url': 'http://s3url.com/s3_url', 'form_data': {}, 'dist_id': 'dist_id'},
+        )
+        registry.register(
+            method='POST',
+            path='/stage/eggs/mock/2.0.0/osx-64/mock-2.0.0-py37_1000.conda',
+            content={'post_url': 'http://s3url.com/s3_url', 'form_data': {}, 'dist_id': 'dist_id'},
+        )
+        registry.register(method='POST', path='/s3_url', status=201)
+        registry.register(method='POST', path='/commit/eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2', status=200, content={})
+        registry.register(
+            method='POST',
+            path='/commit/eggs/mock/2.0.0/osx-64/mock-2.0.0-py37_1000.conda',
+            status=200,
+            content={},
+        )
+
+        main(
+            [
+                '--show-traceback',
+                'upload',
+                '--jobs',
+                '2',
+                data_dir('foo-0.1-0.tar.bz2'),
+                data_dir('mock-2.0.0-py37_1000.conda'),
+            ]
+        )
+
+        registry.assertAllCalled()
+
+    def test_upload_parallel_throttled(self):
+        with Registry(transport=True) as registry:
+            registry.register(method='HEAD', path='/', status=200)
+            registry.register(method='GET', path='/user', content='{"login": "eggs"}')
+            registry.register(method='GET', path='/packages/eggs', content='[]')
+            registry.register(method='GET', path='/package/eggs/foo', content={'package_types': ['conda']})
+            registry.register(method='GET', path='/package/eggs/mock', content={'package_types': ['conda']})
+            registry.register(method='GET', path='/release/eggs/foo/0.1', content='{}')
+            registry.register(method='GET', path='/release/eggs/mock/2.0.0', content='{}')
+            for path in ('eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2', 'eggs/mock/2.0.0/osx-64/mock-2.0.0-py37_1000.conda'):
+                registry.register(
+                    method='POST',
+                    path=f'/stage/{path}',
+                    content={'post_url': 'http://s3url.com/s3_url', 'form_data': {}, 'dist_id': 'dist_id'},
+                )
+                registry.register(method='POST', path=f'/commit/{path}', status=200, content={})
+            registry.register(method='POST', path='/s3_url', status=201)
+            throttled = registry.register(
+                method='POST',
+                path='/stage/eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2',
+                status=429,
+                headers={'Retry-After': '0'},
+                side_effect=lambda: registry.unregister(throttled),
+            )
+
+            with unittest.mock.patch('random.uniform', return_value=0.0):
+                main(
+                    [
+                        '--show-traceback',
+                        'upload',
+                        '--jobs',
+                        '2',
+                        data_dir('foo-0.1-0.tar.bz2'),
+                        data_dir('mock-2.0.0-py37_1000.conda'),
+                    ]
+                )
+
+            registry.assertAllCalled()
+        self.assertIn('Server throttled 1 of', self.stream.getvalue())
+
+    @urlpatch
+    def test_upload_prefetch_packages(self, registry):
+        registry.register(method='HEAD', path='/', status=200)
+        registry.register(method='GET', path='/user', content='{"login": "eggs"}')
+        registry.register(
+            method='GET',
+            path='/packages/eggs',
+            content=json.dumps([{'name': 'foo', 'package_types': ['conda'], 'versions': ['0.0.1']}]),
+        )
+        registry.register(method='POST', path='/release/eggs/foo/0.1', content='{}')
+        registry.register(method='GET', path='/package/eggs/mock', content={'package_types': ['conda']})
+        registry.register(method='GET', path='/release/eggs/mock/2.0.0', content='{}')
+        for path in ('eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2', 'eggs/mock/2.0.0/osx-64/mock-2.0.0-py37_1000.conda'):
+            registry.register(
+                method='POST',
+                path=f'/stage/{path}',
+                content={'post_url': 'http://s3url.com/s3_url', 'form_data': {}, 'dist_id': 'dist_id'},
+            )
+            registry.register(method='POST', path=f'/commit/{path}', status=200, content={})
+        registry.register(method='POST', path='/s3_url', status=201)
+
+        main(['--show-traceback', 'upload', data_dir('foo-0.1-0.tar.bz2'), data_dir('mock-2.0.0-py37_1000.conda')])
+
+        registry.assertAllCalled()
+
+    @urlpatch
+    def test_upload_prefetch_packages_without_versions(self, registry):
+        registry.register(method='HEAD', path='/', status=200)
+        registry.register(method='GET', path='/user', content='{"login": "eggs"}')
+        registry.register(
+            method='GET',
+            path='/packages/eggs',
+            content=json.dumps([{'name': 'foo', 'package_types': ['conda']}]),
+        )
+        release_response = registry.register(method='GET', path='/release/eggs/foo/0.1', content='{}')
+        registry.register(method='GET', path='/package/eggs/mock', content={'package_types': ['conda']})
+        registry.register(method='GET', path='/release/eggs/mock/2.0.0', content='{}')
+        for path in ('eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2', 'eggs/mock/2.0.0/osx-64/mock-2.0.0-py37_1000.conda'):
+            registry.register(
+                method='POST',
+                path=f'/stage/{path}',
+                content={'post_url': 'http://s3url.com/s3_url', 'form_data': {}, 'dist_id': 'dist_id'},
+            )
+            registry.register(method='POST', path=f'/commit/{path}', status=200, content={})
+        registry.register(method='POST', path='/s3_url', status=201)
+
+        main(['--show-traceback', 'upload', data_dir('foo-0.1-0.tar.bz2'), data_dir('mock-2.0.0-py37_1000.conda')])
+
+        registry.assertAllCalled()
+        self.assertEqual(release_response.called, 1)
+
+    @urlpatch
+    def test_upload_release_listed_once(self, registry):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        filenames = []
+        for build in range(3):
+            filenames.append(os.path.join(tmpdir, f'foo-0.1-{build}.tar.bz2'))
+            shutil.copyfile(data_dir('foo-0.1-0.tar.bz2'), filenames[-1])
+
+        registry.register(method='HEAD', path='/', status=200)
+        registry.register(method='GET', path='/user', content='{"login": "eggs"}')
+        registry.register(method='GET', path='/packages/eggs', content='[]')
+        registry.register(method='GET', path='/package/eggs/foo', content={'package_types': ['conda']})
+        release_response = registry.register(
+            method='GET',
+            path='/release/eggs/foo/0.1',
+            content={'distributions': [{'basename': 'osx-64/foo-0.1-0.tar.bz2'}]},
+        )
+        for build in (1, 2):
+            registry.register(
+                method='POST',
+                path=f'/stage/eggs/foo/0.1/osx-64/foo-0.1-{build}.tar.bz2',
+                content={'post_url': 'http://s3url.com/s3_url', 'form_data': {}, 'dist_id': 'dist_id'},
+            )
+            registry.register(
+                method='POST', path=f'/commit/eggs/foo/0.1/osx-64/foo-0.1-{build}.tar.bz2', status=200, content={}
+            )
+        registry.register(method='POST', path='/s3_url', status=201)
+
+        main(['--show-traceback', 'upload', '--skip-existing', '--keep-basename', *filenames])
+
+        registry.assertAllCalled()
+        self.assertEqual(release_response.called, 1)
+
+    @urlpatch
+    def test_upload_resume(self, registry):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        filenames = []
+        for build in range(2):
+            filenames.append(os.path.join(tmpdir, f'foo-0.1-{build}.tar.bz2'))
+            shutil.copyfile(data_dir('foo-0.1-0.tar.bz2'), filenames[-1])
+
+        registry.register(method='HEAD', path='/', status=200)
+        registry.register(method='GET', path='/user', content='{"login": "eggs"}')
+        registry.register(method='GET', path='/packages/eggs', content='[]')
+        registry.register(method='GET', path='/package/eggs/foo', content={'package_types': ['conda']})
+        registry.register(method='GET', path='/release/eggs/foo/0.1', content={'distributions': []})
+        staging_responses = [
+            registry.register(
+                method='POST',
+                path=f'/stage/eggs/foo/0.1/osx-64/foo-0.1-{build}.tar.bz2',
+                content={'post_url': 'http://s3url.com/s3_url', 'form_data': {}, 'dist_id': f'dist_{build}'},
+            )
+            for build in range(2)
+        ]
+        s3_response = registry.register(method='POST', path='/s3_url', status=201)
+        registry.register(method='POST', path='/commit/eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2', content={})
+        registry.register(method='POST', path='/commit/eggs/foo/0.1/osx-64/foo-0.1-1.tar.bz2', status=500)
+
+        with self.assertRaises(errors.ServerError):
+            main(['--show-traceback', 'upload', '--keep-basename', '--resume', *filenames])
+        self.assertEqual(s3_response.called, 2)
+
+        commit_response = registry.register(
+            method='POST', path='/commit/eggs/foo/0.1/osx-64/foo-0.1-1.tar.bz2', content={}
+        )
+        with unittest.mock.patch.object(Uploader, 'detect_package_meta') as detect_mock:
+            main(['--show-traceback', 'upload', '--keep-basename', '--resume', *filenames])
+
+        detect_mock.assert_not_called()
+        self.assertEqual([response.called for response in staging_responses], [1, 1])
+        self.assertEqual(s3_response.called, 2)
+        self.assertEqual(json.loads(commit_response.req.body), {'dist_id': 'dist_1'})
+        self.assertFalse(os.path.exists(os.path.join(self.cache_dir, 'uploads.jsonl')))
+
+    @urlpatch
+    def test_upload_manifest(self, registry):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        shutil.copyfile(data_dir('foo-0.1-0.tar.bz2'), os.path.join(tmpdir, 'foo-0.1-0.tar.bz2'))
+        manifest = os.path.join(tmpdir, 'uploads.jsonl')
+        with open(manifest, 'wt', encoding='utf8') as stream:
+            entry = {
+                'path': 'foo-0.1-0.tar.bz2',
+                'package': 'foo',
+                'version': '0.1',
+                'attrs': {'subdir': 'osx-64', 'build': '0'},
+                'dependencies': {'depends': []},
+                'md5': '0' * 32,
+                'sha256': '1' * 64,
+            }
+            stream.write(json.dumps(entry) + '\n\n')
+
+        registry.register(method='HEAD', path='/', status=200)
+        registry.register(method='GET', path='/user', content='{"login": "eggs"}')
+        registry.register(method='GET', path='/package/eggs/foo', content={'package_types': ['conda']})
+        registry.register(method='GET', path='/release/eggs/foo/0.1', content='{}')
+        staging_response = registry.register(
+            method='POST',
+            path='/stage/eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2',
+            content={'post_url': 'http://s3url.com/s3_url', 'form_data': {}, 'dist_id': 'dist_id'},
+        )
+        registry.register(method='POST', path='/s3_url', status=201)
+        registry.register(method='POST', path='/commit/eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2', status=200, content={})
+
+        with (
+            unittest.mock.patch.object(Uploader, 'detect_package_meta') as detect_mock,
+            unittest.mock.patch.object(detect, 'get_attrs') as get_attrs_mock,
+        ):
+            main(['--show-traceback', 'upload', '--manifest', manifest])
+
+        registry.assertAllCalled()
+        detect_mock.assert_not_called()
+        get_attrs_mock.assert_not_called()
+        staging_request = json.loads(staging_response.req.body)
+        self.assertEqual(staging_request['sha256'], '1' * 64)
+        self.assertEqual(staging_request['attrs'], {'subdir': 'osx-64', 'build': '0'})
+        self.assertEqual(staging_request['dependencies'], {'depends': []})
+
+    @urlpatch
+    def test_upload_manifest_invalid(self, registry):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        manifest = os.path.join(tmpdir, 'uploads.jsonl')
+        with open(manifest, 'wt', encoding='utf8') as stream:
+            stream.write(json.dumps({'path': 'foo-0.1-0.tar.bz2', 'version': '0.1'}) + '\n')
+
+        registry.register(method='HEAD', path='/', status=200)
+        registry.register(method='GET', path='/user', content='{"login": "eggs"}')
+
+        with self.assertRaisesRegex(errors.UserError, 'line 1'):
+            main(['--show-traceback', 'upload', '--manifest', manifest])
+
+    @urlpatch
+    def test_upload_skip_identical(self, registry):
+        with open(data_dir('foo-0.1-0.tar.bz2'), 'rb') as stream:
+            sha256 = hashlib.sha256(stream.read()).hexdigest()
+
+        registry.register(method='HEAD', path='/', status=200)
+        registry.register(method='GET', path='/user', content='{"login": "eggs"}')
+        registry.register(
+            method='GET',
+            path='/release/eggs/foo/0.1',
+            content={'distributions': [{'basename': 'osx-64/foo-0.1-0.tar.bz2', 'sha256': sha256}]},
+        )
+
+        main(['--show-traceback', 'upload', '--skip-identical', data_dir('foo-0.1-0.tar.bz2')])
+
+        registry.assertAllCalled()
+        self.assertIn('Identical distribution already exists', self.stream.getvalue())
+
+    @urlpatch
+    def test_upload_skip_identical_replaces_changed(self, registry):
+        registry.register(method='HEAD', path='/', status=200)
+        registry.register(method='GET', path='/user', content='{"login": "eggs"}')
+        registry.register(method='GET', path='/package/eggs/foo', content={'package_types': ['conda']})
+        registry.register(
+            method='GET',
+            path='/release/eggs/foo/0.1',
+            content={'distributions': [{'basename': 'osx-64/foo-0.1-0.tar.bz2'}]},
+        )
+        registry.register(method='GET', path='/dist/eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2', content={'md5': '00'})
+        registry.register(method='DELETE', path='/dist/eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2', content='{}')
+        registry.register(
+            method='POST',
+            path='/stage/eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2',
+            content={'post_url': 'http://s3url.com/s3_url', 'form_data': {}, 'dist_id': 'dist_id'},
+        )
+        registry.register(method='POST', path='/s3_url', status=201)
+        registry.register(method='POST', path='/commit/eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2', status=200, content={})
+
+        main(['--show-traceback', 'upload', '--skip-identical', data_dir('foo-0.1-0.tar.bz2')])
+
+        registry.assertAllCalled()
+
+    @urlpatch
+    def test_upload_retry_transfer(self, registry):
+        registry.register(method='HEAD', path='/', status=200)
+        registry.register(method='GET', path='/user', content='{"login": "eggs"}')
+        registry.register(method='GET', path='/package/eggs/foo', content={'package_types': ['conda']})
+        registry.register(method='GET', path='/release/eggs/foo/0.1', content='{}')
+        registry.register(
+            method='POST',
+            path='/stage/eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2',
+            content={'post_url': 'http://s3url.com/s3_url', 'form_data': {}, 'dist_id': 'dist_id'},
+        )
+        bodies = []
+        s3_response = registry.register(
+            method='POST', path='/s3_url', status=201, side_effect=lambda: bodies.append(s3_response.req.body.read())
+        )
+
+        def fail_once():
+            bodies.append(failed_response.req.body.read())
+            registry.unregister(failed_response)
+
+        failed_response = registry.register(
+            method='POST',
+            path='/s3_url',
+            status=503,
+            content='<Error><Code>SlowDown</Code></Error>',
+            headers={'Retry-After': '2'},
+            side_effect=fail_once,
+        )
+        registry.register(method='POST', path='/commit/eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2', status=200, content={})
+
+        with unittest.mock.patch('time.sleep') as sleep:
+            main(['--show-traceback', 'upload', data_dir('foo-0.1-0.tar.bz2')])
+
+        sleep.assert_called_once_with(2.0)
+        self.assertEqual(failed_response.called, 1)
+        self.assertEqual(s3_response.called, 1)
+        with open(data_dir('foo-0.1-0.tar.bz2'), 'rb') as stream:
+            content = stream.read()
+        self.assertEqual(len(bodies), 2)
+        self.assertIn(content, bodies[0])
+        self.assertIn(content, bodies[1])
+        self.assertIn('Retried 1 failed requests', self.stream.getvalue())
+
+    @urlpatch
+    def test_upload_resume_rejected_stage(self, registry):
+        registry.register(method='HEAD', path='/', status=200)
+        registry.register(method='GET', path='/user', content='{"login": "eggs"}')
+        registry.register(method='GET', path='/package/eggs/foo', content={'package_types': ['conda']})
+        registry.register(method='GET', path='/release/eggs/foo/0.1', content={'distributions': []})
+        staging_response = registry.register(
+            method='POST',
+            path='/stage/eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2',
+            content={'post_url': 'http://s3url.com/s3_url', 'form_data': {}, 'dist_id': 'dist_id'},
+        )
+        registry.register(method='POST', path='/s3_url', status=201)
+        registry.register(method='POST', path='/commit/eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2', status=500)
+
+        with self.assertRaises(errors.ServerError):
+            main(['--show-traceback', 'upload', '--resume', data_dir('foo-0.1-0.tar.bz2')])
+
+        commit_response = registry.register(
+            method='POST', path='/commit/eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2', content={}
+        )
+        rejected_response = registry.register(
+            method='POST',
+            path='/commit/eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2',
+            status=404,
+            side_effect=lambda: registry.unregister(rejected_response),
+        )
+        main(['--show-traceback', 'upload', '--resume', data_dir('foo-0.1-0.tar.bz2')])
+
+        self.assertEqual(rejected_response.called, 1)
+        self.assertEqual(staging_response.called, 2)
+        self.assertEqual(commit_response.called, 1)
+
     @urlpatch
     def test_upload_pypi(self, registry):
         registry.register(method='HEAD', path='/', status=200)
         registry.register(method='GET', path='/user', content='{"login": "eggs"}')
-        registry.register(method='GET', path='/dist/eggs/test-package34/0.3.1/test_package34-0.3.1.tar.gz', status=404)
         registry.register(method='GET', path='/package/eggs/test-package34', content={'package_types': ['pypi']})
         registry.register(method='GET', path='/release/eggs/test-package34/0.3.1', content='{}')
         staging_response = registry.register(
@@ -147,7 +566,6 @@ class Test(CLITestCase):
     def test_upload_pypi_with_conda_package_name_allowed(self, registry):
         registry.register(method='HEAD', path='/', status=200)
         registry.register(method='GET', path='/user', content='{"login": "eggs"}')
-        registry.register(method='GET', path='/dist/eggs/test_package34/0.3.1/test_package34-0.3.1.tar.gz', status=404)
         registry.register(method='GET', path='/package/eggs/test_package34', content={'package_types': ['pypi']})
         registry.register(method='GET', path='/release/eggs/test_package34/0.3.1', content='{}')
         staging_response = registry.register(
@@ -213,7 +631,6 @@ class Test(CLITestCase):
     def test_upload_file(self, registry):
         registry.register(method='HEAD', path='/', status=200)
         registry.register(method='GET', path='/user', content='{"login": "eggs"}')
-        registry.register(method='GET', path='/dist/eggs/test-package34/0.3.1/test_package34-0.3.1.tar.gz', status=404)
         registry.register(method='GET', path='/package/eggs/test-package34', content={'package_types': ['file']})
         registry.register(method='GET', path='/release/eggs/test-package34/0.3.1', content='{}')
         staging_response = registry.register(
@@ -252,7 +669,11 @@ class Test(CLITestCase):
         # regression test for #364
         registry.register(method='HEAD', path='/', status=200)
         registry.register(method='GET', path='/user', content='{"login": "eggs"}')
-        registry.register(method='GET', path='/dist/eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2', content='{}')
+        registry.register(
+            method='GET',
+            path='/release/eggs/foo/0.1',
+            content={'distributions': [{'basename': 'osx-64/foo-0.1-0.tar.bz2'}]},
+        )
 
         bool_input.return_value = False  # do not overwrite package
 
@@ -265,10 +686,13 @@ class Test(CLITestCase):
     def test_upload_interactive_overwrite(self, registry, bool_input):
         registry.register(method='HEAD', path='/', status=200)
         registry.register(method='GET', path='/user', content='{"login": "eggs"}')
-        registry.register(method='GET', path='/dist/eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2', content='{}')
+        registry.register(
+            method='GET',
+            path='/release/eggs/foo/0.1',
+            content={'distributions': [{'basename': 'osx-64/foo-0.1-0.tar.bz2'}]},
+        )
         registry.register(method='DELETE', path='/dist/eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2', content='{}')
         registry.register(method='GET', path='/package/eggs/foo', content={'package_types': ['conda']})
-        registry.register(method='GET', path='/release/eggs/foo/0.1', content='{}')
         staging_response = registry.register(
             method='POST',
             path='/stage/eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2',
@@ -288,7 +712,6 @@ class Test(CLITestCase):
     def test_upload_private_package(self, registry):
         registry.register(method='HEAD', path='/', status=200)
         registry.register(method='GET', path='/user', content='{"login": "eggs"}')
-        registry.register(method='GET', path='/dist/eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2', status=404)
         registry.register(method='GET', path='/package/eggs/foo', content='{}', status=404)
         registry.register(method='POST', path='/package/eggs/foo', content={'package_types': ['conda']}, status=200)
         registry.register(method='GET', path='/release/eggs/foo/0.1', content='{}')
@@ -309,7 +732,7 @@ class Test(CLITestCase):
     def test_upload_private_package_not_allowed(self, registry):
         registry.register(method='HEAD', path='/', status=200)
         registry.register(method='GET', path='/user', content='{"login": "eggs"}')
-        registry.register(method='GET', path='/dist/eggs/foo/0.1/osx-64/foo-0.1-0.tar.bz2', status=404)
+        registry.register(method='GET', path='/release/eggs/foo/0.1', status=404)
         registry.register(method='GET', path='/package/eggs/foo', content='{}', status=404)
         registry.register(
             method='POST',
@@ -335,6 +758,7 @@ class Test(CLITestCase):
             channel=['mychannel'],
             namespace=None,
             package_type=None,
+            limit_rate=None,
             from_deprecated_channel_flag=True,
         )
 
@@ -371,3 +795,96 @@ class Test(CLITestCase):
         self.assertIn("Invalid value for '--package-type'", error_message)
         self.assertIn('invalid_type', error_message)
         self.assertIn('is not one of', error_message)
+
+
+def test_parallel_workers_create_package_once():
+    """Parallel uploads of files from the same package must not race to create the package and release."""
+    api = unittest.mock.Mock()
+    api.package.side_effect = errors.NotFound('missing', 404)
+    api.release.side_effect = errors.NotFound('missing', 404)
+    api.add_package.side_effect = lambda *args, **kwargs: time.sleep(0.05)
+    api.add_release.side_effect = lambda *args, **kwargs: time.sleep(0.05)
+
+    uploader = Uploader(
+        arguments=argparse.Namespace(
+            auto_register=True,
+            force_metadata_update=False,
+            mode=None,
+            private=False,
+            summary='summary',
+            user='eggs',
+        ),
+    )
+    uploader._Uploader__api = api
+    uploader._Uploader__username = 'eggs'
+
+    meta = PackageMeta(filename='foo-0.1-0.tar.bz2', meta=detect.Meta(PackageType.CONDA, '.tar.bz2'))
+    meta._PackageMeta__package_attrs = {}
+    meta._PackageMeta__release_attrs = {}
+    meta.name = 'foo'
+    meta.version = '0.1'
+
+    def worker() -> None:
+        uploader.get_package(meta)
+        uploader.get_release(meta)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert api.add_package.call_count == 1
+    assert api.add_release.call_count == 1
+
+
+def test_pipeline_prepares_next_file_during_transfer():
+    """Next file must be prepared while the previous one is being transferred, within a bounded look-ahead."""
+    uploader = Uploader(arguments=argparse.Namespace())
+    lock = threading.Lock()
+    prepared_ahead = []
+    pending = set()
+    second_prepared = threading.Event()
+
+    def prepare(filename):
+        with lock:
+            pending.add(filename)
+            prepared_ahead.append(len(pending))
+        if filename == 'b':
+            second_prepared.set()
+        return filename
+
+    def upload_prepared(filename):
+        if filename == 'a':
+            assert second_prepared.wait(timeout=10), 'next file was not prepared during transfer'
+        time.sleep(0.01)
+        with lock:
+            pending.discard(filename)
+        return True
+
+    with (
+        unittest.mock.patch.object(Uploader, 'prepare', side_effect=prepare),
+        unittest.mock.patch.object(Uploader, 'upload_prepared', side_effect=upload_prepared) as upload_mock,
+    ):
+        uploader.upload_all(['a', 'b', 'c', 'd', 'e', 'f'], jobs=1, lookahead=2)
+
+    assert [call.args[0] for call in upload_mock.call_args_list] == ['a', 'b', 'c', 'd', 'e', 'f']
+    assert max(prepared_ahead) <= 3
+
+
+def test_pipeline_stops_after_first_error():
+    uploader = Uploader(arguments=argparse.Namespace())
+
+    def upload_prepared(filename):
+        if filename == 'b':
+            raise errors.BinstarError('failed')
+        return True
+
+    with (
+        unittest.mock.patch.object(Uploader, 'prepare', side_effect=lambda filename: filename),
+        unittest.mock.patch.object(Uploader, 'upload_prepared', side_effect=upload_prepared) as upload_mock,
+    ):
+        with pytest.raises(errors.BinstarError):
+            uploader.upload_all(['a', 'b', 'c', 'd', 'e', 'f'], jobs=1, lookahead=2)
+
+    assert [call.args[0] for call in upload_mock.call_args_list] == ['a', 'b']
@@ -41,17 +41,23 @@ class Responses:
 
 
 class Registry:
-    def __init__(self):
+    def __init__(self, transport=False):
+        """
+        :param transport: mock transport adapters instead of sessions, so adapters mounted on the sessions (e.g. for
+                          throttling) still handle the responses.
+        """
         self._map = []
+        self.transport = transport
+        self.target = requests.adapters.HTTPAdapter if transport else requests.Session
 
     def __enter__(self):
-        self.real_send = requests.Session.send
-        requests.Session.send = self.mock_send
+        self.real_send = self.target.send
+        self.target.send = self.mock_send
 
         return self
 
     def __exit__(self, *exec_info):
-        requests.Session.send = self.real_send
+        self.target.send = self.real_send
 
     @staticmethod
     def filter_request(rule, prepared_request):
@@ -114,7 +120,9 @@ class Registry:
         if rule.side_effect:
             rule.side_effect()
 
-        return res
+        if self.transport:
+            return res
+        return requests.hooks.dispatch_hook('response', prepared_request.hooks, res, **kwargs)
 
     def register(
         self,
@@ -0,0 +1,82 @@
+# -*- coding: utf8 -*-
+"""Tests for bandwidth limits of file transfers."""
+
+from __future__ import annotations
+
+__all__ = ()
+
+import io
+import threading
+import time
+
+import pytest
+
+from binstar_client.utils import get_server_api
+from binstar_client.utils.bandwidth import ThrottledReader, TokenBucket, format_rate, parse_rate, throttled_chunks
+
+
+@pytest.mark.parametrize(
+    'value, expected',
+    [
+        ('1024', 1024),
+        ('512k', 512 * 1024),
+        ('50M', 50 * 1024 * 1024),
+        ('1.5MB', 3 * 512 * 1024),
+        ('2GiB/s', 2 * 1024**3),
+        (4096, 4096),
+    ],
+)
+def test_parse_rate(value, expected):
+    assert parse_rate(value) == expected
+
+
+@pytest.mark.parametrize('value', ['', 'fast', '50X', '0', '-1M'])
+def test_parse_invalid_rate(value):
+    with pytest.raises(ValueError):
+        parse_rate(value)
+
+
+def test_format_rate():
+    assert format_rate(512) == '512.0 B/s'
+    assert format_rate(50 * 1024 * 1024) == '50.0 MiB/s'
+
+
+def test_bucket_is_shared_by_workers():
+    bucket = TokenBucket(1024 * 1024, burst=0)
+
+    def transfer():
+        for chunk in throttled_chunks([b'x' * 16 * 1024] * 4, bucket):
+            assert len(chunk) == 16 * 1024
+
+    started = time.monotonic()
+    workers = [threading.Thread(target=transfer) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert time.monotonic() - started >= 0.2
+    assert bucket.transferred == 256 * 1024
+    assert bucket.effective_rate <= 1.25 * 1024 * 1024
+
+
+def test_reader_paces_reads():
+    bucket = TokenBucket(64 * 1024, burst=1024 * 1024)
+    stream = io.BytesIO(b'x' * 100 * 1024)
+    stream.len = 100 * 1024
+    reader = ThrottledReader(stream, bucket)
+
+    assert reader.len == 100 * 1024
+    assert len(reader.read(1024 * 1024)) == bucket.read_size
+    assert len(reader.read()) == 100 * 1024 - bucket.read_size
+    assert bucket.transferred == 100 * 1024
+
+
+def test_get_server_api_limits_rate():
+    api = get_server_api(token='abc', config={'url': 'https://api.example.com', 'limit_rate': '10M'})
+    assert api.bandwidth.rate == 10 * 1024 * 1024
+
+    api = get_server_api(token='abc', config={'url': 'https://api.example.com', 'limit_rate': '10M'}, limit_rate=1024)
+    assert api.bandwidth.rate == 1024
+
+    assert get_server_api(token='abc', config={'url': 'https://api.example.com'}).bandwidth is None
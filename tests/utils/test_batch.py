@@ -0,0 +1,67 @@
+# -*- coding: utf8 -*-
+"""Tests for concurrent batches of API calls."""
+
+from __future__ import annotations
+
+__all__ = ()
+
+import threading
+
+import pytest
+
+from binstar_client import Binstar, errors
+from binstar_client.utils.batch import Batch
+from binstar_client.utils.throttle import ThrottlingAdapter
+
+
+def test_batch_runs_concurrently_and_keeps_order():
+    barrier = threading.Barrier(3, timeout=5)
+
+    def call(value):
+        barrier.wait()
+        return value * 2
+
+    with Batch(max_workers=3) as batch:
+        futures = [batch.submit(call, value) for value in range(3)]
+
+    assert batch.results() == [0, 2, 4]
+    assert [future.result() for future in futures] == [0, 2, 4]
+
+
+def test_batch_collects_failures():
+    def call(value):
+        if value % 2:
+            raise errors.NotFound(f'{value} not found', 404)
+        return value
+
+    with Batch(max_workers=2) as batch:
+        for value in range(4):
+            batch.submit(call, value)
+
+    items = batch.items()
+    assert [item.result for item in items if not item.failed] == [0, 2]
+    assert [item.description for item in items if item.failed] == ['call(1)', 'call(3)']
+    with pytest.raises(errors.BinstarError, match='2 of 4 requests failed'):
+        batch.results()
+
+
+def test_binstar_batch_grows_connection_pool():
+    api = Binstar(domain='https://api.example.com')
+
+    with api.batch(max_workers=32):
+        pass
+
+    assert api.session.get_adapter(api.domain).adapter._pool_maxsize == 32
+
+
+def test_binstar_pool_keeps_throttling():
+    api = Binstar(domain='https://api.example.com')
+
+    api.ensure_pool_size(32)
+    adapter = api.session.get_adapter(api.domain)
+    api.ensure_pool_size(8)
+
+    assert api.session.get_adapter(api.domain) is adapter
+    assert isinstance(adapter, ThrottlingAdapter)
+    assert adapter.limiter is api.throttle
+    assert adapter.adapter._pool_maxsize == 32
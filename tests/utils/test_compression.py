@@ -0,0 +1,73 @@
+# -*- coding: utf8 -*-
+"""Tests for compression of large request bodies."""
+
+from __future__ import annotations
+
+__all__ = ()
+
+import gzip
+import unittest.mock
+
+import requests
+
+from binstar_client import Binstar
+from binstar_client.utils.compression import CompressingAdapter
+from binstar_client.utils.throttle import ThrottlingAdapter
+
+
+def make_response(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = b''
+    response._content_consumed = True
+    return response
+
+
+def make_request(payload):
+    return requests.Request(
+        'POST',
+        'https://api.example.com/package/eggs/spam',
+        json=payload,
+        headers={'Content-Type': 'application/json'},
+    ).prepare()
+
+
+def test_compresses_large_bodies():
+    inner = unittest.mock.Mock()
+    inner.send.return_value = make_response(200)
+    adapter = CompressingAdapter(inner, threshold=1024)
+
+    adapter.send(make_request({'description': 'x' * 2048}))
+    sent = inner.send.call_args[0][0]
+    assert sent.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(sent.body) == b'{"description": "' + b'x' * 2048 + b'"}'
+    assert int(sent.headers['Content-Length']) == len(sent.body)
+
+    adapter.send(make_request({'description': 'small'}))
+    assert 'Content-Encoding' not in inner.send.call_args[0][0].headers
+
+
+def test_disables_compression_if_rejected():
+    inner = unittest.mock.Mock()
+    inner.send.side_effect = [make_response(415), make_response(200), make_response(200)]
+    adapter = CompressingAdapter(inner, threshold=1024)
+
+    assert adapter.send(make_request({'description': 'x' * 2048})).status_code == 200
+    assert adapter.send(make_request({'description': 'x' * 2048})).status_code == 200
+    assert not adapter.enabled
+    assert ['Content-Encoding' in call[0][0].headers for call in inner.send.call_args_list] == [True, False, False]
+
+
+def test_binstar_compression_is_opt_in():
+    adapter = Binstar(domain='https://api.example.com').session.get_adapter('https://api.example.com')
+    assert not isinstance(adapter.adapter, CompressingAdapter)
+
+    api = Binstar(domain='https://api.example.com', compress_threshold=1024)
+    adapter = api.session.get_adapter(api.domain)
+    assert isinstance(adapter, ThrottlingAdapter)
+    assert isinstance(adapter.adapter, CompressingAdapter)
+
+    api.batch(max_workers=32)
+    adapter = api.session.get_adapter(api.domain)
+    assert isinstance(adapter.adapter, CompressingAdapter)
+    assert adapter.adapter.adapter._pool_maxsize == 32
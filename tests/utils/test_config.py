@@ -187,3 +187,27 @@ ssl_verify: False
             self.assertFalse(os.path.exists(config_path))
             mock_os_makedirs.assert_called_once_with(test_config_dir, exist_ok=True)
             mock_os_replace.assert_called_once_with(config_path + '~', config_path)
+
+    def test_shared_server_api(self):
+        self.addCleanup(config.close_shared_clients)
+        site = {'url': 'https://api.example.com'}
+
+        api = config.get_server_api(token='abc', config=site, shared=True)
+        self.assertIs(config.get_server_api(token='abc', config=site, shared=True), api)
+        self.assertIsNot(config.get_server_api(token='def', config=site, shared=True), api)
+        self.assertIsNot(config.get_server_api(token='abc', config={**site, 'ssl_verify': False}, shared=True), api)
+        self.assertIsNot(config.get_server_api(token='abc', config=site), api)
+
+        self.assertIsNot(config.get_server_api(token='abc', config={**site, 'limit_rate': '1M'}, shared=True), api)
+        self.assertIsNot(config.get_server_api(token='abc', config={**site, 'http_cache': True}, shared=True), api)
+        cached = config.get_server_api(token='abc', config={**site, 'http_cache': True}, shared=True)
+        self.assertIs(config.get_server_api(token='abc', config={**site, 'http_cache': True}, shared=True), cached)
+
+        with self.assertRaises(BinstarError):
+            api.authenticate('eggs', 'password', application='test')
+        self.assertEqual(api.session.headers['Authorization'], 'token abc')
+
+        with unittest.mock.patch.object(api, 'close') as close:
+            config.close_shared_clients()
+            close.assert_called_once_with()
+        self.assertIsNot(config.get_server_api(token='abc', config=site, shared=True), api)
@@ -0,0 +1,109 @@
+# -*- coding: utf8 -*-
+"""Tests for package file digests calculation."""
+
+from __future__ import annotations
+
+__all__ = ()
+
+import base64
+import hashlib
+import io
+import os
+import unittest.mock
+
+import pytest
+
+from binstar_client.utils import compute_hash
+from binstar_client.utils.hashing import Digests, HashCache, compute_digests, get_digests
+
+
+CONTENT = bytes(range(256)) * 4099
+
+
+@pytest.mark.parametrize('buffer_size', [1, 1000, 1024 * 1024])
+def test_compute_digests(buffer_size):
+    digests = compute_digests(io.BytesIO(CONTENT), ('md5', 'sha256', 'blake2b'), buffer_size=buffer_size)
+
+    assert digests.size == len(CONTENT)
+    assert digests.md5 == hashlib.md5(CONTENT).hexdigest()
+    assert digests.sha256 == hashlib.sha256(CONTENT).hexdigest()
+    assert digests.hexdigests['blake2b'] == hashlib.blake2b(CONTENT).hexdigest()
+    assert digests.base64('md5') == base64.b64encode(hashlib.md5(CONTENT).digest()).decode('ascii')
+
+
+def test_compute_digests_matches_compute_hash():
+    stream = io.BytesIO(CONTENT)
+    digests = compute_digests(stream)
+
+    assert (digests.md5, digests.base64('md5'), digests.size) == compute_hash(stream)
+    assert digests.sha256 == compute_hash(stream, hash_algorithm=hashlib.sha256)[0]
+
+
+def test_compute_digests_limited_size():
+    stream = io.BytesIO(CONTENT)
+    stream.seek(100)
+
+    digests = compute_digests(stream, size=5000, buffer_size=1024)
+
+    assert digests.size == 5000
+    assert digests.sha256 == hashlib.sha256(CONTENT[100:5100]).hexdigest()
+    assert stream.tell() == 100
+
+
+def test_hash_cache_reuses_digests(tmp_path):
+    package = tmp_path / 'package.tar.bz2'
+    package.write_bytes(CONTENT)
+    cache_file = str(tmp_path / 'cache' / 'digests.json')
+
+    with HashCache(cache_file) as cache, open(package, 'rb') as stream:
+        expected = get_digests(stream, cache=cache)
+
+    with unittest.mock.patch('binstar_client.utils.hashing.compute_digests') as compute:
+        with open(package, 'rb') as stream:
+            assert get_digests(stream, cache=HashCache(cache_file)) == expected
+    compute.assert_not_called()
+
+
+def test_hash_cache_invalidated_by_changes(tmp_path):
+    package = tmp_path / 'package.tar.bz2'
+    package.write_bytes(CONTENT)
+    cache = HashCache(str(tmp_path / 'digests.json'))
+
+    with open(package, 'rb') as stream:
+        get_digests(stream, cache=cache)
+
+    package.write_bytes(CONTENT[::-1])
+    os.utime(package, ns=(0, 1))
+    with open(package, 'rb') as stream:
+        assert get_digests(stream, cache=cache).sha256 == hashlib.sha256(CONTENT[::-1]).hexdigest()
+
+
+def test_hash_cache_evicts_least_recently_used(tmp_path):
+    cache = HashCache(str(tmp_path / 'digests.json'), max_entries=2)
+    digests = Digests(size=1, hexdigests={'md5': '00', 'sha256': '00'})
+
+    cache.put(('a', 1, 1, 1), digests)
+    cache.put(('b', 1, 1, 2), digests)
+    assert cache.get(('a', 1, 1, 1)) == digests
+    cache.put(('c', 1, 1, 3), digests)
+    cache.flush()
+
+    reloaded = HashCache(cache.path)
+    assert reloaded.get(('a', 1, 1, 1)) == digests
+    assert reloaded.get(('b', 1, 1, 2)) is None
+    assert reloaded.get(('c', 1, 1, 3)) == digests
+
+
+def test_hash_cache_writes_once_per_flush(tmp_path):
+    cache = HashCache(str(tmp_path / 'digests.json'))
+    digests = Digests(size=1, hexdigests={'md5': '00', 'sha256': '00'})
+
+    with unittest.mock.patch.object(HashCache, '_save', autospec=True, side_effect=HashCache._save) as save:
+        with cache:
+            for inode in range(10):
+                cache.put(('a', 1, 1, inode), digests)
+            assert not os.path.exists(cache.path)
+        cache.flush()
+
+    save.assert_called_once()
+    assert HashCache(cache.path).get(('a', 1, 1, 9)) == digests
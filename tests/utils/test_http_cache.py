@@ -0,0 +1,94 @@
+# -*- coding: utf8 -*-
+"""Tests for the cache of API responses."""
+
+from __future__ import annotations
+
+__all__ = ()
+
+import os
+import unittest.mock
+
+from binstar_client import Binstar
+from binstar_client.utils import get_server_api
+from binstar_client.utils.http_cache import ResponseCache
+from tests.urlmock import Registry
+
+
+def test_cache_is_scoped_by_identity(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put('https://api.example.com/package/eggs/spam', 'token first', {'name': 'spam'}, {'ETag': '"1"'})
+
+    entry = cache.get('https://api.example.com/package/eggs/spam', 'token first')
+    assert entry.content == {'name': 'spam'}
+    assert entry.validators == {'If-None-Match': '"1"'}
+    assert cache.get('https://api.example.com/package/eggs/spam', 'token second') is None
+    assert cache.get('https://api.example.com/package/eggs/spam', None) is None
+
+
+def test_cache_evicts_oldest(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_size=1024)
+    for index in range(10):
+        cache.put(f'https://api.example.com/package/eggs/{index}', None, {'padding': 'x' * 200}, {})
+
+    assert cache.get('https://api.example.com/package/eggs/9', None) is not None
+    assert sum(len(files) for _, _, files in os.walk(str(tmp_path))) < 10
+
+
+def test_cache_is_scanned_only_when_full(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_size=4096)
+
+    with unittest.mock.patch('os.walk', wraps=os.walk) as walk:
+        for index in range(5):
+            cache.put(f'https://api.example.com/package/eggs/{index}', None, {'padding': 'x' * 200}, {})
+        assert walk.call_count == 1
+
+        for index in range(5, 40):
+            cache.put(f'https://api.example.com/package/eggs/{index}', None, {'padding': 'x' * 200}, {})
+        assert 1 < walk.call_count < 10
+
+    assert (
+        sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(str(tmp_path)) for name in files)
+        <= 4096
+    )
+
+
+def test_binstar_revalidates_cached_response(tmp_path):
+    api = Binstar(token='abc', domain='https://api.example.com', http_cache=ResponseCache(str(tmp_path), ttl=0))
+
+    with Registry() as registry:
+        registry.register(path='/package/eggs/spam', content={'name': 'spam'}, headers={'ETag': '"1"'})
+        assert api.package('eggs', 'spam') == {'name': 'spam'}
+
+        revalidated = registry.register(
+            path='/package/eggs/spam',
+            status=304,
+            expected_headers={'If-None-Match': '"1"', 'Authorization': 'token abc'},
+        )
+        assert api.package('eggs', 'spam') == {'name': 'spam'}
+        assert len(revalidated._resps) == 1
+
+
+def test_binstar_uses_fresh_response_and_invalidates_it(tmp_path):
+    api = Binstar(token='abc', domain='https://api.example.com', http_cache=ResponseCache(str(tmp_path), ttl=60))
+
+    with Registry() as registry:
+        fetched = registry.register(path='/channels/eggs/main', content={'files': 1})
+        assert api.show_channel('main', 'eggs') == {'files': 1}
+        assert api.show_channel('main', 'eggs') == {'files': 1}
+        assert len(fetched._resps) == 1
+
+        registry.register(path='/channels/eggs/main', method='POST', status=201)
+        api.add_channel('main', 'eggs', package='spam')
+
+        registry.register(path='/channels/eggs/main', content={'files': 2})
+        assert api.show_channel('main', 'eggs') == {'files': 2}
+
+
+def test_get_server_api_enables_cache():
+    api = get_server_api(
+        token='abc', config={'url': 'https://api.example.com', 'http_cache': True, 'http_cache_ttl': 5}
+    )
+    assert isinstance(api.http_cache, ResponseCache)
+    assert api.http_cache.ttl == 5.0
+
+    assert get_server_api(token='abc', config={'url': 'https://api.example.com'}).http_cache is None
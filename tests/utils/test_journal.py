@@ -0,0 +1,103 @@
+# -*- coding: utf8 -*-
+"""Tests for the upload journal."""
+
+from __future__ import annotations
+
+__all__ = ()
+
+import os
+
+import pytest
+
+from binstar_client.utils.journal import UploadJournal, UploadState
+
+
+def test_journal_records_merged_and_persisted(tmp_path):
+    package = tmp_path / 'package.tar.bz2'
+    package.write_bytes(b'content')
+    journal = UploadJournal(str(tmp_path / 'cache' / 'uploads.jsonl'))
+    key = journal.key_for(str(package), 'https://api.example.com/eggs')
+
+    journal.record(key, UploadState.INSPECTED, meta={'name': 'package'})
+    journal.record(key, UploadState.STAGED, stage={'dist_id': 'dist'})
+
+    expected = {'state': 'staged', 'meta': {'name': 'package'}, 'stage': {'dist_id': 'dist'}}
+    assert journal.get(key) == expected
+    assert UploadJournal(journal.path).get(key) == expected
+
+
+def test_journal_key_changes_with_file(tmp_path):
+    package = tmp_path / 'package.tar.bz2'
+    package.write_bytes(b'content')
+    key = UploadJournal.key_for(str(package), 'https://api.example.com/eggs')
+
+    assert UploadJournal.key_for(str(package), 'https://api.example.com/spam') != key
+    package.write_bytes(b'changed content')
+    assert UploadJournal.key_for(str(package), 'https://api.example.com/eggs') != key
+
+
+def test_journal_ignores_malformed_lines(tmp_path):
+    journal = UploadJournal(str(tmp_path / 'uploads.jsonl'))
+    key = ('https://api.example.com/eggs', '/package.tar.bz2', 7, 1)
+    journal.record(key, UploadState.TRANSFERRED, stage={'dist_id': 'dist'})
+    with open(journal.path, 'at', encoding='utf8') as stream:
+        stream.write('{"destination": "https://api.example.com/eggs", "path": "/package')
+
+    assert UploadJournal(journal.path).get(key) == {'state': 'transferred', 'stage': {'dist_id': 'dist'}}
+
+
+def test_journal_forget(tmp_path):
+    journal = UploadJournal(str(tmp_path / 'uploads.jsonl'))
+    first = ('https://api.example.com/eggs', '/first.tar.bz2', 7, 1)
+    second = ('https://api.example.com/eggs', '/second.tar.bz2', 7, 1)
+    journal.record(first, UploadState.COMMITTED)
+    journal.record(second, UploadState.STAGED)
+
+    journal.forget([first])
+    reloaded = UploadJournal(journal.path)
+    assert reloaded.get(first) is None
+    assert reloaded.get(second) == {'state': 'staged'}
+
+    reloaded.forget([second])
+    assert len(UploadJournal(journal.path)) == 0
+    assert not os.path.exists(journal.path)
+
+
+def test_journal_is_compacted(tmp_path):
+    journal = UploadJournal(str(tmp_path / 'uploads.jsonl'))
+    keys = [('https://api.example.com/eggs', f'/{index}.tar.bz2', 7, 1) for index in range(4)]
+    for key in keys:
+        journal.record(key, UploadState.STAGED, stage={'dist_id': key[1]})
+        journal.record(key, UploadState.TRANSFERRED)
+
+    journal.forget(keys[:1])
+    with open(journal.path, 'rt', encoding='utf8') as stream:
+        assert len(stream.readlines()) == 3
+
+    reloaded = UploadJournal(journal.path)
+    assert len(reloaded) == 3
+    assert reloaded.get(keys[1]) == {'state': 'transferred', 'stage': {'dist_id': '/1.tar.bz2'}}
+
+
+def test_journal_forget_keeps_records_of_other_processes(tmp_path):
+    path = str(tmp_path / 'uploads.jsonl')
+    first = ('https://api.example.com/eggs', '/first.tar.bz2', 7, 1)
+    second = ('https://api.example.com/eggs', '/second.tar.bz2', 7, 1)
+    journal = UploadJournal(path)
+    other = UploadJournal(path)
+    journal.record(first, UploadState.COMMITTED)
+    other.record(second, UploadState.STAGED)
+
+    journal.forget([first])
+
+    reloaded = UploadJournal(path)
+    assert reloaded.get(first) is None
+    assert reloaded.get(second) == {'state': 'staged'}
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='POSIX permissions')
+def test_journal_is_private(tmp_path):
+    journal = UploadJournal(str(tmp_path / 'cache' / 'uploads.jsonl'))
+    journal.record(('https://api.example.com/eggs', '/first.tar.bz2', 7, 1), UploadState.STAGED, stage={})
+
+    assert os.stat(journal.path).st_mode & 0o777 == 0o600
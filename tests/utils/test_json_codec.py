@@ -0,0 +1,77 @@
+# -*- coding: utf8 -*-
+"""Tests for the JSON codec of API payloads."""
+
+from __future__ import annotations
+
+__all__ = ()
+
+import json
+import timeit
+
+import pytest
+
+from binstar_client import Binstar
+from binstar_client.utils import json_codec
+from tests.urlmock import Registry
+
+
+def make_packages(count):
+    """Generate content shaped like a :code:`user_packages` response of a large organization."""
+    return [
+        {
+            'name': f'package-{index}',
+            'owner': {'login': 'eggs', 'name': 'Eggs Inc.', 'company': None},
+            'summary': 'Łukasz\'s package for testing ☃',
+            'license': 'BSD-3-Clause',
+            'public': True,
+            'versions': [f'1.{minor}.0' for minor in range(10)],
+            'files': [
+                {
+                    'basename': f'linux-64/package-{index}-1.{minor}.0-py_0.tar.bz2',
+                    'size': 1024 * minor,
+                    'md5': '0' * 32,
+                    'attrs': {'subdir': 'linux-64', 'depends': ['python >=3.10'], 'build_number': 0},
+                }
+                for minor in range(10)
+            ],
+            'conda_platforms': ['linux-64', 'osx-64', 'win-64'],
+            'created_at': '2024-01-01T00:00:00.000000+00:00',
+        }
+        for index in range(500)
+    ]
+
+
+def test_round_trip():
+    content = {'name': 'spam', 'versions': ['1.0', '2.0'], 'size': 2**40, 'ratio': 0.5, 'public': None}
+    encoded = json_codec.dumps(content)
+
+    assert isinstance(encoded, bytes)
+    assert json.loads(encoded) == content
+    assert json_codec.loads(encoded) == content
+    assert json_codec.loads(encoded.decode('utf8')) == content
+
+
+def test_invalid_document():
+    with pytest.raises(ValueError):
+        json_codec.loads(b'{"name": ')
+    with pytest.raises(ValueError):
+        json_codec.loads(b'')
+
+
+def test_binstar_decodes_responses():
+    api = Binstar(domain='https://api.example.com')
+
+    with Registry() as registry:
+        registry.register(path='/packages/eggs', content=json.dumps(make_packages(3)))
+        assert api.user_packages('eggs') == make_packages(3)
+
+
+@pytest.mark.skipif(json_codec.BACKEND == 'json', reason='no fast JSON backend is installed')
+def test_parse_time():
+    content = json.dumps(make_packages(500)).encode('utf8')
+
+    baseline = min(timeit.repeat(lambda: json.loads(content), number=3, repeat=5))
+    codec = min(timeit.repeat(lambda: json_codec.loads(content), number=3, repeat=5))
+
+    print(f'Parsed {len(content)} bytes: json={baseline:.4f}s {json_codec.BACKEND}={codec:.4f}s')
+    assert codec < baseline
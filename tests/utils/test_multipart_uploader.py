@@ -0,0 +1,93 @@
+# -*- coding: utf8 -*-
+"""Tests for transfers of files to the storage."""
+
+from __future__ import annotations
+
+__all__ = ()
+
+import http.server
+import io
+import threading
+
+import pytest
+
+from binstar_client.utils.multipart_uploader import (
+    MAX_CHUNK_SIZE,
+    MIN_CHUNK_SIZE,
+    create_transfer_session,
+    multipart_files_upload,
+    transfer_chunk_size,
+)
+
+
+class CountingStream(io.BytesIO):
+    """Stream which counts reads from it."""
+
+    def __init__(self, content: bytes) -> None:
+        super().__init__(content)
+        self.reads: int = 0
+
+    def read(self, size=-1):
+        self.reads += 1
+        return super().read(size)
+
+
+class StorageHandler(http.server.BaseHTTPRequestHandler):
+    """Local stand-in for the storage, which accepts any form."""
+
+    received: int = 0
+
+    def do_POST(self):
+        length = int(self.headers['Content-Length'])
+        while length > 0:
+            length -= len(self.rfile.read(min(length, 1024 * 1024)))
+            StorageHandler.received = int(self.headers['Content-Length']) - length
+        self.send_response(201)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def storage_url():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StorageHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_address[1]}/'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.parametrize(
+    'size, expected',
+    [
+        (None, MIN_CHUNK_SIZE),
+        (1024, MIN_CHUNK_SIZE),
+        (64 * 1024 * 1024, MIN_CHUNK_SIZE),
+        (256 * 1024 * 1024, 4 * 1024 * 1024),
+        (64 * 1024 * 1024 * 1024, MAX_CHUNK_SIZE),
+    ],
+)
+def test_transfer_chunk_size(size, expected):
+    assert transfer_chunk_size(size) == expected
+
+
+def test_multipart_files_upload_reads_large_chunks(storage_url):
+    content = b'\x00' * (8 * 1024 * 1024)
+    stream = CountingStream(content)
+
+    with create_transfer_session() as session:
+        response = multipart_files_upload(
+            storage_url,
+            {'key': 'value'},
+            {'file': ('package.conda', stream)},
+            session=session,
+        )
+
+    assert response.status_code == 201
+    assert StorageHandler.received > len(content)
+    assert stream.reads <= len(content) // MIN_CHUNK_SIZE + 2
@@ -0,0 +1,118 @@
+# -*- coding: utf8 -*-
+"""Tests for retries of failed requests."""
+
+from __future__ import annotations
+
+__all__ = ()
+
+import asyncio
+import email.utils
+import subprocess  # nosec
+import sys
+import time
+import unittest.mock
+
+import httpx
+import pytest
+import requests
+
+from binstar_client import errors
+from binstar_client.utils.retry import RetryPolicy, RetryStatistics, parse_retry_after
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('12') == 12.0
+    assert parse_retry_after('garbage') is None
+    assert 50 < parse_retry_after(email.utils.formatdate(time.time() + 60, usegmt=True)) <= 60
+
+
+def test_delay():
+    policy = RetryPolicy(backoff_factor=1.0, max_backoff=5.0, jitter=0.0)
+
+    assert [policy.delay(attempt) for attempt in range(1, 6)] == [1.0, 2.0, 4.0, 5.0, 5.0]
+    assert policy.delay(1, retry_after=7.0) == 7.0
+    assert policy.delay(1, retry_after=3600.0) == policy.max_retry_after
+
+
+def test_delay_jitter():
+    policy = RetryPolicy(backoff_factor=1.0, jitter=0.5)
+
+    for _ in range(100):
+        assert 1.0 <= policy.delay(2) <= 2.0
+
+
+@pytest.mark.parametrize(
+    'error, idempotent, expected',
+    [
+        (requests.exceptions.ConnectTimeout(), False, True),
+        (requests.exceptions.ConnectionError(), True, True),
+        (requests.exceptions.ConnectionError(), False, False),
+        (requests.exceptions.ChunkedEncodingError(), True, True),
+        (errors.ServerError('failed', 502), True, True),
+        (errors.ServerError('failed', 502), False, False),
+        (errors.ServerError('failed', 503), False, True),
+        (errors.Conflict('failed', 409), True, False),
+        (errors.BinstarError('failed'), True, False),
+    ],
+)
+def test_is_transient(error, idempotent, expected):
+    assert RetryPolicy.is_transient(error, idempotent=idempotent) is expected
+
+
+def test_is_transient_without_httpx():
+    with unittest.mock.patch.dict(sys.modules, {'httpx': None}):
+        assert RetryPolicy.is_transient(requests.ConnectTimeout(), idempotent=False) is True
+        assert RetryPolicy.is_transient(ValueError()) is False
+
+
+def test_httpx_is_optional():
+    code = 'import sys, binstar_client.commands.upload; sys.exit("httpx" in sys.modules)'
+    assert subprocess.run([sys.executable, '-c', code], check=False).returncode == 0  # nosec
+
+
+def test_call():
+    statistics = RetryStatistics()
+    before_retry = unittest.mock.Mock()
+    function = unittest.mock.Mock(side_effect=[errors.ServerError('failed', 500), requests.ConnectionError(), 'done'])
+
+    with unittest.mock.patch('time.sleep') as sleep:
+        result = RetryPolicy().call(function, description='Test', before_retry=before_retry, statistics=statistics)
+
+    assert result == 'done'
+    assert sleep.call_count == before_retry.call_count == statistics.retries == 2
+
+
+def test_call_gives_up():
+    error = errors.ServerError('failed', 500)
+    error.retry_after = 3.0
+    function = unittest.mock.Mock(side_effect=error)
+
+    with unittest.mock.patch('time.sleep') as sleep, pytest.raises(errors.ServerError):
+        RetryPolicy(max_attempts=3).call(function, description='Test')
+
+    assert function.call_count == 3
+    assert [call.args[0] for call in sleep.call_args_list] == [3.0, 3.0]
+
+
+def test_call_gives_up_on_long_retry_after():
+    error = errors.ServerError('failed', 503)
+    error.retry_after = 3600.0
+    function = unittest.mock.Mock(side_effect=error)
+
+    with unittest.mock.patch('time.sleep') as sleep, pytest.raises(errors.ServerError) as raised:
+        RetryPolicy().call(function, description='Test')
+
+    assert raised.value is error
+    assert function.call_count == 1
+    sleep.assert_not_called()
+
+
+def test_call_async():
+    function = unittest.mock.AsyncMock(side_effect=[httpx.ConnectTimeout('timeout'), 'done'])
+
+    with unittest.mock.patch('asyncio.sleep', new=unittest.mock.AsyncMock()) as sleep:
+        result = asyncio.run(RetryPolicy().call_async(function, description='Test', idempotent=False))
+
+    assert result == 'done'
+    assert sleep.await_count == 1
@@ -0,0 +1,118 @@
+# -*- coding: utf8 -*-
+"""Tests for adaptive limits of concurrent requests."""
+
+from __future__ import annotations
+
+__all__ = ()
+
+import io
+import unittest.mock
+
+import requests
+
+from binstar_client import Binstar
+from binstar_client.utils.throttle import AdaptiveLimiter, ThrottlingAdapter
+
+
+def make_response(status_code, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = b''
+    response._content_consumed = True
+    response.headers.update(headers or {})
+    return response
+
+
+def make_request(body=None, method='POST'):
+    return requests.Request(method, 'https://api.example.com/package/eggs/spam', data=body).prepare()
+
+
+def test_limiter_aimd():
+    limiter = AdaptiveLimiter(4.0)
+
+    for _ in range(4):
+        limiter.acquire()
+        limiter.release(throttled=False)
+    assert 4.9 < limiter.limit < 5.0
+
+    limiter.acquire()
+    limiter.release(throttled=True)
+    assert 2.4 < limiter.limit < 2.5
+
+    limiter.acquire()
+    limiter.release(throttled=None)
+    assert 2.4 < limiter.limit < 2.5
+    assert (limiter.requests, limiter.throttled) == (6, 1)
+
+
+def test_adapter_retries_throttled_request():
+    inner = unittest.mock.Mock()
+    inner.send.side_effect = [
+        make_response(429, {'Retry-After': '0'}),
+        make_response(503, {'Retry-After': '0'}),
+        make_response(200),
+    ]
+    limiter = AdaptiveLimiter(8.0)
+
+    with unittest.mock.patch('random.uniform', return_value=0.0):
+        response = ThrottlingAdapter(inner, limiter).send(make_request(b'{}'))
+
+    assert response.status_code == 200
+    assert inner.send.call_count == 3
+    assert limiter.throttled == 2
+    assert limiter.limit < 8.0
+
+
+def test_adapter_resends_unavailable_idempotent_request():
+    inner = unittest.mock.Mock()
+    inner.send.side_effect = [make_response(503), make_response(200)]
+
+    with unittest.mock.patch('random.uniform', return_value=0.0):
+        response = ThrottlingAdapter(inner, AdaptiveLimiter()).send(make_request(b'{}', method='PUT'))
+
+    assert response.status_code == 200
+    assert inner.send.call_count == 2
+
+
+def test_adapter_leaves_unavailable_post_to_retry_policy():
+    inner = unittest.mock.Mock()
+    inner.send.return_value = make_response(503)
+    limiter = AdaptiveLimiter()
+
+    with unittest.mock.patch('random.uniform', return_value=0.0):
+        response = ThrottlingAdapter(inner, limiter).send(make_request(b'{}'))
+
+    assert response.status_code == 503
+    assert inner.send.call_count == 1
+    assert limiter.throttled == 1
+
+
+def test_adapter_does_not_replay_streams():
+    inner = unittest.mock.Mock()
+    inner.send.return_value = make_response(429, {'Retry-After': '0'})
+
+    response = ThrottlingAdapter(inner, AdaptiveLimiter()).send(make_request(io.BytesIO(b'content')))
+
+    assert response.status_code == 429
+    assert inner.send.call_count == 1
+
+
+def test_adapter_does_not_wait_for_long_retry_after():
+    inner = unittest.mock.Mock()
+    inner.send.return_value = make_response(429, {'Retry-After': '3600'})
+    limiter = AdaptiveLimiter()
+
+    response = ThrottlingAdapter(inner, limiter).send(make_request(b'{}'))
+
+    assert response.status_code == 429
+    assert inner.send.call_count == 1
+    assert limiter.throttled == 1
+
+
+def test_binstar_session_is_throttled():
+    api = Binstar(domain='https://api.example.com')
+
+    adapter = api.session.get_adapter(api.domain)
+    assert isinstance(adapter, ThrottlingAdapter)
+    assert adapter.limiter is api.throttle
+    assert not isinstance(api.transfer_session.get_adapter(api.domain), ThrottlingAdapter)